@@ -0,0 +1,89 @@
+"""Latency and throughput of async read endpoints versus the threadpool ones under concurrent load.
+
+Run from the repository root:
+
+    python -m benchmarks.async_endpoints --records 10000 --requests 2000 --concurrency 1 64 256
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import Optional
+from fastapi import APIRouter, FastAPI, HTTPException
+from src.customer import service
+from src.customer.api import router
+from src.customer.repository import CustomerRepository
+from src.responses import json_page_response, json_response
+from benchmarks.responses import get, make_customers
+
+# The read endpoints as sync handlers, as they were before the async path:
+# FastAPI runs each call in its worker thread pool.
+threadpool_router = APIRouter(prefix="/threadpool")
+
+
+@threadpool_router.get("/customers")
+def list_customers_in_threadpool(limit: int = 100, cursor: Optional[str] = None):
+    customers, next_cursor = service.get_customers_page_json(limit, cursor)
+    return json_page_response(customers, next_cursor)
+
+
+@threadpool_router.get("/customers/{customer_id}")
+def get_customer_in_threadpool(customer_id: uuid.UUID):
+    try:
+        return json_response(*service.get_customer_json(customer_id))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+async def measure(app: FastAPI, path: str, query: str, requests: int, concurrency: int) -> tuple[list[float], float]:
+    """Per-request latencies in seconds and the overall requests per second."""
+    latencies: list[float] = []
+
+    async def client(count: int) -> None:
+        for _ in range(count):
+            start = time.perf_counter()
+            await get(app, path, query)
+            latencies.append(time.perf_counter() - start)
+
+    per_client, extra = divmod(requests, concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(per_client + (i < extra)) for i in range(concurrency)))
+    return latencies, requests / (time.perf_counter() - start)
+
+
+def summary(latencies: list[float], throughput: float) -> str:
+    cuts = statistics.quantiles(latencies, n=100)
+    return f"{throughput:9.1f} req/s  p50 {cuts[49] * 1000:7.2f} ms  p99 {cuts[98] * 1000:7.2f} ms"
+
+
+async def run(records: int, requests: int, concurrency_levels: list[int]) -> None:
+    customers = make_customers(records)
+    service._repository = CustomerRepository()
+    service._repository.add_many(customers)
+    app = FastAPI()
+    app.include_router(router)
+    app.include_router(threadpool_router)
+
+    for label, path, query in (
+        ("get by id", f"/customers/{customers[0].id}", ""),
+        ("list, 100 per page", "/customers", "limit=100"),
+    ):
+        for concurrency in concurrency_levels:
+            await measure(app, path, query, concurrency, concurrency)
+            threadpool = summary(*await measure(app, "/threadpool" + path, query, requests, concurrency))
+            native = summary(*await measure(app, path, query, requests, concurrency))
+            print(f"{label:<20} x{concurrency:<5} threadpool {threadpool}   async {native}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 64, 256])
+    args = parser.parse_args()
+    asyncio.run(run(args.records, args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""Latency percentiles and throughput of every customer and employee route, comparable between commits.
+
+Run from the repository root. By default requests go through `src.fastapi:app`
+in process, over ASGI, against fresh stores:
+
+    python -m benchmarks.endpoints --records 10000 --requests 1000 --concurrency 32 --output after.json
+
+With `--url` they go to a running server instead, such as one started with
+`uvicorn src.fastapi:app`; records are then added to whatever it stores:
+
+    python -m benchmarks.endpoints --url http://127.0.0.1:8000 --records 10000
+
+Given the results of an earlier run as `--baseline`, every route is compared
+with it and the exit status is 1 when any got slower by more than
+`--threshold`, in requests per second or p95 latency:
+
+    python -m benchmarks.endpoints --output after.json --baseline before.json --threshold 0.2
+
+Change streams are left out: a request to one never completes.
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import count
+from typing import Callable, NamedTuple, Optional
+from urllib.parse import urlencode, urlsplit
+from benchmarks.responses import request
+
+JSON_HEADERS = (("Content-Type", "application/json"),)
+SEED_BATCH_SIZE = 1000
+BULK_BATCH_SIZE = 100
+
+# A request as (method, path, query, body, headers).
+Request = tuple[str, str, str, bytes, tuple[tuple[str, str], ...]]
+
+
+class Route(NamedTuple):
+    name: str
+    # Builds the next request; write routes never repeat one.
+    next_request: Callable[[], Request]
+    expected_status: int
+    # Caps the requests made, for routes that consume records or scan them all.
+    max_requests: Optional[int] = None
+
+
+class Seeded(NamedTuple):
+    ids: list[str]
+    emails: list[str]
+    # A change sequence shortly before the last records were added.
+    since: int
+
+
+class AsgiClient:
+    """Sends requests through an ASGI app in this process."""
+
+    def __init__(self, app):
+        self._app = app
+
+    async def request(self, method: str, path: str, query: str = "", body: bytes = b"", headers=()) -> tuple[int, bytes]:
+        return await request(self._app, method, path, query, body, headers)
+
+    def close(self) -> None:
+        pass
+
+
+class HttpClient:
+    """Sends requests to a server over HTTP/1.1.
+
+    Every worker thread keeps its own keep-alive connection, and there are
+    as many threads as concurrent clients.
+    """
+
+    def __init__(self, url: str, connections: int):
+        parts = urlsplit(url)
+        self._host = parts.hostname
+        self._port = parts.port or 80
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(connections)
+
+    async def request(self, method: str, path: str, query: str = "", body: bytes = b"", headers=()) -> tuple[int, bytes]:
+        send = partial(self._send, method, path + (f"?{query}" if query else ""), body, dict(headers))
+        return await asyncio.get_running_loop().run_in_executor(self._executor, send)
+
+    def _send(self, method: str, target: str, body: bytes, headers: dict[str, str]) -> tuple[int, bytes]:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self._host, self._port, timeout=60)
+        try:
+            connection.request(method, target, body=body or None, headers=headers)
+            response = connection.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self._local.connection = None
+            raise
+
+    def close(self) -> None:
+        self._executor.shutdown()
+
+
+def customer_payload(tag: str, index: int) -> dict:
+    return {
+        "name": f"Customer {index}",
+        "email": f"customer{index}-{tag}@example.com",
+        "phone": "123-456-7890",
+        "address": f"{index} Main St"
+    }
+
+
+def employee_payload(tag: str, index: int) -> dict:
+    return {
+        "name": f"Employee {index}",
+        "email": f"employee{index}-{tag}@example.com",
+        "phone": "123-456-7890",
+        "department": f"Department {index % 50}",
+        "position": f"Position {index % 200}",
+        "salary": f"{30000 + index % 90000}.00"
+    }
+
+
+async def seed(client, prefix: str, payload: Callable[[str, int], dict], tag: str, records: int) -> Seeded:
+    """Add `records` entities through the bulk route, remembering their ids and emails."""
+    ids: list[str] = []
+    emails: list[str] = []
+    since = 0
+    for start in range(0, records, SEED_BATCH_SIZE):
+        if start + SEED_BATCH_SIZE >= records:
+            _, body = await client.request("GET", f"/{prefix}/changes")
+            since = json.loads(body)["next_since"]
+        batch = [payload(tag, index) for index in range(start, min(start + SEED_BATCH_SIZE, records))]
+        status, body = await client.request("POST", f"/{prefix}/bulk", body=json.dumps(batch).encode(), headers=JSON_HEADERS)
+        if status != 201:
+            raise RuntimeError(f"Seeding /{prefix} failed with status {status}: {body[:200]!r}")
+        for created in json.loads(body)["created"]:
+            ids.append(created["id"])
+            emails.append(created["email"])
+    return Seeded(ids, emails, since)
+
+
+def cycling(values: list) -> Callable[[], object]:
+    counter = count()
+    return lambda: values[next(counter) % len(values)]
+
+
+def entity_routes(prefix: str, seeded: Seeded, payload: Callable[[str, int], dict], tag: str, export_requests: int) -> list[Route]:
+    """The routes shared by customers and employees, reads first and deletes last."""
+    next_id = cycling(seeded.ids)
+    next_email = cycling(seeded.emails)
+    # Entities added while measuring are numbered after the seeded ones.
+    new_indexes = count(len(seeded.ids))
+    updates = count()
+    deletable = deque(seeded.ids)
+    id_route = f"/{prefix}/{{{prefix[:-1]}_id}}"
+
+    def bulk() -> Request:
+        batch = [payload(tag, next(new_indexes)) for _ in range(BULK_BATCH_SIZE)]
+        return "POST", f"/{prefix}/bulk", "", json.dumps(batch).encode(), JSON_HEADERS
+
+    return [
+        Route(f"GET {id_route}", lambda: ("GET", f"/{prefix}/{next_id()}", "", b"", ()), 200),
+        Route(
+            f"GET {id_route} (If-None-Match)",
+            lambda: ("GET", f"/{prefix}/{next_id()}", "", b"", (("If-None-Match", '"1"'),)),
+            304
+        ),
+        Route(f"GET /{prefix}/by-email/{{email}}", lambda: ("GET", f"/{prefix}/by-email/{next_email()}", "", b"", ()), 200),
+        Route(f"GET /{prefix}", lambda: ("GET", f"/{prefix}", "limit=100", b"", ()), 200),
+        Route(
+            f"GET /{prefix}/changes",
+            lambda: ("GET", f"/{prefix}/changes", urlencode({"since": seeded.since, "limit": 100}), b"", ()),
+            200
+        ),
+        Route(f"GET /{prefix}/export", lambda: ("GET", f"/{prefix}/export", "format=ndjson", b"", ()), 200, export_requests),
+        Route(
+            f"POST /{prefix}",
+            lambda: ("POST", f"/{prefix}", "", json.dumps(payload(tag, next(new_indexes))).encode(), JSON_HEADERS),
+            201
+        ),
+        Route(f"POST /{prefix}/bulk", bulk, 201),
+        Route(
+            f"PUT {id_route}",
+            lambda: ("PUT", f"/{prefix}/{next_id()}", "", json.dumps({"name": f"Renamed {next(updates)}"}).encode(), JSON_HEADERS),
+            200
+        ),
+        Route(f"DELETE {id_route}", lambda: ("DELETE", f"/{prefix}/{deletable.popleft()}", "", b"", ()), 204, len(deletable)),
+    ]
+
+
+def customer_routes(seeded: Seeded, tag: str, export_requests: int) -> list[Route]:
+    routes = entity_routes("customers", seeded, customer_payload, tag, export_requests)
+    terms = cycling([f"customer {index}" for index in range(0, len(seeded.ids), max(len(seeded.ids) // 100, 1))])
+    search = Route("GET /customers/search", lambda: ("GET", "/customers/search", urlencode({"q": terms()}), b"", ()), 200)
+    return routes[:4] + [search] + routes[4:]
+
+
+def employee_routes(seeded: Seeded, tag: str, export_requests: int) -> list[Route]:
+    routes = entity_routes("employees", seeded, employee_payload, tag, export_requests)
+    departments = cycling([f"Department {index}" for index in range(50)])
+    queries = [
+        ("GET /employees?department=", lambda: urlencode({"department": departments(), "limit": 100})),
+        ("GET /employees?order_by=salary", lambda: "order_by=salary&limit=100"),
+        ("GET /employees?min_salary=&max_salary=", lambda: "min_salary=50000&max_salary=60000&limit=100"),
+    ]
+    filtered = [Route(name, partial(lambda query: ("GET", "/employees", query(), b"", ()), query), 200) for name, query in queries]
+    stats = Route("GET /employees/stats", lambda: ("GET", "/employees/stats", "", b"", ()), 200)
+    return routes[:4] + filtered + [stats] + routes[4:]
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+    }
+
+
+async def measure(client, route: Route, requests: int, concurrency: int) -> dict:
+    """Send `requests` requests of `route` from `concurrency` clients, after one warm-up request per client."""
+    latencies: list[float] = []
+    errors = 0
+
+    async def send(record: bool) -> None:
+        nonlocal errors
+        method, path, query, body, headers = route.next_request()
+        start = time.perf_counter()
+        try:
+            status, _ = await client.request(method, path, query, body, headers)
+        except (OSError, http.client.HTTPException):
+            status = None
+        if record:
+            latencies.append(time.perf_counter() - start)
+            errors += status != route.expected_status
+
+    async def worker(times: int, record: bool) -> None:
+        for _ in range(times):
+            await send(record)
+
+    warmup = concurrency
+    if route.max_requests is not None:
+        warmup = min(warmup, route.max_requests // 2)
+        requests = min(requests, route.max_requests - warmup)
+    await asyncio.gather(*(worker(1, False) for _ in range(warmup)))
+    per_client, extra = divmod(requests, concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(per_client + (i < extra), True) for i in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Routes slower than in `baseline` by more than `threshold`, as a fraction, in throughput or p95 latency."""
+    regressions = []
+    for name, current in results["routes"].items():
+        before = baseline["routes"].get(name)
+        if before is None:
+            continue
+        throughput = current["requests_per_second"] / before["requests_per_second"] - 1
+        p95 = current["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        regressed = throughput < -threshold or p95 > threshold
+        print(f"{name:<46} req/s {throughput:+7.1%}   p95 {p95:+7.1%}{'   REGRESSION' if regressed else ''}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def in_process_client(backend: str, directory: str) -> AsgiClient:
+    """The application, with fresh repositories of `backend`."""
+    from src.fastapi import app
+    from src.customer import service as customer_service
+    from src.customer.repository import CustomerRepository
+    from src.customer.sqlite_repository import SqliteCustomerRepository
+    from src.employee import service as employee_service
+    from src.employee.repository import EmployeeRepository
+    from src.employee.sqlite_repository import SqliteEmployeeRepository
+
+    if backend == "sqlite":
+        customer_service._repository = SqliteCustomerRepository(f"{directory}/benchmark.db")
+        employee_service._repository = SqliteEmployeeRepository(f"{directory}/benchmark.db")
+    else:
+        customer_service._repository = CustomerRepository()
+        employee_service._repository = EmployeeRepository()
+    return AsgiClient(app)
+
+
+async def run(args: argparse.Namespace, directory: str) -> dict:
+    client = HttpClient(args.url, args.concurrency) if args.url else in_process_client(args.backend, directory)
+    # Names are unique to the run, so records added to a running server never clash with earlier ones.
+    tag = uuid.uuid4().hex[:8]
+    results = {
+        "commit": current_commit(),
+        "target": args.url or f"asgi ({args.backend})",
+        "records": args.records,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "routes": {},
+    }
+    try:
+        customers = await seed(client, "customers", customer_payload, tag, args.records)
+        employees = await seed(client, "employees", employee_payload, tag, args.records)
+        for route in customer_routes(customers, tag, args.export_requests) + employee_routes(employees, tag, args.export_requests):
+            if args.routes and not any(pattern in route.name for pattern in args.routes):
+                continue
+            summary = await measure(client, route, args.requests, args.concurrency)
+            results["routes"][route.name] = summary
+            print(
+                f"{route.name:<46} {summary['requests_per_second']:9.1f} req/s  p50 {summary['p50_ms']:8.2f} ms  "
+                f"p95 {summary['p95_ms']:8.2f} ms  p99 {summary['p99_ms']:8.2f} ms  errors {summary['errors']}"
+            )
+    finally:
+        client.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=10_000, help="customers and employees to add before measuring")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=32, help="clients sending requests at once")
+    parser.add_argument("--export-requests", type=int, default=20, help="requests to the export routes, which send every record")
+    parser.add_argument("--backend", choices=("memory", "sqlite"), default="memory", help="store used in process")
+    parser.add_argument("--url", help="base URL of a running server to measure instead")
+    parser.add_argument("--routes", nargs="+", help="only measure routes whose name contains one of these")
+    parser.add_argument("--output", help="file to write the results to, as JSON")
+    parser.add_argument("--baseline", help="results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown against the baseline, as a fraction")
+    args = parser.parse_args()
+    if args.records < 1 or args.requests < 1 or args.concurrency < 1:
+        parser.error("--records, --requests and --concurrency must be positive")
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = asyncio.run(run(args, directory))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} route(s) regressed by more than {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
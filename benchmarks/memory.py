@@ -0,0 +1,85 @@
+"""Bytes per stored record: one pydantic model per entity versus the repositories' compact rows.
+
+Run from the repository root:
+
+    python -m benchmarks.memory --records 100000
+"""
+import argparse
+import gc
+import tracemalloc
+import uuid
+from decimal import Decimal
+from src.customer.domain import Customer
+from src.customer.repository import CustomerRepository
+from src.employee.domain import Employee
+from src.employee.repository import EmployeeRepository
+
+
+def make_customers(count: int) -> list[Customer]:
+    return [
+        Customer(
+            id=uuid.uuid4(),
+            name=f"Customer {i}",
+            email=f"customer{i}@example.com",
+            phone="123-456-7890",
+            address=f"{i} Main St"
+        )
+        for i in range(count)
+    ]
+
+
+def make_employees(count: int) -> list[Employee]:
+    return [
+        Employee(
+            id=uuid.uuid4(),
+            name=f"Employee {i}",
+            email=f"employee{i}@example.com",
+            phone="123-456-7890",
+            department=f"Department {i % 50}",
+            position=f"Position {i % 200}",
+            salary=Decimal(f"{30000 + i % 90000}.00")
+        )
+        for i in range(count)
+    ]
+
+
+def measure(build) -> int:
+    """Bytes still allocated after `build()` returns, while its result is alive."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return allocated
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+    count = args.records
+
+    for name, make, model, repository_type in (
+        ("customers", make_customers, Customer, CustomerRepository),
+        ("employees", make_employees, Employee, EmployeeRepository),
+    ):
+        # Each measurement parses the records from fresh JSON so nothing is
+        # shared with objects created outside the measured allocation.
+        payloads = [record.model_dump_json() for record in make(count)]
+
+        def as_models():
+            return {record.id: record for record in map(model.model_validate_json, payloads)}
+
+        def as_repository():
+            repository = repository_type()
+            repository.add_many([model.model_validate_json(payload) for payload in payloads])
+            return repository
+
+        before = measure(as_models) / count
+        after = measure(as_repository) / count
+        print(f"{name:<10} models {before:8.0f} B/record   rows {after:8.0f} B/record   ({after / before:.0%})")
+
+
+if __name__ == "__main__":
+    main()
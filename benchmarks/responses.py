@@ -0,0 +1,138 @@
+"""Requests per second for list and get responses: pydantic response models versus cached JSON bytes.
+
+Run from the repository root:
+
+    python -m benchmarks.responses --records 10000 --requests 200
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Optional
+from fastapi import APIRouter, FastAPI
+from src.customer import service
+from src.customer.api import CustomerPageResponse, CustomerResponse, router
+from src.customer.domain import Customer
+from src.customer.repository import CustomerRepository
+
+# The endpoints as they were before reads returned cached JSON: every
+# response is validated against its response model and encoded again.
+models_router = APIRouter(prefix="/models")
+
+
+@models_router.get("/customers", response_model=CustomerPageResponse)
+def list_customers_with_models(limit: int = 100, cursor: Optional[str] = None):
+    customers, next_cursor = service.get_customers_page(limit, cursor)
+    return {"items": customers, "next_cursor": next_cursor}
+
+
+@models_router.get("/customers/{customer_id}", response_model=CustomerResponse)
+def get_customer_with_models(customer_id: uuid.UUID):
+    return service.get_customer(customer_id)
+
+
+def make_customers(count: int) -> list[Customer]:
+    return [
+        Customer(
+            id=uuid.uuid4(),
+            name=f"Customer {i}",
+            email=f"customer{i}@example.com",
+            phone="123-456-7890",
+            address=f"{i} Main St"
+        )
+        for i in range(count)
+    ]
+
+
+async def get(app: FastAPI, path: str, query: str = "") -> bytes:
+    """Run one GET request through the ASGI app and return the response body."""
+    return (await request(app, "GET", path, query))[1]
+
+
+async def request(
+    app: FastAPI,
+    method: str,
+    path: str,
+    query: str = "",
+    body: bytes = b"",
+    headers: tuple[tuple[str, str], ...] = ()
+) -> tuple[int, bytes]:
+    """Run one request through the ASGI app and return the response status and body."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers],
+        "client": ("benchmark", 0),
+        "server": ("benchmark", 80),
+    }
+    status = 0
+    chunks = []
+    requested = False
+    # Streaming responses wait on `receive` for the client to go away; it
+    # only does once the response is complete.
+    complete = asyncio.Event()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                complete.set()
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+async def requests_per_second(app: FastAPI, path: str, query: str, requests: int) -> float:
+    await get(app, path, query)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await get(app, path, query)
+    return requests / (time.perf_counter() - start)
+
+
+async def run(records: int, requests: int) -> None:
+    customers = make_customers(records)
+    service._repository = CustomerRepository()
+    service._repository.add_many(customers)
+    app = FastAPI()
+    app.include_router(router)
+    app.include_router(models_router)
+
+    for label, path, query in (
+        ("list, 100 per page", "/customers", "limit=100"),
+        ("list, 1000 per page", "/customers", "limit=1000"),
+        ("get by id", f"/customers/{customers[0].id}", ""),
+    ):
+        models = await requests_per_second(app, "/models" + path, query, requests)
+        cached = await requests_per_second(app, path, query, requests)
+        print(f"{label:<20} models {models:9.1f} req/s   cached JSON {cached:9.1f} req/s   ({cached / models:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.records, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Time and peak memory of repository and service operations as the store grows.
+
+Every operation runs against stores seeded with each of the given record
+counts, so operations whose cost follows the store size stand out. Run from
+the repository root:
+
+    python -m benchmarks.scaling --sizes 10000 100000 1000000 --output after.json
+
+Given the results of an earlier run as `--baseline`, the exit status is 1
+when any operation got slower, or allocated more at its peak, by more than
+`--threshold`:
+
+    python -m benchmarks.scaling --output after.json --baseline before.json --threshold 0.25
+"""
+import argparse
+import gc
+import itertools
+import json
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from decimal import Decimal
+from typing import Callable, Iterator, NamedTuple
+from src.customer import service as customer_service
+from src.customer.domain import Customer
+from src.customer.repository import CustomerRepository
+from src.customer.sqlite_repository import SqliteCustomerRepository
+from src.employee import service as employee_service
+from src.employee.domain import Employee
+from src.employee.repository import EmployeeRepository
+from src.employee.sqlite_repository import SqliteEmployeeRepository
+from benchmarks.endpoints import current_commit
+
+# An operation is timed over repeated calls until it has run this long, or
+# this many times.
+MIN_TIME = 0.2
+MAX_CALLS = 1000
+# Records the read operations pick from, spread over the whole store.
+PROBES = 100
+
+
+class Operation(NamedTuple):
+    name: str
+    call: Callable[[], object]
+    # Lower for operations that use up records.
+    max_calls: int = MAX_CALLS
+
+
+def make_customers(count: int, seed: int = 0) -> list[Customer]:
+    """`count` distinct customers, the same ones for the same seed.
+
+    Models are built without validation, which would dominate seeding a
+    million records; every field is already of its declared type.
+    """
+    rng = random.Random(seed)
+    return [
+        Customer.model_construct(
+            id=uuid.UUID(int=rng.getrandbits(128), version=4),
+            name=f"Customer {i}",
+            email=f"customer{i}@example.com",
+            phone="123-456-7890",
+            address=f"{rng.randrange(10_000)} Main St"
+        )
+        for i in range(count)
+    ]
+
+
+def make_employees(count: int, seed: int = 0) -> list[Employee]:
+    """`count` distinct employees, the same ones for the same seed; see `make_customers`."""
+    rng = random.Random(seed)
+    return [
+        Employee.model_construct(
+            id=uuid.UUID(int=rng.getrandbits(128), version=4),
+            name=f"Employee {i}",
+            email=f"employee{i}@example.com",
+            phone="123-456-7890",
+            department=f"Department {rng.randrange(50)}",
+            position=f"Position {rng.randrange(200)}",
+            salary=Decimal(rng.randrange(3_000_000, 12_000_000)).scaleb(-2)
+        )
+        for i in range(count)
+    ]
+
+
+def cycling(values: list) -> Callable[[], object]:
+    counter = itertools.count()
+    return lambda: values[next(counter) % len(values)]
+
+
+def probes(records: list, seed: int = 0) -> tuple[list, list]:
+    """Records for reads and updates to pick from, and the others, for deletes to consume."""
+    sample = random.Random(seed).sample(records, min(PROBES, len(records)))
+    picked = {record.id for record in sample}
+    return sample, [record for record in reversed(records) if record.id not in picked]
+
+
+def customer_operations(repository, customers: list[Customer]) -> list[Operation]:
+    sample, others = probes(customers)
+    next_customer = cycling(sample)
+    added = itertools.count(len(customers))
+    deletable = iter(others)
+    # Positions count up from about 0 in insertion order in both backends.
+    middle = len(customers) // 2
+
+    def new_customer() -> Customer:
+        i = next(added)
+        return Customer(id=uuid.uuid4(), name=f"Customer {i}", email=f"customer{i}@example.com", phone="1", address="1 Main St")
+
+    def create() -> Customer:
+        i = next(added)
+        return customer_service.create_customer(f"Customer {i}", f"customer{i}@example.com", "1", "1 Main St")
+
+    return [
+        Operation("repository.get", lambda: repository.get(next_customer().id)),
+        Operation("repository.get_json", lambda: repository.get_json(next_customer().id)),
+        Operation("repository.get_by_email", lambda: repository.get_by_email(next_customer().email)),
+        Operation("repository.exists_by_email", lambda: repository.exists_by_email(next_customer().email)),
+        Operation("repository.get_page, first", lambda: repository.get_page(100)),
+        Operation("repository.get_page, middle", lambda: repository.get_page(100, after=middle)),
+        Operation("repository.get_page_json", lambda: repository.get_page_json(100)),
+        Operation("repository.search", lambda: repository.search(["customer", next_customer().name.split()[1]], 20)),
+        Operation("repository.get_all", repository.get_all),
+        Operation("repository.add", lambda: repository.add(new_customer())),
+        Operation("repository.update", lambda: repository.update(next_customer())),
+        # One more delete is made to measure its peak memory.
+        Operation("repository.delete", lambda: repository.delete(next(deletable).id), min(MAX_CALLS, len(others) - 1)),
+        Operation("service.create_customer", create),
+        Operation("service.update_customer", lambda: customer_service.update_customer(next_customer().id, phone="555-0100")),
+        Operation("service.get_all_customers", customer_service.get_all_customers),
+    ]
+
+
+def employee_operations(repository, employees: list[Employee]) -> list[Operation]:
+    sample, others = probes(employees)
+    next_employee = cycling(sample)
+    added = itertools.count(len(employees))
+    deletable = iter(others)
+    # Positions count up from about 0 in insertion order in both backends.
+    middle = len(employees) // 2
+
+    def new_employee() -> Employee:
+        i = next(added)
+        return Employee(
+            id=uuid.uuid4(), name=f"Employee {i}", email=f"employee{i}@example.com", phone="1",
+            department="Department 0", position="Position 0", salary=Decimal("50000.00")
+        )
+
+    def create() -> Employee:
+        i = next(added)
+        return employee_service.create_employee(
+            f"Employee {i}", f"employee{i}@example.com", "1", "Department 0", "Position 0", Decimal("50000.00")
+        )
+
+    return [
+        Operation("repository.get", lambda: repository.get(next_employee().id)),
+        Operation("repository.get_json", lambda: repository.get_json(next_employee().id)),
+        Operation("repository.get_by_email", lambda: repository.get_by_email(next_employee().email)),
+        Operation("repository.exists_by_email", lambda: repository.exists_by_email(next_employee().email)),
+        Operation("repository.get_page, first", lambda: repository.get_page(100)),
+        Operation("repository.get_page, middle", lambda: repository.get_page(100, after=middle)),
+        Operation("repository.get_page, department", lambda: repository.get_page(100, department=next_employee().department)),
+        Operation("repository.get_page, salary range", lambda: repository.get_page(100, min_salary=Decimal(50000), max_salary=Decimal(51000))),
+        Operation("repository.get_salary_page", lambda: repository.get_salary_page(100)),
+        Operation("repository.salary_stats", repository.salary_stats),
+        Operation("repository.get_all", repository.get_all),
+        Operation("repository.add", lambda: repository.add(new_employee())),
+        Operation("repository.update", lambda: repository.update(next_employee())),
+        # One more delete is made to measure its peak memory.
+        Operation("repository.delete", lambda: repository.delete(next(deletable).id), min(MAX_CALLS, len(others) - 1)),
+        Operation("service.create_employee", create),
+        Operation("service.update_employee", lambda: employee_service.update_employee(next_employee().id, phone="555-0100")),
+        Operation("service.get_all_employees", employee_service.get_all_employees),
+    ]
+
+
+def time_per_call(operation: Operation) -> tuple[float, int]:
+    """Mean seconds per call and the number of calls timed."""
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < MIN_TIME and calls < operation.max_calls:
+        operation.call()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return elapsed / calls, calls
+
+
+def peak_memory(operation: Callable[[], object]) -> int:
+    """Bytes allocated at the peak of one call, beyond what was allocated before it."""
+    gc.collect()
+    tracemalloc.start()
+    operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def seeded_stores(backend: str, size: int, directory: str) -> Iterator[tuple[str, object, list[Operation]]]:
+    """Each entity's repository seeded with `size` records, made current in its service."""
+    for entity, make, memory_type, sqlite_type, service, operations in (
+        ("customers", make_customers, CustomerRepository, SqliteCustomerRepository, customer_service, customer_operations),
+        ("employees", make_employees, EmployeeRepository, SqliteEmployeeRepository, employee_service, employee_operations),
+    ):
+        records = make(size)
+        repository = sqlite_type(f"{directory}/{entity}-{size}.db") if backend == "sqlite" else memory_type()
+        start = time.perf_counter()
+        repository.add_many(records)
+        print(f"{entity} x{size}: seeded in {time.perf_counter() - start:.2f}s")
+        service._repository = repository
+        try:
+            yield entity, repository, operations(repository, records)
+        finally:
+            repository.close()
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Operations slower, or with a higher peak, than in `baseline` by more than `threshold`, as a fraction."""
+    regressions = []
+    for name, current in results["operations"].items():
+        before = baseline["operations"].get(name)
+        if before is None:
+            continue
+        slower = current["seconds_per_call"] / before["seconds_per_call"] - 1
+        larger = current["peak_bytes"] / before["peak_bytes"] - 1 if before["peak_bytes"] else 0.0
+        regressed = slower > threshold or larger > threshold
+        print(f"{name:<56} time {slower:+7.1%}   peak {larger:+7.1%}{'   REGRESSION' if regressed else ''}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def print_growth(results: dict, sizes: list[int]) -> None:
+    """How much each operation slowed down from the smallest store to the largest."""
+    smallest, largest = min(sizes), max(sizes)
+    if smallest == largest:
+        return
+    print(f"\ntime per call at {largest} records relative to {smallest} ({largest // smallest}x the records)")
+    for name, result in results["operations"].items():
+        if result["records"] != largest:
+            continue
+        small = results["operations"][name.replace(f"@ {largest}", f"@ {smallest}")]
+        print(f"{name.rsplit(' @', 1)[0]:<48} {result['seconds_per_call'] / small['seconds_per_call']:10.1f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--backend", choices=("memory", "sqlite"), default="memory")
+    parser.add_argument("--operations", nargs="+", help="only measure operations whose name contains one of these")
+    parser.add_argument("--output", help="file to write the results to, as JSON")
+    parser.add_argument("--baseline", help="results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown against the baseline, as a fraction")
+    args = parser.parse_args()
+
+    results = {"commit": current_commit(), "backend": args.backend, "sizes": args.sizes, "operations": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            for entity, _, operations in seeded_stores(args.backend, size, directory):
+                for operation in operations:
+                    label = operation.name
+                    if args.operations and not any(pattern in label for pattern in args.operations):
+                        continue
+                    seconds, calls = time_per_call(operation)
+                    peak = peak_memory(operation.call)
+                    results["operations"][f"{entity} {label} @ {size}"] = {
+                        "records": size,
+                        "seconds_per_call": seconds,
+                        "calls": calls,
+                        "peak_bytes": peak,
+                    }
+                    print(f"  {label:<40} {seconds * 1000:12.4f} ms/call  peak {peak / 1024:12.1f} KiB")
+    print_growth(results, args.sizes)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} operation(s) regressed by more than {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
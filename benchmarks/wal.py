@@ -0,0 +1,72 @@
+"""Write overhead and recovery time of the in-memory write-ahead log and snapshot.
+
+Run from the repository root:
+
+    python -m benchmarks.wal --records 1000000
+"""
+import argparse
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+from src.durability import WriteAheadLog
+from src.employee.domain import Employee
+from src.employee.repository import EmployeeRepository
+
+
+def make_employees(count: int) -> list[Employee]:
+    return [
+        Employee(
+            id=uuid.uuid4(),
+            name=f"Employee {i}",
+            email=f"employee{i}@example.com",
+            phone="123-456-7890",
+            department=f"Department {i % 50}",
+            position=f"Position {i % 200}",
+            salary=Decimal(30000 + i % 90000)
+        )
+        for i in range(count)
+    ]
+
+
+def timed(label: str, action) -> float:
+    started = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<32} {elapsed * 1000:10.2f}ms")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--fsync", action="store_true", help="fsync after every append")
+    args = parser.parse_args()
+
+    employees = make_employees(args.records)
+    print(f"{args.records} employees, fsync={'on' if args.fsync else 'off'}")
+
+    plain = EmployeeRepository()
+    baseline = timed("add, no log", lambda: [plain.add(employee) for employee in employees])
+
+    with tempfile.TemporaryDirectory() as directory:
+        durable = EmployeeRepository(WriteAheadLog(directory, "employees", fsync=args.fsync))
+        logged = timed("add, with log", lambda: [durable.add(employee) for employee in employees])
+        print(f"{'write overhead':<32} {logged / baseline:10.2f}x")
+        durable.close()
+
+        recovered = []
+        timed("recover from log", lambda: recovered.append(EmployeeRepository(WriteAheadLog(directory, "employees"))))
+        timed("compact into snapshot", recovered[0].compact)
+        recovered[0].close()
+        restored = []
+        timed("recover from snapshot", lambda: restored.append(EmployeeRepository(WriteAheadLog(directory, "employees"))))
+        probe = employees[len(employees) // 2]
+        timed("first get by id", lambda: restored[0].get(probe.id))
+        timed("first get by email", lambda: restored[0].get_by_email(probe.email))
+        timed("full scan of snapshot", restored[0].get_all)
+        restored[0].close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import deque
+from itertools import islice
+from typing import Any, AsyncIterator, Awaitable, Callable, NamedTuple, Optional
+
+CHANGE_CREATE = "create"
+CHANGE_UPDATE = "update"
+CHANGE_DELETE = "delete"
+
+DEFAULT_CHANGE_RETENTION = 10_000
+# How often an event stream looks for new changes, and how long it may stay
+# silent before sending a comment that keeps proxies from closing it.
+STREAM_POLL_INTERVAL = 0.5
+STREAM_KEEPALIVE_INTERVAL = 15.0
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+
+class ChangesExpired(ValueError):
+    """The requested changes are older than the log retains, or from another log."""
+
+
+class Change(NamedTuple):
+    sequence: int
+    operation: str
+    id: uuid.UUID
+    # Version and JSON encoding of the record after the change; None for deletes.
+    version: Optional[int]
+    body: Optional[bytes]
+
+
+def initial_sequence() -> int:
+    """Sequence a new change log counts from: the current time in microseconds."""
+    return time.time_ns() // 1000
+
+
+def put_operation(version: int) -> str:
+    """A write that leaves a record at `version` created it when that is the first version."""
+    return CHANGE_CREATE if version == 1 else CHANGE_UPDATE
+
+
+def expired(after: int, oldest: Optional[int], latest: int) -> ChangesExpired:
+    window = f"{oldest - 1}..{latest}" if oldest is not None else f"{latest}"
+    return ChangesExpired(f"Changes since {after} are not retained (available: since {window}); resync in full")
+
+
+def check_retained(after: int, first: Optional[int], latest: int) -> None:
+    """Raise ChangesExpired unless changes read after `after` miss none.
+
+    `first` is the sequence of the first change read, or None when none
+    were, and `latest` that of the most recent write.
+    """
+    if (first is None and after > latest) or (first is not None and first != after + 1):
+        raise expired(after, first, latest)
+
+
+class ChangeLog:
+    """Bounded in-memory log of writes, numbered by consecutive sequence numbers.
+
+    Entries hold whatever payload the repository keeps for a record. The
+    log is not synchronized; the repository appends under its write lock
+    and reads under its read lock. Numbering starts from the creation time
+    in microseconds, so sequences keep increasing across restarts and a
+    consumer's position from before one is reported as expired instead of
+    matching unrelated changes.
+    """
+
+    def __init__(self, retention: int = DEFAULT_CHANGE_RETENTION):
+        self._entries: deque[tuple[int, str, bytes, Any]] = deque(maxlen=retention)
+        self._latest = initial_sequence()
+
+    @property
+    def latest(self) -> int:
+        return self._latest
+
+    def append(self, operation: str, key: bytes, payload: Any) -> None:
+        self._latest += 1
+        self._entries.append((self._latest, operation, key, payload))
+
+    def since(self, after: int, limit: int) -> list[tuple[int, str, bytes, Any]]:
+        """Up to `limit` entries after sequence `after`.
+
+        Raises ChangesExpired unless every change after `after` is retained.
+        """
+        oldest = self._entries[0][0] if self._entries else self._latest + 1
+        if not oldest - 1 <= after <= self._latest:
+            raise expired(after, oldest if self._entries else None, self._latest)
+        start = after - oldest + 1
+        return list(islice(self._entries, start, start + limit))
+
+
+def encode_change(change: Change) -> bytes:
+    return b'{"sequence":%d,"operation":"%s","id":"%s","version":%s,"data":%s}' % (
+        change.sequence,
+        change.operation.encode(),
+        str(change.id).encode(),
+        json.dumps(change.version).encode(),
+        change.body if change.body is not None else b"null"
+    )
+
+
+def encode_changes(changes: list[Change], next_since: int) -> bytes:
+    """A response shaped like the `*ChangesResponse` models."""
+    return b'{"changes":[' + b",".join(encode_change(change) for change in changes) + b'],"next_since":%d}' % next_since
+
+
+async def stream_changes(
+    fetch: Callable[[int], Awaitable[list[Change]]],
+    since: int,
+    poll_interval: float = STREAM_POLL_INTERVAL
+) -> AsyncIterator[bytes]:
+    """Server-Sent Events for every change after `since`, as they are written.
+
+    Each event carries the change's sequence as its id, so a reconnecting
+    client resumes through `Last-Event-ID`. When the client falls behind
+    the retention window a final `resync` event is sent instead.
+    """
+    quiet_since = time.monotonic()
+    while True:
+        try:
+            changes = await fetch(since)
+        except ChangesExpired as e:
+            yield b"event: resync\ndata: %s\n\n" % json.dumps({"detail": str(e)}).encode()
+            return
+        if changes:
+            yield b"".join(
+                b"id: %d\nevent: %s\ndata: %s\n\n" % (change.sequence, change.operation.encode(), encode_change(change))
+                for change in changes
+            )
+            since = changes[-1].sequence
+            quiet_since = time.monotonic()
+            continue
+        if time.monotonic() - quiet_since >= STREAM_KEEPALIVE_INTERVAL:
+            yield b": keep-alive\n\n"
+            quiet_since = time.monotonic()
+        await asyncio.sleep(poll_interval)
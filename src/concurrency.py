@@ -0,0 +1,120 @@
+import threading
+import uuid
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Iterator, Optional, TypeVar
+from anyio import to_thread
+from src.changes import Change
+
+T = TypeVar("T")
+
+
+class ReadWriteLock:
+    """Writer-preferring reader/writer lock.
+
+    Any number of readers may hold the lock together; writers are exclusive.
+    The write side is reentrant, and the thread holding it may also take the
+    read side, so a service can group several repository calls into one
+    atomic section. Upgrading a held read lock to a write lock is not
+    supported.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+
+    @property
+    def writing(self) -> bool:
+        """Whether a writer holds or awaits the lock, so that a new reader would wait."""
+        return self._writer is not None or self._waiting_writers > 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        if self._writer == threading.get_ident():
+            yield
+            return
+        with self._condition:
+            while self._writer is not None or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._writer_depth += 1
+            else:
+                self._waiting_writers += 1
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+                self._waiting_writers -= 1
+                self._writer = me
+                self._writer_depth = 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    self._writer = None
+                    self._condition.notify_all()
+
+
+async def call_async(blocking: bool, function: Callable[..., T], *args, **kwargs) -> T:
+    """Call `function` on the event loop, or in a worker thread when it is `blocking`.
+
+    Worker threads come from the same limited pool that runs FastAPI's sync
+    endpoints.
+    """
+    if blocking:
+        return await to_thread.run_sync(partial(function, *args, **kwargs))
+    return function(*args, **kwargs)
+
+
+class AsyncRepository:
+    """Awaitable read interface over a repository.
+
+    Calls to a non-blocking repository run inline on the event loop, and
+    those to a blocking one, or that may build an index, run in a worker
+    thread. Entity wrappers add their own queries; a store with native
+    async I/O can subclass one and await its own calls instead.
+    """
+
+    __slots__ = ("_repository",)
+
+    def __init__(self, repository):
+        self._repository = repository
+
+    async def get_json(self, record_id: uuid.UUID) -> Optional[tuple[bytes, int]]:
+        return await self._call(self._repository.get_json, record_id)
+
+    async def get_version(self, record_id: uuid.UUID) -> Optional[int]:
+        return await self._call(self._repository.get_version, record_id)
+
+    async def get_by_email(self, email: str):
+        return await self._call(self._repository.get_by_email, email)
+
+    async def get_changes(self, after: int, limit: int) -> list[Change]:
+        return await self._call(self._repository.get_changes, after, limit)
+
+    async def latest_change(self) -> int:
+        return await self._call(self._repository.latest_change)
+
+    def _call(self, function, *args):
+        return call_async(self._repository.blocking, function, *args)
+
+    def _call_in_thread(self, function, *args):
+        # For calls that may build an index or do work proportional to the
+        # store, which would stall every other request on the event loop.
+        return call_async(True, function, *args)
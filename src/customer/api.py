@@ -1,12 +1,27 @@
 import uuid
 from typing import Optional
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr
+from src.customer.domain import Customer
+from src.changes import EVENT_STREAM_MEDIA_TYPE, ChangesExpired, encode_changes
+from src.export import EXPORT_BATCH_SIZE, EXPORT_MEDIA_TYPES, resolve_export_format, stream_export
+from src.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.responses import json_page_response, json_response, not_modified
+from src.versions import VersionConflict, etag_matches, format_etag, parse_if_match
+from src.customer.search import DEFAULT_SEARCH_LIMIT
 from src.customer.service import (
     create_customer,
-    get_customer,
-    get_all_customers,
-    update_customer,
+    create_customers_bulk,
+    get_customer_changes_async,
+    get_customer_json_async,
+    get_customer_by_email_async,
+    get_customer_version_async,
+    get_customers_page_json_async,
+    iter_customer_batches,
+    search_customers_async,
+    stream_customer_changes,
+    update_customer_versioned,
     delete_customer,
 )
 
@@ -34,6 +49,34 @@ class CustomerResponse(BaseModel):
     address: str
 
 
+class CustomerPageResponse(BaseModel):
+    items: list[CustomerResponse]
+    next_cursor: Optional[str] = None
+
+
+class CustomerChangeResponse(BaseModel):
+    sequence: int
+    operation: str
+    id: uuid.UUID
+    version: Optional[int] = None
+    data: Optional[CustomerResponse] = None
+
+
+class CustomerChangesResponse(BaseModel):
+    changes: list[CustomerChangeResponse]
+    next_since: int
+
+
+class BulkErrorResponse(BaseModel):
+    index: int
+    detail: str
+
+
+class BulkCustomerResponse(BaseModel):
+    created: list[CustomerResponse]
+    errors: list[BulkErrorResponse]
+
+
 # Router
 router = APIRouter(prefix="/customers", tags=["customers"])
 
@@ -52,29 +95,117 @@ def create_customer_endpoint(request: CreateCustomerRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/bulk", response_model=BulkCustomerResponse, status_code=201)
+def create_customers_bulk_endpoint(
+    requests: list[CreateCustomerRequest],
+    atomic: bool = True
+):
+    created, errors = create_customers_bulk([request.model_dump() for request in requests], atomic=atomic)
+    error_list = [{"index": index, "detail": detail} for index, detail in errors.items()]
+    if atomic and errors:
+        raise HTTPException(status_code=400, detail=error_list)
+    return {"created": created, "errors": error_list}
+
+
+@router.get("/export")
+def export_customers_endpoint(
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    accept: Optional[str] = Header(None)
+):
+    export_format = resolve_export_format(format, accept)
+    return StreamingResponse(
+        stream_export(iter_customer_batches(EXPORT_BATCH_SIZE), export_format, list(Customer.model_fields)),
+        media_type=EXPORT_MEDIA_TYPES[export_format]
+    )
+
+
+@router.get("/changes", response_model=CustomerChangesResponse)
+async def list_customer_changes_endpoint(
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    try:
+        changes, next_since = await get_customer_changes_async(since, limit)
+    except ChangesExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    return json_response(encode_changes(changes, next_since))
+
+
+@router.get("/changes/stream")
+async def stream_customer_changes_endpoint(
+    since: Optional[int] = Query(None, ge=0),
+    last_event_id: Optional[int] = Header(None)
+):
+    return StreamingResponse(
+        stream_customer_changes(last_event_id if last_event_id is not None else since),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+@router.get("/search", response_model=list[CustomerResponse])
+async def search_customers_endpoint(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_PAGE_SIZE)
+):
+    try:
+        return await search_customers_async(q, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/by-email/{email}", response_model=CustomerResponse)
+async def get_customer_by_email_endpoint(email: str):
+    try:
+        return await get_customer_by_email_async(email)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @router.get("/{customer_id}", response_model=CustomerResponse)
-def get_customer_endpoint(customer_id: uuid.UUID):
+async def get_customer_endpoint(customer_id: uuid.UUID, if_none_match: Optional[str] = Header(None)):
     try:
-        return get_customer(customer_id)
+        if if_none_match is not None:
+            version = await get_customer_version_async(customer_id)
+            if etag_matches(if_none_match, version):
+                return not_modified(version)
+        return json_response(*await get_customer_json_async(customer_id))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
-@router.get("", response_model=list[CustomerResponse])
-def list_customers_endpoint():
-    return get_all_customers()
+@router.get("", response_model=CustomerPageResponse)
+async def list_customers_endpoint(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    try:
+        customers, next_cursor = await get_customers_page_json_async(limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_page_response(customers, next_cursor)
 
 
 @router.put("/{customer_id}", response_model=CustomerResponse)
-def update_customer_endpoint(customer_id: uuid.UUID, request: UpdateCustomerRequest):
+def update_customer_endpoint(
+    customer_id: uuid.UUID,
+    request: UpdateCustomerRequest,
+    response: Response,
+    if_match: Optional[str] = Header(None)
+):
     try:
-        return update_customer(
+        customer, version = update_customer_versioned(
             customer_id=customer_id,
             name=request.name,
             email=request.email,
             phone=request.phone,
-            address=request.address
+            address=request.address,
+            expected_version=parse_if_match(if_match)
         )
+        response.headers["ETag"] = format_etag(version)
+        return customer
+    except VersionConflict as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except ValueError as e:
         if "not found" in str(e):
             raise HTTPException(status_code=404, detail=str(e))
@@ -1,36 +1,209 @@
+import threading
 import uuid
-from typing import Optional
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager
+from typing import Iterator, Optional
+from src.changes import DEFAULT_CHANGE_RETENTION, Change
+from src.concurrency import AsyncRepository
+from src.durability import WriteAheadLog
+from src.records import Row, RowCodec
+from src.row_store import RowStore, page_of
 from src.customer.domain import Customer
+from src.customer.search import SEARCH_FIELDS, TextIndex
 
+_CODEC = RowCodec(Customer)
+_SEARCH_COLUMNS = [_CODEC.column(field) for field in SEARCH_FIELDS]
 
-class CustomerRepository:
-    """In-memory repository for Customer entities."""
 
-    def __init__(self):
-        self._storage: dict[uuid.UUID, Customer] = {}
+def _search_texts(row: Row) -> list[str]:
+    return [row[column] for column in _SEARCH_COLUMNS]
 
-    def add(self, customer: Customer) -> Customer:
-        self._storage[customer.id] = customer
-        return customer
 
-    def get(self, customer_id: uuid.UUID) -> Optional[Customer]:
-        return self._storage.get(customer_id)
+class BaseCustomerRepository(ABC):
+    """Storage interface the customer service depends on.
 
-    def get_all(self) -> list[Customer]:
-        return list(self._storage.values())
+    Positions returned by `get_page` are opaque, monotonically increasing
+    integers that stay valid across writes. Every write of a customer
+    increases its version, which starts at 1.
+    """
 
-    def update(self, customer: Customer) -> Customer:
-        self._storage[customer.id] = customer
-        return customer
+    # Whether calls can wait on I/O, in which case AsyncCustomerRepository
+    # makes them from a worker thread rather than the event loop.
+    blocking = True
 
-    def delete(self, customer_id: uuid.UUID) -> bool:
-        if customer_id in self._storage:
-            del self._storage[customer_id]
-            return True
-        return False
+    @abstractmethod
+    def transaction(self) -> AbstractContextManager[None]:
+        """Group several calls into one atomic unit."""
 
-    def exists_by_email(self, email: str, exclude_id: Optional[uuid.UUID] = None) -> bool:
-        for customer in self._storage.values():
-            if customer.email == email and customer.id != exclude_id:
-                return True
-        return False
+    @abstractmethod
+    def add(self, customer: Customer) -> Customer: ...
+
+    @abstractmethod
+    def add_many(self, customers: list[Customer]) -> list[Customer]: ...
+
+    @abstractmethod
+    def get(self, customer_id: uuid.UUID) -> Optional[Customer]: ...
+
+    @abstractmethod
+    def get_versioned(self, customer_id: uuid.UUID) -> Optional[tuple[Customer, int]]:
+        """`get`, along with the customer's current version."""
+
+    def get_version(self, customer_id: uuid.UUID) -> Optional[int]:
+        versioned = self.get_versioned(customer_id)
+        return versioned[1] if versioned is not None else None
+
+    @abstractmethod
+    def get_by_email(self, email: str) -> Optional[Customer]: ...
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of customers stored."""
+
+    def warm_up(self) -> None:
+        """Build the indexes queries would otherwise build on first use."""
+
+    @abstractmethod
+    def get_all(self) -> list[Customer]: ...
+
+    @abstractmethod
+    def get_page(self, limit: int, after: Optional[int] = None) -> tuple[list[Customer], Optional[int]]: ...
+
+    def get_json(self, customer_id: uuid.UUID) -> Optional[tuple[bytes, int]]:
+        """`get_versioned`, with the customer serialized to JSON."""
+        versioned = self.get_versioned(customer_id)
+        if versioned is None:
+            return None
+        customer, version = versioned
+        return customer.model_dump_json().encode(), version
+
+    def get_page_json(self, limit: int, after: Optional[int] = None) -> tuple[list[bytes], Optional[int]]:
+        """`get_page`, with every customer serialized to JSON."""
+        customers, position = self.get_page(limit, after)
+        return [customer.model_dump_json().encode() for customer in customers], position
+
+    def iter_batches(self, batch_size: int) -> Iterator[list[Customer]]:
+        """Yield every customer in insertion order, `batch_size` at a time."""
+        position = None
+        while True:
+            customers, position = self.get_page(batch_size, after=position)
+            if customers:
+                yield customers
+            if position is None:
+                return
+
+    @abstractmethod
+    def search(self, terms: list[str], limit: int) -> list[Customer]:
+        """Best `limit` customers matching every term in name, email or address, best first."""
+
+    @abstractmethod
+    def update(self, customer: Customer, expected_version: Optional[int] = None) -> Customer:
+        """Store `customer`; with `expected_version`, only if it is still the current version.
+
+        Raises VersionConflict when the stored customer is at another
+        version or no longer exists.
+        """
+
+    @abstractmethod
+    def delete(self, customer_id: uuid.UUID) -> bool: ...
+
+    @abstractmethod
+    def exists_by_email(self, email: str, exclude_id: Optional[uuid.UUID] = None) -> bool: ...
+
+    @abstractmethod
+    def get_changes(self, after: int, limit: int) -> list[Change]:
+        """Up to `limit` writes made after change sequence `after`, oldest first.
+
+        Raises ChangesExpired when some of those writes are no longer retained.
+        """
+
+    @abstractmethod
+    def latest_change(self) -> int:
+        """Sequence of the most recent write, from which to follow later ones."""
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class CustomerRepository(RowStore[Customer], BaseCustomerRepository):
+    """In-memory repository for Customer entities, on the shared RowStore engine.
+
+    Scans in insertion order (`get_all`, `get_page`, `get_page_json` and
+    `iter_batches`) take no lock. Searches go through a text index over the
+    search fields, kept up to date on every write once built.
+    """
+
+    def __init__(self, wal: Optional[WriteAheadLog] = None, change_retention: int = DEFAULT_CHANGE_RETENTION):
+        # With a snapshot the text index is built on first use so startup
+        # does not scan the snapshot.
+        self._search_index: Optional[TextIndex] = TextIndex()
+        self._search_lock = threading.Lock()
+        super().__init__(_CODEC, wal, change_retention)
+
+    def warm_up(self) -> None:
+        with self._lock.read():
+            self._build_search_index()
+
+    def get_page(self, limit: int, after: Optional[int] = None) -> tuple[list[Customer], Optional[int]]:
+        """Return up to `limit` customers in insertion order following position `after`.
+
+        The second element is the position to resume from, or None when the
+        end of the store has been reached.
+        """
+        rows, position = page_of(self._iter_after(self._rows, after), limit)
+        return [_CODEC.to_model(row) for row in rows], position
+
+    def get_page_json(self, limit: int, after: Optional[int] = None) -> tuple[list[bytes], Optional[int]]:
+        rows, position = page_of(self._iter_after(self._rows, after), limit)
+        return [self._json_of(row) for row in rows], position
+
+    def search(self, terms: list[str], limit: int) -> list[Customer]:
+        """Rank the customers matching every term, ties in insertion order.
+
+        Scores are computed from the text index postings of the matching
+        words, so the cost follows the number of matches rather than the
+        store size.
+        """
+        with self._lock.read():
+            self._build_search_index()
+            rows = [self._row_at(position) for position in self._search_index.search(terms, limit)]
+        return [_CODEC.to_model(row) for row in rows]
+
+    def _build_search_index(self) -> None:
+        if self._search_index is not None:
+            return
+        with self._search_lock:
+            if self._search_index is None:
+                index = TextIndex()
+                for position, row in self._iter_after(self._rows, None):
+                    index.add(position, _search_texts(row))
+                self._search_index = index
+
+    def _defer_indexes(self) -> None:
+        self._search_index = None
+
+    def _index_put(self, position: int, row: Row, previous: Optional[Row], replaced: Optional[Row]) -> None:
+        if self._search_index is None:
+            return
+        texts = _search_texts(row)
+        if replaced is None:
+            self._search_index.add(position, texts)
+        elif _search_texts(replaced) != texts:
+            self._search_index.remove(position, _search_texts(replaced))
+            self._search_index.add(position, texts)
+
+    def _index_remove(self, position: int, row: Optional[Row]) -> None:
+        if self._search_index is not None:
+            removed = row if row is not None else self._snapshot.row_at(position)
+            self._search_index.remove(position, _search_texts(removed))
+
+
+class AsyncCustomerRepository(AsyncRepository):
+    """Awaitable read interface over a customer repository; see AsyncRepository."""
+
+    __slots__ = ()
+
+    async def get_page_json(self, limit: int, after: Optional[int] = None) -> tuple[list[bytes], Optional[int]]:
+        return await self._call(self._repository.get_page_json, limit, after)
+
+    async def search(self, terms: list[str], limit: int) -> list[Customer]:
+        return await self._call_in_thread(self._repository.search, terms, limit)
@@ -0,0 +1,252 @@
+import heapq
+import re
+import sys
+from array import array
+from bisect import bisect_left
+from itertools import groupby
+from typing import Iterable, Sequence, TypeVar, Union
+
+Item = TypeVar("Item")
+
+SEARCH_FIELDS = ("name", "email", "address")
+DEFAULT_SEARCH_LIMIT = 20
+# Terms shorter than this only match the start of a word; longer ones also
+# match inside one.
+MIN_INFIX_LENGTH = 3
+
+# A term scores the weight of its field times the weight of its match kind:
+# the whole word, a prefix of it, or inside it.
+_FIELD_WEIGHTS = (3, 2, 1)
+_EXACT, _PREFIX, _INFIX = 3, 2, 1
+# Runs of letters and runs of digits are separate words, so "jane.doe42"
+# holds "jane", "doe" and "42" rather than one word no one searches for.
+_WORD = re.compile(r"[^\W\d_]+|\d+")
+# Array type code of postings: unsigned 32-bit record positions.
+_POSITION = "I"
+Postings = Union[int, array]
+# Postings longer than this many times the records still matching are
+# binary searched for each of them instead of being read whole.
+_SEARCHES_PER_SCAN = 32
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased words of `text`, which are also the search terms of a query."""
+    return _WORD.findall(text.lower())
+
+
+def _trigrams(word: str) -> set[str]:
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def _short_prefixes(word: str) -> set[str]:
+    return {word[:length] for length in range(1, MIN_INFIX_LENGTH)}
+
+
+def _match_kind(term: str, word: str) -> int:
+    if word == term:
+        return _EXACT
+    if word.startswith(term):
+        return _PREFIX
+    if len(term) >= MIN_INFIX_LENGTH and term in word:
+        return _INFIX
+    return 0
+
+
+def score(terms: list[str], texts: Sequence[str]) -> int:
+    """Relevance of a record whose SEARCH_FIELDS hold `texts`.
+
+    Every term contributes its best match across the fields; zero means
+    some term matched nowhere.
+    """
+    fields = [(weight, set(tokenize(text))) for weight, text in zip(_FIELD_WEIGHTS, texts)]
+    total = 0
+    for term in terms:
+        best = max((weight * _match_kind(term, word) for weight, words in fields for word in words), default=0)
+        if not best:
+            return 0
+        total += best
+    return total
+
+
+def top_matches(terms: list[str], candidates: Iterable[tuple[Item, Sequence[str]]], limit: int) -> list[Item]:
+    """The `limit` best matching items; ties keep the order of `candidates`."""
+    scored = []
+    for index, (item, texts) in enumerate(candidates):
+        relevance = score(terms, texts)
+        if relevance:
+            scored.append((-relevance, index, item))
+    return [item for _, _, item in heapq.nsmallest(limit, scored)]
+
+
+def _contains(positions: Sequence[int], position: int) -> bool:
+    index = bisect_left(positions, position)
+    return index < len(positions) and positions[index] == position
+
+
+def _best_scores(weighted: list[tuple[int, Sequence[int]]]) -> dict[int, int]:
+    """Highest score per position over (score, positions) pairs."""
+    scores: dict[int, int] = {}
+    # Applied from lowest to highest, so every position ends up with its best score.
+    for value, positions in sorted(weighted, key=lambda entry: entry[0]):
+        scores.update(dict.fromkeys(positions, value))
+    return scores
+
+
+def _add_scores(totals: dict[int, int], weighted: list[tuple[int, Sequence[int]]]) -> dict[int, int]:
+    """`totals` of the positions also in some postings of `weighted`, plus their best score there."""
+    scores: dict[int, int] = {}
+    for value, positions in sorted(weighted, key=lambda entry: entry[0]):
+        # Few remaining records are looked up in the sorted postings; else the
+        # postings are intersected with them whole, which runs in C.
+        if len(totals) * _SEARCHES_PER_SCAN < len(positions):
+            matching = [position for position in totals if _contains(positions, position)]
+        else:
+            matching = totals.keys() & positions
+        scores.update(zip(matching, map(value.__add__, map(totals.__getitem__, matching))))
+    return scores
+
+
+def _ranked(totals: dict[int, int], limit: int) -> list[int]:
+    # Scores take few distinct values, so the best tiers are collected in
+    # turn rather than ordering every match.
+    ranked: list[int] = []
+    for value in sorted(set(totals.values()), reverse=True):
+        tier = [position for position, total in totals.items() if total == value]
+        ranked += heapq.nsmallest(limit - len(ranked), tier)
+        if len(ranked) == limit:
+            break
+    return ranked
+
+
+def _ranked_by_tier(weighted: list[tuple[int, Sequence[int]]], limit: int) -> list[int]:
+    """The `limit` best positions of a single term's (score, positions) pairs.
+
+    Tiers are read best first, each merged from its sorted postings in
+    position order, so reading stops after `limit` positions rather than
+    scoring every match. A position belongs to the tier of its best score
+    and is skipped in lower ones.
+    """
+    ranked: list[int] = []
+    higher: list[Sequence[int]] = []
+    for value, tier in groupby(sorted(weighted, key=lambda entry: -entry[0]), key=lambda entry: entry[0]):
+        postings = [positions for _, positions in tier]
+        previous = None
+        for position in heapq.merge(*postings):
+            if position == previous or any(_contains(positions, position) for positions in higher):
+                continue
+            previous = position
+            ranked.append(position)
+            if len(ranked) == limit:
+                return ranked
+        higher += postings
+    return ranked
+
+
+class TextIndex:
+    """Words of the search fields mapped to the positions of the records containing them.
+
+    Ranks records exactly as `score` and `top_matches` do, with ties in
+    position order, but works on the postings of the matching words instead
+    of the records' text. Postings are sorted arrays of 32-bit positions,
+    or the bare position for the many words held by a single record.
+    The distinct words are also filed under their short prefixes, for terms
+    too short to match inside words, and under their trigrams, for longer
+    ones; both index the vocabulary rather than every record, so they grow
+    with the number of distinct words.
+    """
+
+    def __init__(self):
+        self._postings: list[dict[str, Postings]] = [{} for _ in SEARCH_FIELDS]
+        self._prefixes: dict[str, set[str]] = {}
+        self._trigrams: dict[str, set[str]] = {}
+
+    def add(self, position: int, texts: Sequence[str]) -> None:
+        for postings, text in zip(self._postings, texts):
+            for word in set(tokenize(text)):
+                positions = postings.get(word)
+                if positions is None:
+                    # Fields holding the same word share one copy of it.
+                    word = sys.intern(word)
+                    if not self._in_vocabulary(word):
+                        self._add_word(word)
+                    postings[word] = position
+                elif isinstance(positions, int):
+                    if positions != position:
+                        postings[word] = array(_POSITION, sorted((positions, position)))
+                elif positions[-1] < position:
+                    # New records take the next position, so this is the usual case.
+                    positions.append(position)
+                else:
+                    index = bisect_left(positions, position)
+                    if positions[index] != position:
+                        positions.insert(index, position)
+
+    def remove(self, position: int, texts: Sequence[str]) -> None:
+        for postings, text in zip(self._postings, texts):
+            for word in set(tokenize(text)):
+                positions = postings[word]
+                if isinstance(positions, int):
+                    del postings[word]
+                    if not self._in_vocabulary(word):
+                        self._remove_word(word)
+                    continue
+                index = bisect_left(positions, position)
+                if index < len(positions) and positions[index] == position:
+                    del positions[index]
+                if len(positions) == 1:
+                    postings[word] = positions[0]
+
+    def search(self, terms: list[str], limit: int) -> list[int]:
+        """Positions of the `limit` best records matching every term, best first.
+
+        Terms are applied from the fewest postings up, and each later term
+        only looks at the records still matching. A single term is ranked
+        tier by tier, reading only as many postings as the results need.
+        """
+        postings_per_term = sorted(
+            (self._weighted_postings(term) for term in terms),
+            key=lambda weighted: sum(len(positions) for _, positions in weighted)
+        )
+        if len(postings_per_term) == 1:
+            return _ranked_by_tier(postings_per_term[0], limit)
+        totals = _best_scores(postings_per_term[0])
+        for weighted in postings_per_term[1:]:
+            if not totals:
+                break
+            totals = _add_scores(totals, weighted)
+        return _ranked(totals, limit)
+
+    def _weighted_postings(self, term: str) -> list[tuple[int, Sequence[int]]]:
+        """(score, positions) of every field and word `term` matches."""
+        weighted = []
+        for word in self._words_matching(term):
+            kind = _match_kind(term, word)
+            for weight, postings in zip(_FIELD_WEIGHTS, self._postings):
+                positions = postings.get(word)
+                if positions is not None:
+                    weighted.append((weight * kind, (positions,) if isinstance(positions, int) else positions))
+        return weighted
+
+    def _words_matching(self, term: str) -> Iterable[str]:
+        if len(term) < MIN_INFIX_LENGTH:
+            return self._prefixes.get(term, ())
+        groups = [self._trigrams.get(trigram) for trigram in _trigrams(term)]
+        if not all(groups):
+            return ()
+        return [word for word in set.intersection(*groups) if term in word]
+
+    def _in_vocabulary(self, word: str) -> bool:
+        return any(word in postings for postings in self._postings)
+
+    def _add_word(self, word: str) -> None:
+        for table, keys in ((self._prefixes, _short_prefixes(word)), (self._trigrams, _trigrams(word))):
+            for key in keys:
+                table.setdefault(key, set()).add(word)
+
+    def _remove_word(self, word: str) -> None:
+        for table, keys in ((self._prefixes, _short_prefixes(word)), (self._trigrams, _trigrams(word))):
+            for key in keys:
+                words = table[key]
+                words.discard(word)
+                if not words:
+                    del table[key]
@@ -1,15 +1,54 @@
+import threading
 import uuid
-from typing import Optional
+from functools import partial
+from typing import AsyncIterator, Iterator, Optional
 from src.customer.domain import Customer
-from src.customer.repository import CustomerRepository
+from src.customer.repository import AsyncCustomerRepository, BaseCustomerRepository, CustomerRepository
+from src.customer.search import tokenize
+from src.customer.sqlite_repository import SqliteCustomerRepository
+from src.changes import Change, stream_changes
+from src.durability import PeriodicCompactor, WriteAheadLog
+from src.metrics import TimedRepository, registry
+from src.storage import durability_dir, snapshot_interval, sqlite_path, storage_backend, wal_fsync
+from src.pagination import MAX_PAGE_SIZE, encode_cursor, decode_cursor
+from src.versions import VersionConflict
 
-_repository = CustomerRepository()
+
+def _create_repository() -> BaseCustomerRepository:
+    if storage_backend() == "sqlite":
+        return SqliteCustomerRepository(sqlite_path())
+    directory = durability_dir()
+    if directory is None:
+        return CustomerRepository()
+    repository = CustomerRepository(WriteAheadLog(directory, "customers", fsync=wal_fsync()))
+    PeriodicCompactor(repository, snapshot_interval()).start()
+    return repository
+
+
+_repository = TimedRepository(_create_repository(), "customers")
+registry.gauge("store_records", "Records held by each store.", {"store": "customers"}, lambda: count_customers())
+_warmed_up = threading.Event()
+
+
+def _warm_up(repository: BaseCustomerRepository) -> None:
+    repository.warm_up()
+    _warmed_up.set()
+
+
+# Indexes are built off the event loop and ahead of traffic; readiness
+# waits for them.
+threading.Thread(target=_warm_up, args=(_repository,), name="customers-warm-up", daemon=True).start()
+
+
+def is_warmed_up() -> bool:
+    return _warmed_up.is_set()
+
+
+def _async_repository() -> AsyncCustomerRepository:
+    return AsyncCustomerRepository(_repository)
 
 
 def create_customer(name: str, email: str, phone: str, address: str) -> Customer:
-    if _repository.exists_by_email(email):
-        raise ValueError(f"Customer with email '{email}' already exists")
-    
     customer = Customer(
         id=uuid.uuid4(),
         name=name,
@@ -17,7 +56,34 @@ def create_customer(name: str, email: str, phone: str, address: str) -> Customer
         phone=phone,
         address=address
     )
-    return _repository.add(customer)
+    with _repository.transaction():
+        if _repository.exists_by_email(email):
+            raise ValueError(f"Customer with email '{email}' already exists")
+        return _repository.add(customer)
+
+
+def create_customers_bulk(entries: list[dict], atomic: bool = True) -> tuple[list[Customer], dict[int, str]]:
+    """Create many customers in one pass.
+
+    Each entry holds the keyword arguments of `create_customer`. Returns the
+    created customers and a mapping of entry index to error message. Emails are
+    checked against the store and against earlier entries of the same batch.
+    When `atomic` is set and any entry fails, nothing is stored.
+    """
+    candidates = [Customer(id=uuid.uuid4(), **entry) for entry in entries]
+    errors: dict[int, str] = {}
+    batch_emails: set[str] = set()
+    customers: list[Customer] = []
+    with _repository.transaction():
+        for index, customer in enumerate(candidates):
+            if customer.email in batch_emails or _repository.exists_by_email(customer.email):
+                errors[index] = f"Customer with email '{customer.email}' already exists"
+                continue
+            batch_emails.add(customer.email)
+            customers.append(customer)
+        if atomic and errors:
+            return [], errors
+        return _repository.add_many(customers), errors
 
 
 def get_customer(customer_id: uuid.UUID) -> Customer:
@@ -27,33 +93,181 @@ def get_customer(customer_id: uuid.UUID) -> Customer:
     return customer
 
 
+def get_customer_json(customer_id: uuid.UUID) -> tuple[bytes, int]:
+    """`get_customer`, already serialized to JSON, and the customer's version."""
+    versioned = _repository.get_json(customer_id)
+    if versioned is None:
+        raise ValueError(f"Customer with id '{customer_id}' not found")
+    return versioned
+
+
+async def get_customer_json_async(customer_id: uuid.UUID) -> tuple[bytes, int]:
+    versioned = await _async_repository().get_json(customer_id)
+    if versioned is None:
+        raise ValueError(f"Customer with id '{customer_id}' not found")
+    return versioned
+
+
+def get_customer_version(customer_id: uuid.UUID) -> int:
+    version = _repository.get_version(customer_id)
+    if version is None:
+        raise ValueError(f"Customer with id '{customer_id}' not found")
+    return version
+
+
+async def get_customer_version_async(customer_id: uuid.UUID) -> int:
+    version = await _async_repository().get_version(customer_id)
+    if version is None:
+        raise ValueError(f"Customer with id '{customer_id}' not found")
+    return version
+
+
+def get_customer_by_email(email: str) -> Customer:
+    customer = _repository.get_by_email(email)
+    if customer is None:
+        raise ValueError(f"Customer with email '{email}' not found")
+    return customer
+
+
+async def get_customer_by_email_async(email: str) -> Customer:
+    customer = await _async_repository().get_by_email(email)
+    if customer is None:
+        raise ValueError(f"Customer with email '{email}' not found")
+    return customer
+
+
 def get_all_customers() -> list[Customer]:
     return _repository.get_all()
 
 
+def count_customers() -> int:
+    return _repository.count()
+
+
+def get_customers_page(limit: int, cursor: Optional[str] = None) -> tuple[list[Customer], Optional[str]]:
+    customers, next_position = _repository.get_page(limit, after=decode_cursor(cursor))
+    return customers, encode_cursor(next_position)
+
+
+def get_customers_page_json(limit: int, cursor: Optional[str] = None) -> tuple[list[bytes], Optional[str]]:
+    """`get_customers_page` with each customer already serialized to JSON."""
+    customers, next_position = _repository.get_page_json(limit, after=decode_cursor(cursor))
+    return customers, encode_cursor(next_position)
+
+
+async def get_customers_page_json_async(limit: int, cursor: Optional[str] = None) -> tuple[list[bytes], Optional[str]]:
+    customers, next_position = await _async_repository().get_page_json(limit, after=decode_cursor(cursor))
+    return customers, encode_cursor(next_position)
+
+
+def search_customers(query: str, limit: int) -> list[Customer]:
+    """Customers whose name, email or address contain every word of `query`, best match first."""
+    return _repository.search(_search_terms(query), limit)
+
+
+async def search_customers_async(query: str, limit: int) -> list[Customer]:
+    return await _async_repository().search(_search_terms(query), limit)
+
+
+def _search_terms(query: str) -> list[str]:
+    terms = tokenize(query)
+    if not terms:
+        raise ValueError("Search query must contain at least one letter or digit")
+    return terms
+
+
+def iter_customer_batches(batch_size: int) -> Iterator[list[Customer]]:
+    """Yield every customer in insertion order, `batch_size` at a time."""
+    return _repository.iter_batches(batch_size)
+
+
+def get_customer_changes(since: Optional[int], limit: int) -> tuple[list[Change], int]:
+    """Up to `limit` writes after change sequence `since`, and the sequence to ask for next.
+
+    Without `since` there are no changes, only the sequence of the latest
+    write: a consumer reads it before downloading every customer, then follows
+    the changes from it. Raises ChangesExpired when `since` is older than the
+    changes retained, after which the consumer has to download everything again.
+    """
+    if since is None:
+        return [], _repository.latest_change()
+    changes = _repository.get_changes(since, limit)
+    return changes, changes[-1].sequence if changes else since
+
+
+async def get_customer_changes_async(since: Optional[int], limit: int) -> tuple[list[Change], int]:
+    repository = _async_repository()
+    if since is None:
+        return [], await repository.latest_change()
+    changes = await repository.get_changes(since, limit)
+    return changes, changes[-1].sequence if changes else since
+
+
+async def stream_customer_changes(since: Optional[int]) -> AsyncIterator[bytes]:
+    """Server-Sent Events for every write after `since`, or after the latest one without it."""
+    repository = _async_repository()
+    if since is None:
+        since = await repository.latest_change()
+    async for event in stream_changes(partial(repository.get_changes, limit=MAX_PAGE_SIZE), since):
+        yield event
+
+
 def update_customer(
     customer_id: uuid.UUID,
     name: Optional[str] = None,
     email: Optional[str] = None,
     phone: Optional[str] = None,
-    address: Optional[str] = None
+    address: Optional[str] = None,
+    expected_version: Optional[int] = None
 ) -> Customer:
-    customer = _repository.get(customer_id)
-    if customer is None:
-        raise ValueError(f"Customer with id '{customer_id}' not found")
-    
-    if email and email != customer.email:
-        if _repository.exists_by_email(email, exclude_id=customer_id):
-            raise ValueError(f"Customer with email '{email}' already exists")
-    
-    updated = Customer(
-        id=customer.id,
-        name=name if name is not None else customer.name,
-        email=email if email is not None else customer.email,
-        phone=phone if phone is not None else customer.phone,
-        address=address if address is not None else customer.address
-    )
-    return _repository.update(updated)
+    """Apply the given fields to the stored customer; see `update_customer_versioned`."""
+    return update_customer_versioned(customer_id, name, email, phone, address, expected_version)[0]
+
+
+def update_customer_versioned(
+    customer_id: uuid.UUID,
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    phone: Optional[str] = None,
+    address: Optional[str] = None,
+    expected_version: Optional[int] = None
+) -> tuple[Customer, int]:
+    """Apply the given fields to the stored customer.
+
+    The change is written only if the customer is still at the version it
+    was read at. Without `expected_version` a concurrent write just means
+    reading and merging again; with it, the caller's version must be the
+    current one or VersionConflict is raised. Only an email change locks
+    the store, to keep emails unique. Returns the stored customer and its
+    new version.
+    """
+    while True:
+        versioned = _repository.get_versioned(customer_id)
+        if versioned is None:
+            raise ValueError(f"Customer with id '{customer_id}' not found")
+        customer, version = versioned
+        if expected_version is not None and version != expected_version:
+            raise VersionConflict(f"Customer with id '{customer_id}' is no longer at version {expected_version}")
+
+        updated = Customer(
+            id=customer.id,
+            name=name if name is not None else customer.name,
+            email=email if email is not None else customer.email,
+            phone=phone if phone is not None else customer.phone,
+            address=address if address is not None else customer.address
+        )
+        # Each write moves a record to the next version, and this one is
+        # conditional on `version`.
+        try:
+            if email and email != customer.email:
+                with _repository.transaction():
+                    if _repository.exists_by_email(email, exclude_id=customer_id):
+                        raise ValueError(f"Customer with email '{email}' already exists")
+                    return _repository.update(updated, expected_version=version), version + 1
+            return _repository.update(updated, expected_version=version), version + 1
+        except VersionConflict:
+            if expected_version is not None:
+                raise
 
 
 def delete_customer(customer_id: uuid.UUID) -> None:
@@ -0,0 +1,250 @@
+import sqlite3
+import uuid
+from contextlib import AbstractContextManager
+from typing import Optional
+from src.customer.domain import Customer
+from src.customer.repository import BaseCustomerRepository
+from src.customer.search import MIN_INFIX_LENGTH, top_matches
+from src.changes import (
+    CHANGE_CREATE,
+    CHANGE_DELETE,
+    CHANGE_UPDATE,
+    DEFAULT_CHANGE_RETENTION,
+    Change,
+    check_retained,
+    initial_sequence,
+)
+from src.storage import SqliteConnectionPool, execute_script
+from src.versions import VersionConflict
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS customers (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id BLOB NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    address TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE UNIQUE INDEX IF NOT EXISTS customers_email ON customers (email);
+CREATE VIRTUAL TABLE IF NOT EXISTS customers_search USING fts5(
+    name, email, address, content='customers', content_rowid='seq', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS customers_search_insert AFTER INSERT ON customers BEGIN
+    INSERT INTO customers_search (rowid, name, email, address) VALUES (new.seq, new.name, new.email, new.address);
+END;
+CREATE TRIGGER IF NOT EXISTS customers_search_delete AFTER DELETE ON customers BEGIN
+    INSERT INTO customers_search (customers_search, rowid, name, email, address)
+    VALUES ('delete', old.seq, old.name, old.email, old.address);
+END;
+CREATE TRIGGER IF NOT EXISTS customers_search_update AFTER UPDATE ON customers BEGIN
+    INSERT INTO customers_search (customers_search, rowid, name, email, address)
+    VALUES ('delete', old.seq, old.name, old.email, old.address);
+    INSERT INTO customers_search (rowid, name, email, address) VALUES (new.seq, new.name, new.email, new.address);
+END;
+CREATE TABLE IF NOT EXISTS customers_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    operation TEXT NOT NULL,
+    id BLOB NOT NULL,
+    name TEXT,
+    email TEXT,
+    phone TEXT,
+    address TEXT,
+    version INTEGER
+);
+CREATE TRIGGER IF NOT EXISTS customers_changes_insert AFTER INSERT ON customers BEGIN
+    INSERT INTO customers_changes (operation, id, name, email, phone, address, version)
+    VALUES ('{CHANGE_CREATE}', new.id, new.name, new.email, new.phone, new.address, new.version);
+END;
+CREATE TRIGGER IF NOT EXISTS customers_changes_update AFTER UPDATE ON customers BEGIN
+    INSERT INTO customers_changes (operation, id, name, email, phone, address, version)
+    VALUES ('{CHANGE_UPDATE}', new.id, new.name, new.email, new.phone, new.address, new.version);
+END;
+CREATE TRIGGER IF NOT EXISTS customers_changes_delete AFTER DELETE ON customers BEGIN
+    INSERT INTO customers_changes (operation, id) VALUES ('{CHANGE_DELETE}', old.id);
+END;
+CREATE TRIGGER IF NOT EXISTS customers_changes_retention AFTER INSERT ON customers_changes BEGIN
+    DELETE FROM customers_changes WHERE seq <= new.seq - {DEFAULT_CHANGE_RETENTION};
+END;
+"""
+# Fills the search table from existing rows when it is added to an older database.
+_REBUILD_SEARCH = "INSERT INTO customers_search (customers_search) VALUES ('rebuild')"
+_HAS_SEARCH = "SELECT 1 FROM sqlite_master WHERE name = 'customers_search'"
+_HAS_VERSION = "SELECT 1 FROM pragma_table_info('customers') WHERE name = 'version'"
+_HAS_CHANGES = "SELECT 1 FROM sqlite_master WHERE name = 'customers_changes'"
+# Like in-memory change logs, a new one counts from the current time, so a
+# consumer's position in a database that was since replaced reads as expired.
+_START_CHANGES = "INSERT INTO sqlite_sequence (name, seq) VALUES ('customers_changes', ?)"
+_ADD_VERSION = "ALTER TABLE customers ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+
+_COLUMNS = "id, name, email, phone, address"
+
+_UPSERT = f"""
+INSERT INTO customers ({_COLUMNS}) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    name = excluded.name,
+    email = excluded.email,
+    phone = excluded.phone,
+    address = excluded.address,
+    version = version + 1
+"""
+_UPDATE_IF_VERSION = """
+UPDATE customers SET name = ?, email = ?, phone = ?, address = ?, version = version + 1
+WHERE id = ? AND version = ?
+"""
+_SELECT_BY_ID = f"SELECT {_COLUMNS} FROM customers WHERE id = ?"
+_SELECT_VERSIONED = f"SELECT {_COLUMNS}, version FROM customers WHERE id = ?"
+_SELECT_VERSION = "SELECT version FROM customers WHERE id = ?"
+_SELECT_BY_EMAIL = f"SELECT {_COLUMNS} FROM customers WHERE email = ?"
+_COUNT = "SELECT count(*) FROM customers"
+_SELECT_ALL = f"SELECT {_COLUMNS} FROM customers ORDER BY seq"
+_SELECT_PAGE = f"SELECT seq, {_COLUMNS} FROM customers WHERE seq > ? ORDER BY seq LIMIT ?"
+# The trigram table finds substrings of three or more characters; shorter
+# terms fall back to a LIKE scan. Either way `top_matches` keeps only rows
+# matching every term, and rows come in insertion order to break ties.
+_SEARCH_MATCH = (
+    f"SELECT {_COLUMNS} FROM customers WHERE seq IN "
+    "(SELECT rowid FROM customers_search WHERE customers_search MATCH ?) ORDER BY seq"
+)
+_SEARCH_LIKE = (
+    f"SELECT {_COLUMNS} FROM customers "
+    "WHERE name LIKE ?1 OR email LIKE ?1 OR address LIKE ?1 ORDER BY seq"
+)
+_DELETE = "DELETE FROM customers WHERE id = ?"
+_SELECT_ID_BY_EMAIL = "SELECT id FROM customers WHERE email = ?"
+_SELECT_CHANGES = (
+    "SELECT seq, operation, id, name, email, phone, address, version "
+    "FROM customers_changes WHERE seq > ? ORDER BY seq LIMIT ?"
+)
+_SELECT_LATEST_CHANGE = "SELECT seq FROM sqlite_sequence WHERE name = 'customers_changes'"
+
+
+def _to_row(customer: Customer) -> tuple:
+    return (customer.id.bytes, customer.name, customer.email, customer.phone, customer.address)
+
+
+def _change_from_row(row: tuple) -> Change:
+    sequence, operation, id_, *columns, version = row
+    if operation == CHANGE_DELETE:
+        return Change(sequence, operation, uuid.UUID(bytes=id_), None, None)
+    body = _from_row((id_, *columns)).model_dump_json().encode()
+    return Change(sequence, operation, uuid.UUID(bytes=id_), version, body)
+
+
+def _from_row(row: tuple) -> Customer:
+    return Customer(id=uuid.UUID(bytes=row[0]), name=row[1], email=row[2], phone=row[3], address=row[4])
+
+
+class SqliteCustomerRepository(BaseCustomerRepository):
+    """SQLite-backed repository for Customer entities."""
+
+    def __init__(self, path: str, pool_size: int = 4):
+        self._pool = SqliteConnectionPool(path, pool_size)
+        with self._pool.transaction() as connection:
+            has_search = connection.execute(_HAS_SEARCH).fetchone() is not None
+            has_changes = connection.execute(_HAS_CHANGES).fetchone() is not None
+            execute_script(connection, _SCHEMA)
+            if not has_changes:
+                connection.execute(_START_CHANGES, (initial_sequence(),))
+            if not has_search:
+                connection.execute(_REBUILD_SEARCH)
+            if connection.execute(_HAS_VERSION).fetchone() is None:
+                connection.execute(_ADD_VERSION)
+
+    def transaction(self) -> AbstractContextManager[None]:
+        return self._pool.transaction()
+
+    def add(self, customer: Customer) -> Customer:
+        return self.add_many([customer])[0]
+
+    def add_many(self, customers: list[Customer]) -> list[Customer]:
+        try:
+            with self._pool.transaction() as connection:
+                connection.executemany(_UPSERT, [_to_row(customer) for customer in customers])
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"Customer email already exists: {e}")
+        return customers
+
+    def get(self, customer_id: uuid.UUID) -> Optional[Customer]:
+        with self._pool.connection() as connection:
+            row = connection.execute(_SELECT_BY_ID, (customer_id.bytes,)).fetchone()
+        return _from_row(row) if row else None
+
+    def get_versioned(self, customer_id: uuid.UUID) -> Optional[tuple[Customer, int]]:
+        with self._pool.connection() as connection:
+            row = connection.execute(_SELECT_VERSIONED, (customer_id.bytes,)).fetchone()
+        return (_from_row(row), row[-1]) if row else None
+
+    def get_version(self, customer_id: uuid.UUID) -> Optional[int]:
+        with self._pool.connection() as connection:
+            row = connection.execute(_SELECT_VERSION, (customer_id.bytes,)).fetchone()
+        return row[0] if row else None
+
+    def get_by_email(self, email: str) -> Optional[Customer]:
+        with self._pool.connection() as connection:
+            row = connection.execute(_SELECT_BY_EMAIL, (email,)).fetchone()
+        return _from_row(row) if row else None
+
+    def count(self) -> int:
+        with self._pool.connection() as connection:
+            return connection.execute(_COUNT).fetchone()[0]
+
+    def get_all(self) -> list[Customer]:
+        with self._pool.connection() as connection:
+            return [_from_row(row) for row in connection.execute(_SELECT_ALL)]
+
+    def get_page(self, limit: int, after: Optional[int] = None) -> tuple[list[Customer], Optional[int]]:
+        with self._pool.connection() as connection:
+            rows = connection.execute(_SELECT_PAGE, (after if after is not None else 0, limit + 1)).fetchall()
+        page = [_from_row(row[1:]) for row in rows[:limit]]
+        return page, (rows[limit - 1][0] if len(rows) > limit else None)
+
+    def search(self, terms: list[str], limit: int) -> list[Customer]:
+        term = max(terms, key=len)
+        if len(term) >= MIN_INFIX_LENGTH:
+            query, parameter = _SEARCH_MATCH, f'"{term}"'
+        else:
+            # Terms are letters or digits only, so nothing in them is special to LIKE.
+            query, parameter = _SEARCH_LIKE, f"%{term}%"
+        with self._pool.connection() as connection:
+            rows = connection.execute(query, (parameter,)).fetchall()
+        ranked = top_matches(terms, ((row, (row[1], row[2], row[4])) for row in rows), limit)
+        return [_from_row(row) for row in ranked]
+
+    def update(self, customer: Customer, expected_version: Optional[int] = None) -> Customer:
+        if expected_version is None:
+            return self.add(customer)
+        id_, *fields = _to_row(customer)
+        try:
+            with self._pool.transaction() as connection:
+                updated = connection.execute(_UPDATE_IF_VERSION, (*fields, id_, expected_version)).rowcount
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"Customer email already exists: {e}")
+        if not updated:
+            raise VersionConflict(f"Customer with id '{customer.id}' is no longer at version {expected_version}")
+        return customer
+
+    def delete(self, customer_id: uuid.UUID) -> bool:
+        with self._pool.transaction() as connection:
+            return connection.execute(_DELETE, (customer_id.bytes,)).rowcount > 0
+
+    def exists_by_email(self, email: str, exclude_id: Optional[uuid.UUID] = None) -> bool:
+        with self._pool.connection() as connection:
+            row = connection.execute(_SELECT_ID_BY_EMAIL, (email,)).fetchone()
+        return row is not None and (exclude_id is None or row[0] != exclude_id.bytes)
+
+    def get_changes(self, after: int, limit: int) -> list[Change]:
+        """Changes are written by triggers, so they include those of every process on the database."""
+        with self._pool.connection() as connection:
+            rows = connection.execute(_SELECT_CHANGES, (after, limit)).fetchall()
+            latest = connection.execute(_SELECT_LATEST_CHANGE).fetchone()[0]
+        check_retained(after, rows[0][0] if rows else None, latest)
+        return [_change_from_row(row) for row in rows]
+
+    def latest_change(self) -> int:
+        with self._pool.connection() as connection:
+            return connection.execute(_SELECT_LATEST_CHANGE).fetchone()[0]
+
+    def close(self) -> None:
+        self._pool.close()
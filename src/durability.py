@@ -0,0 +1,158 @@
+import logging
+import os
+import threading
+import uuid
+from typing import Iterable, Iterator, Optional, Protocol
+from pydantic import BaseModel
+from src.records import Row, RowCodec
+from src.snapshot import BinarySnapshot, write_binary_snapshot
+
+_logger = logging.getLogger(__name__)
+
+PUT = "P"
+DELETE = "D"
+
+
+class WriteAheadLog:
+    """Append-only operation log plus snapshot files for one in-memory store.
+
+    Every write is appended to `<name>.log` as `P\\t<json>\\t<version>` or
+    `D\\t<id>`.
+    Compaction rotates the live log to `<name>.log.old`, writes a binary
+    snapshot of the store to `<name>.snapshot` and then drops the rotated
+    log. Loading the snapshot and replaying the rotated and live logs in that
+    order always rebuilds the latest state, because every entry carries the
+    full record and replaying an already-applied entry is a no-op.
+    """
+
+    def __init__(self, directory: str, name: str, fsync: bool = False):
+        os.makedirs(directory, exist_ok=True)
+        self._log_path = os.path.join(directory, f"{name}.log")
+        self._rotated_path = self._log_path + ".old"
+        self._snapshot_path = os.path.join(directory, f"{name}.snapshot")
+        self._fsync = fsync
+        self._compaction_lock = threading.Lock()
+        _truncate_torn_tail(self._log_path)
+        self._file = open(self._log_path, "a", encoding="utf-8")
+
+    @property
+    def fsync(self) -> bool:
+        """Whether every append waits for the disk."""
+        return self._fsync
+
+    def open_snapshot(self, codec: RowCodec) -> Optional[BinarySnapshot]:
+        if not os.path.exists(self._snapshot_path):
+            return None
+        return BinarySnapshot(self._snapshot_path, codec)
+
+    def replay(self) -> Iterator[tuple[str, str, Optional[int]]]:
+        """Yield (operation, payload, version) logged since the snapshot was taken.
+
+        The version is None for deletes and for puts logged before records
+        carried versions.
+        """
+        for path in (self._rotated_path, self._log_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as source:
+                for line in source:
+                    if not line.endswith("\n"):
+                        break
+                    operation, _, payload = line.rstrip("\n").partition("\t")
+                    version = None
+                    if operation == PUT and not payload.endswith("}"):
+                        # JSON escapes tabs, so the last one ends the payload.
+                        payload, _, logged = payload.rpartition("\t")
+                        version = int(logged)
+                    yield operation, payload, version
+
+    def append_put(self, record: BaseModel, version: int) -> None:
+        self._append(f"{PUT}\t{record.model_dump_json()}\t{version}\n")
+
+    def append_delete(self, record_id: uuid.UUID) -> None:
+        self._append(f"{DELETE}\t{record_id}\n")
+
+    def _append(self, line: str) -> None:
+        self._file.write(line)
+        self._file.flush()
+        if self._fsync:
+            os.fsync(self._file.fileno())
+
+    def rotate(self) -> None:
+        """Start a new live log; must be called while the store is write-locked."""
+        self._file.close()
+        if os.path.exists(self._rotated_path):
+            # A previous compaction did not finish: keep its entries.
+            with open(self._rotated_path, "a", encoding="utf-8") as rotated, \
+                    open(self._log_path, encoding="utf-8") as live:
+                for line in live:
+                    rotated.write(line)
+            os.remove(self._log_path)
+        else:
+            os.replace(self._log_path, self._rotated_path)
+        self._file = open(self._log_path, "a", encoding="utf-8")
+
+    def write_snapshot(self, rows: Iterable[Row], codec: RowCodec) -> None:
+        write_binary_snapshot(self._snapshot_path, rows, codec)
+        os.remove(self._rotated_path)
+
+    def compaction(self) -> threading.Lock:
+        """Lock held for the whole of a compaction so only one runs at a time."""
+        return self._compaction_lock
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _truncate_torn_tail(path: str) -> None:
+    """Drop a partial last line left by a crash mid-append."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb+") as log:
+        size = log.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            step = min(4096, end)
+            log.seek(end - step)
+            block = log.read(step)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                end = end - step + newline + 1
+                break
+            end -= step
+        if end != size:
+            log.truncate(end)
+
+
+class Compactable(Protocol):
+    def compact(self) -> None: ...
+
+
+class PeriodicCompactor:
+    """Daemon thread that compacts a repository's log every `interval` seconds."""
+
+    def __init__(self, repository: Compactable, interval: float):
+        self._repository = repository
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "PeriodicCompactor":
+        self._thread = threading.Thread(target=self._run, name="wal-compactor", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            try:
+                self._repository.compact()
+            except Exception:
+                # A failed compaction, say on a full disk, leaves the log as
+                # it was; the next tick tries again rather than letting the
+                # log grow for the life of the process.
+                _logger.exception("Compaction failed; retrying in %s seconds", self._interval)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
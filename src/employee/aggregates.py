@@ -0,0 +1,100 @@
+from decimal import Decimal
+from typing import Iterable, Union
+from src.employee.domain import DepartmentSalaryStats
+from src.sorted_list import SortedList
+
+CENT = Decimal("0.01")
+
+# Salaries arrive as stored in repository rows: integer cents, or a Decimal
+# for amounts without exactly two decimal places. Both are kept in cents so
+# they sort and add together.
+Salary = Union[int, Decimal]
+
+
+def in_cents(salary: Salary) -> Salary:
+    return salary if isinstance(salary, int) else salary.scaleb(2)
+
+
+def from_cents(amount: Salary) -> Decimal:
+    return Decimal(amount).scaleb(-2)
+
+
+def department_stats(
+    department: str,
+    headcount: int,
+    total: Decimal,
+    min_salary: Decimal,
+    max_salary: Decimal
+) -> DepartmentSalaryStats:
+    return DepartmentSalaryStats(
+        department=department,
+        headcount=headcount,
+        total_salary=total,
+        mean_salary=(total / headcount).quantize(CENT),
+        min_salary=min_salary,
+        max_salary=max_salary
+    )
+
+
+class _Department:
+    __slots__ = ("salaries", "total_cents", "total_fractional")
+
+    def __init__(self):
+        self.salaries = SortedList()
+        self.total_cents = 0
+        self.total_fractional = Decimal(0)
+
+
+class SalaryAggregates:
+    """Per-department salary statistics maintained on every write.
+
+    Each department keeps its salaries in a SortedList, so min and max are
+    read off the ends and an add or remove shifts one bucket of salaries.
+    Totals of integer-cent salaries stay in integer arithmetic.
+    """
+
+    def __init__(self):
+        self._departments: dict[str, _Department] = {}
+
+    def add(self, department: str, salary: Salary) -> None:
+        entry = self._departments.get(department)
+        if entry is None:
+            entry = self._departments[department] = _Department()
+        amount = in_cents(salary)
+        entry.salaries.add(amount)
+        if isinstance(amount, int):
+            entry.total_cents += amount
+        else:
+            entry.total_fractional += amount
+
+    def remove(self, department: str, salary: Salary) -> None:
+        entry = self._departments[department]
+        amount = in_cents(salary)
+        entry.salaries.remove(amount)
+        if isinstance(amount, int):
+            entry.total_cents -= amount
+        else:
+            entry.total_fractional -= amount
+        if not entry.salaries:
+            del self._departments[department]
+
+    def stats(self) -> list[DepartmentSalaryStats]:
+        result = []
+        for department in sorted(self._departments):
+            entry = self._departments[department]
+            result.append(department_stats(
+                department,
+                len(entry.salaries),
+                from_cents(entry.total_fractional + entry.total_cents),
+                from_cents(entry.salaries[0]),
+                from_cents(entry.salaries[-1])
+            ))
+        return result
+
+
+def compute_salary_stats(salaries: Iterable[tuple[str, Decimal]]) -> list[DepartmentSalaryStats]:
+    """Recompute the statistics from scratch over (department, salary) pairs."""
+    aggregates = SalaryAggregates()
+    for department, salary in salaries:
+        aggregates.add(department, salary)
+    return aggregates.stats()
@@ -1,13 +1,27 @@
 import uuid
 from typing import Optional
 from decimal import Decimal
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr
+from src.employee.domain import Employee
+from src.changes import EVENT_STREAM_MEDIA_TYPE, ChangesExpired, encode_changes
+from src.export import EXPORT_BATCH_SIZE, EXPORT_MEDIA_TYPES, resolve_export_format, stream_export
+from src.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.responses import json_page_response, json_response, not_modified
+from src.versions import VersionConflict, etag_matches, format_etag, parse_if_match
 from src.employee.service import (
     create_employee,
-    get_employee,
-    get_all_employees,
-    update_employee,
+    create_employees_bulk,
+    get_employee_changes_async,
+    get_employee_json_async,
+    get_employee_by_email_async,
+    get_employee_version_async,
+    get_employees_page_json_async,
+    get_salary_stats_async,
+    iter_employee_batches,
+    stream_employee_changes,
+    update_employee_versioned,
     delete_employee,
 )
 
@@ -41,6 +55,43 @@ class EmployeeResponse(BaseModel):
     salary: Decimal
 
 
+class DepartmentSalaryStatsResponse(BaseModel):
+    department: str
+    headcount: int
+    total_salary: Decimal
+    mean_salary: Decimal
+    min_salary: Decimal
+    max_salary: Decimal
+
+
+class EmployeePageResponse(BaseModel):
+    items: list[EmployeeResponse]
+    next_cursor: Optional[str] = None
+
+
+class EmployeeChangeResponse(BaseModel):
+    sequence: int
+    operation: str
+    id: uuid.UUID
+    version: Optional[int] = None
+    data: Optional[EmployeeResponse] = None
+
+
+class EmployeeChangesResponse(BaseModel):
+    changes: list[EmployeeChangeResponse]
+    next_since: int
+
+
+class BulkErrorResponse(BaseModel):
+    index: int
+    detail: str
+
+
+class BulkEmployeeResponse(BaseModel):
+    created: list[EmployeeResponse]
+    errors: list[BulkErrorResponse]
+
+
 # Router
 router = APIRouter(prefix="/employees", tags=["employees"])
 
@@ -61,31 +112,126 @@ def create_employee_endpoint(request: CreateEmployeeRequest):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/bulk", response_model=BulkEmployeeResponse, status_code=201)
+def create_employees_bulk_endpoint(
+    requests: list[CreateEmployeeRequest],
+    atomic: bool = True
+):
+    created, errors = create_employees_bulk([request.model_dump() for request in requests], atomic=atomic)
+    error_list = [{"index": index, "detail": detail} for index, detail in errors.items()]
+    if atomic and errors:
+        raise HTTPException(status_code=400, detail=error_list)
+    return {"created": created, "errors": error_list}
+
+
+@router.get("/stats", response_model=list[DepartmentSalaryStatsResponse])
+async def get_salary_stats_endpoint():
+    return await get_salary_stats_async()
+
+
+@router.get("/export")
+def export_employees_endpoint(
+    format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"),
+    accept: Optional[str] = Header(None)
+):
+    export_format = resolve_export_format(format, accept)
+    return StreamingResponse(
+        stream_export(iter_employee_batches(EXPORT_BATCH_SIZE), export_format, list(Employee.model_fields)),
+        media_type=EXPORT_MEDIA_TYPES[export_format]
+    )
+
+
+@router.get("/changes", response_model=EmployeeChangesResponse)
+async def list_employee_changes_endpoint(
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+):
+    try:
+        changes, next_since = await get_employee_changes_async(since, limit)
+    except ChangesExpired as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    return json_response(encode_changes(changes, next_since))
+
+
+@router.get("/changes/stream")
+async def stream_employee_changes_endpoint(
+    since: Optional[int] = Query(None, ge=0),
+    last_event_id: Optional[int] = Header(None)
+):
+    return StreamingResponse(
+        stream_employee_changes(last_event_id if last_event_id is not None else since),
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+@router.get("/by-email/{email}", response_model=EmployeeResponse)
+async def get_employee_by_email_endpoint(email: str):
+    try:
+        return await get_employee_by_email_async(email)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @router.get("/{employee_id}", response_model=EmployeeResponse)
-def get_employee_endpoint(employee_id: uuid.UUID):
+async def get_employee_endpoint(employee_id: uuid.UUID, if_none_match: Optional[str] = Header(None)):
     try:
-        return get_employee(employee_id)
+        if if_none_match is not None:
+            version = await get_employee_version_async(employee_id)
+            if etag_matches(if_none_match, version):
+                return not_modified(version)
+        return json_response(*await get_employee_json_async(employee_id))
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
-@router.get("", response_model=list[EmployeeResponse])
-def list_employees_endpoint():
-    return get_all_employees()
+@router.get("", response_model=EmployeePageResponse)
+async def list_employees_endpoint(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    department: Optional[str] = None,
+    position: Optional[str] = None,
+    min_salary: Optional[Decimal] = None,
+    max_salary: Optional[Decimal] = None,
+    order_by: Optional[str] = Query(None, pattern="^-?salary$")
+):
+    try:
+        employees, next_cursor = await get_employees_page_json_async(
+            limit,
+            cursor,
+            department=department,
+            position=position,
+            min_salary=min_salary,
+            max_salary=max_salary,
+            order_by=order_by
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_page_response(employees, next_cursor)
 
 
 @router.put("/{employee_id}", response_model=EmployeeResponse)
-def update_employee_endpoint(employee_id: uuid.UUID, request: UpdateEmployeeRequest):
+def update_employee_endpoint(
+    employee_id: uuid.UUID,
+    request: UpdateEmployeeRequest,
+    response: Response,
+    if_match: Optional[str] = Header(None)
+):
     try:
-        return update_employee(
+        employee, version = update_employee_versioned(
             employee_id=employee_id,
             name=request.name,
             email=request.email,
             phone=request.phone,
             department=request.department,
             position=request.position,
-            salary=request.salary
+            salary=request.salary,
+            expected_version=parse_if_match(if_match)
         )
+        response.headers["ETag"] = format_etag(version)
+        return employee
+    except VersionConflict as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except ValueError as e:
         if "not found" in str(e):
             raise HTTPException(status_code=404, detail=str(e))
@@ -11,3 +11,12 @@ class Employee(BaseModel):
     department: str
     position: str
     salary: Decimal
+
+
+class DepartmentSalaryStats(BaseModel):
+    department: str
+    headcount: int
+    total_salary: Decimal
+    mean_salary: Decimal
+    min_salary: Decimal
+    max_salary: Decimal
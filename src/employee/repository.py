@@ -1,36 +1,489 @@
+import threading
 import uuid
-from typing import Optional
-from src.employee.domain import Employee
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from contextlib import AbstractContextManager, nullcontext
+from decimal import Decimal
+from typing import Iterator, Optional
+from src.changes import DEFAULT_CHANGE_RETENTION, Change
+from src.concurrency import AsyncRepository
+from src.durability import WriteAheadLog
+from src.records import Row, RowCodec
+from src.row_store import RowStore, page_of
+from src.snapshot import merge_with_snapshot
+from src.employee.aggregates import SalaryAggregates, in_cents
+from src.employee.domain import DepartmentSalaryStats, Employee
+from src.employee.salary_index import SalaryIndex, SalaryKey
 
+_FILTERS = ("department", "position")
+_CODEC = RowCodec(Employee, interned=_FILTERS, cents=("salary",), indexed=_FILTERS)
+_FILTER_COLUMNS = {field: _CODEC.column(field) for field in _FILTERS}
+_DEPARTMENT = _CODEC.column("department")
+_SALARY = _CODEC.column("salary")
 
-class EmployeeRepository:
-    """In-memory repository for Employee entities."""
 
-    def __init__(self):
-        self._storage: dict[uuid.UUID, Employee] = {}
+def _filters(department: Optional[str], position: Optional[str]) -> dict[str, str]:
+    return {
+        field: value
+        for field, value in (("department", department), ("position", position))
+        if value is not None
+    }
 
-    def add(self, employee: Employee) -> Employee:
-        self._storage[employee.id] = employee
-        return employee
 
-    def get(self, employee_id: uuid.UUID) -> Optional[Employee]:
-        return self._storage.get(employee_id)
+def _bounds(min_salary: Optional[Decimal], max_salary: Optional[Decimal]) -> tuple:
+    """Salary bounds in cents, open ends widened to infinity."""
+    return (
+        in_cents(min_salary) if min_salary is not None else Decimal("-Infinity"),
+        in_cents(max_salary) if max_salary is not None else Decimal("Infinity")
+    )
 
-    def get_all(self) -> list[Employee]:
-        return list(self._storage.values())
 
-    def update(self, employee: Employee) -> Employee:
-        self._storage[employee.id] = employee
-        return employee
+class BaseEmployeeRepository(ABC):
+    """Storage interface the employee service depends on.
 
-    def delete(self, employee_id: uuid.UUID) -> bool:
-        if employee_id in self._storage:
-            del self._storage[employee_id]
-            return True
-        return False
+    Positions returned by `get_page` are opaque, monotonically increasing
+    integers that stay valid across writes. Keys returned by
+    `get_salary_page` are (salary in cents, position) pairs. Every write of
+    an employee increases its version, which starts at 1.
+    """
 
-    def exists_by_email(self, email: str, exclude_id: Optional[uuid.UUID] = None) -> bool:
-        for employee in self._storage.values():
-            if employee.email == email and employee.id != exclude_id:
-                return True
-        return False
+    # Whether calls can wait on I/O, in which case AsyncEmployeeRepository
+    # makes them from a worker thread rather than the event loop.
+    blocking = True
+
+    @abstractmethod
+    def transaction(self) -> AbstractContextManager[None]:
+        """Group several calls into one atomic unit."""
+
+    @abstractmethod
+    def add(self, employee: Employee) -> Employee: ...
+
+    @abstractmethod
+    def add_many(self, employees: list[Employee]) -> list[Employee]: ...
+
+    @abstractmethod
+    def get(self, employee_id: uuid.UUID) -> Optional[Employee]: ...
+
+    @abstractmethod
+    def get_versioned(self, employee_id: uuid.UUID) -> Optional[tuple[Employee, int]]:
+        """`get`, along with the employee's current version."""
+
+    def get_version(self, employee_id: uuid.UUID) -> Optional[int]:
+        versioned = self.get_versioned(employee_id)
+        return versioned[1] if versioned is not None else None
+
+    @abstractmethod
+    def get_by_email(self, email: str) -> Optional[Employee]: ...
+
+    @abstractmethod
+    def count(self) -> int:
+        """Number of employees stored."""
+
+    def warm_up(self) -> None:
+        """Build the indexes queries would otherwise build on first use."""
+
+    @abstractmethod
+    def get_all(self) -> list[Employee]: ...
+
+    @abstractmethod
+    def get_page(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        department: Optional[str] = None,
+        position: Optional[str] = None,
+        min_salary: Optional[Decimal] = None,
+        max_salary: Optional[Decimal] = None
+    ) -> tuple[list[Employee], Optional[int]]:
+        """Page through employees, keeping only those matching every given filter."""
+
+    @abstractmethod
+    def get_salary_page(
+        self,
+        limit: int,
+        after: Optional[SalaryKey] = None,
+        descending: bool = False,
+        department: Optional[str] = None,
+        position: Optional[str] = None,
+        min_salary: Optional[Decimal] = None,
+        max_salary: Optional[Decimal] = None
+    ) -> tuple[list[Employee], Optional[SalaryKey]]:
+        """Page through employees ordered by salary, then by position."""
+
+    def get_json(self, employee_id: uuid.UUID) -> Optional[tuple[bytes, int]]:
+        """`get_versioned`, with the employee serialized to JSON."""
+        versioned = self.get_versioned(employee_id)
+        if versioned is None:
+            return None
+        employee, version = versioned
+        return employee.model_dump_json().encode(), version
+
+    def get_page_json(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        department: Optional[str] = None,
+        position: Optional[str] = None,
+        min_salary: Optional[Decimal] = None,
+        max_salary: Optional[Decimal] = None
+    ) -> tuple[list[bytes], Optional[int]]:
+        """`get_page`, with every employee serialized to JSON."""
+        employees, next_position = self.get_page(limit, after, department, position, min_salary, max_salary)
+        return [employee.model_dump_json().encode() for employee in employees], next_position
+
+    def get_salary_page_json(
+        self,
+        limit: int,
+        after: Optional[SalaryKey] = None,
+        descending: bool = False,
+        department: Optional[str] = None,
+        position: Optional[str] = None,
+        min_salary: Optional[Decimal] = None,
+        max_salary: Optional[Decimal] = None
+    ) -> tuple[list[bytes], Optional[SalaryKey]]:
+        """`get_salary_page`, with every employee serialized to JSON."""
+        employees, next_key = self.get_salary_page(
+            limit, after, descending, department, position, min_salary, max_salary
+        )
+        return [employee.model_dump_json().encode() for employee in employees], next_key
+
+    def iter_batches(self, batch_size: int) -> Iterator[list[Employee]]:
+        """Yield every employee in insertion order, `batch_size` at a time."""
+        position = None
+        while True:
+            employees, position = self.get_page(batch_size, after=position)
+            if employees:
+                yield employees
+            if position is None:
+                return
+
+    @abstractmethod
+    def salary_stats(self) -> list[DepartmentSalaryStats]:
+        """Headcount and salary total, mean, min and max per department."""
+
+    @abstractmethod
+    def update(self, employee: Employee, expected_version: Optional[int] = None) -> Employee:
+        """Store `employee`; with `expected_version`, only if it is still the current version.
+
+        Raises VersionConflict when the stored employee is at another
+        version or no longer exists.
+        """
+
+    @abstractmethod
+    def delete(self, employee_id: uuid.UUID) -> bool: ...
+
+    @abstractmethod
+    def exists_by_email(self, email: str, exclude_id: Optional[uuid.UUID] = None) -> bool: ...
+
+    @abstractmethod
+    def get_changes(self, after: int, limit: int) -> list[Change]:
+        """Up to `limit` writes made after change sequence `after`, oldest first.
+
+        Raises ChangesExpired when some of those writes are no longer retained.
+        """
+
+    @abstractmethod
+    def latest_change(self) -> int:
+        """Sequence of the most recent write, from which to follow later ones."""
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class EmployeeRepository(RowStore[Employee], BaseEmployeeRepository):
+    """In-memory repository for Employee entities, on the shared RowStore engine.
+
+    Scans in insertion order (`get_all`, `iter_batches`, and `get_page` and
+    `get_page_json` without a filter) take no lock. Reads served from the
+    filter or salary indexes take the read lock.
+    """
+
+    def __init__(self, wal: Optional[WriteAheadLog] = None, change_retention: int = DEFAULT_CHANGE_RETENTION):
+        # Sorted positions of the rows held in memory per department and per
+        # position; snapshot rows are found through the snapshot's own tables.
+        self._filter_index: dict[str, dict[str, list[int]]] = {field: {} for field in _FILTERS}
+        # Both are kept up to date on every write once built; with a snapshot
+        # they are built on first use so startup does not scan the snapshot.
+        self._aggregates: Optional[SalaryAggregates] = SalaryAggregates()
+        self._salary_index: Optional[SalaryIndex] = SalaryIndex()
+        self._salary_lock = threading.Lock()
+        super().__init__(_CODEC, wal, change_retention)
+
+    def warm_up(self) -> None:
+        with self._lock.read():
+            self._build_salary_structures()
+
+    def get_page(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        department: Optional[str] = None,
+        position: Optional[str] = None,
+        min_salary: Optional[Decimal] = None,
+        max_salary: Optional[Decimal] = None
+    ) -> tuple[list[Employee], Optional[int]]:
+        """Return up to `limit` employees in insertion order following position `after`.
+
+        Only employees matching every given filter are returned, at a cost
+        proportional to the matches of the most selective department or
+        position filter, or of the salary range when it is narrow enough to
+        read off the salary index; wider ranges are checked row by row. The
+        second element is the position to resume from, or None when the end
+        of the store has been reached.
+        """
+        with self._scan_lock(department, position, min_salary, max_salary):
+            rows, next_position = page_of(
+                self._iter_filtered(after, limit, department, position, min_salary, max_salary), limit
+            )
+        return [_CODEC.to_model(row) for row in rows], next_position
+
+    def get_page_json(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        department: Optional[str] = None,
+        position: Optional[str] = None,
+        min_salary: Optional[Decimal] = None,
+        max_salary: Optional[Decimal] = None
+    ) -> tuple[list[bytes], Optional[int]]:
+        with self._scan_lock(department, position, min_salary, max_salary):
+            rows, next_position = page_of(
+                self._iter_filtered(after, limit, department, position, min_salary, max_salary), limit
+            )
+        return [self._json_of(row) for row in rows], next_position
+
+    def get_salary_page(
+        self,
+        limit: int,
+        after: Optional[SalaryKey] = None,
+        descending: bool = False,
+        department: Optional[str] = None,
+        position: Optional[str] = None,
+        min_salary: Optional[Decimal] = None,
+        max_salary: Optional[Decimal] = None
+    ) -> tuple[list[Employee], Optional[SalaryKey]]:
+        """Return up to `limit` employees by salary, lowest first unless `descending`.
+
+        Salary bounds are resolved on the ordered salary index, so a page
+        costs a binary search plus the entries read; department and position
+        filters are checked on those entries. The second element is the key
+        to resume from, or None when the range has been exhausted.
+        """
+        with self._lock.read():
+            rows, next_key = page_of(
+                self._iter_by_salary(after, descending, department, position, min_salary, max_salary), limit
+            )
+        return [_CODEC.to_model(row) for row in rows], next_key
+
+    def get_salary_page_json(
+        self,
+        limit: int,
+        after: Optional[SalaryKey] = None,
+        descending: bool = False,
+        department: Optional[str] = None,
+        position: Optional[str] = None,
+        min_salary: Optional[Decimal] = None,
+        max_salary: Optional[Decimal] = None
+    ) -> tuple[list[bytes], Optional[SalaryKey]]:
+        with self._lock.read():
+            rows, next_key = page_of(
+                self._iter_by_salary(after, descending, department, position, min_salary, max_salary), limit
+            )
+            return [self._json_of(row) for row in rows], next_key
+
+    def salary_stats(self) -> list[DepartmentSalaryStats]:
+        with self._lock.read():
+            self._build_salary_structures()
+            return self._aggregates.stats()
+
+    def _scan_lock(
+        self,
+        department: Optional[str],
+        position: Optional[str],
+        min_salary: Optional[Decimal],
+        max_salary: Optional[Decimal]
+    ) -> AbstractContextManager:
+        """The read lock when a scan may go through the filter or salary indexes; other scans need none."""
+        filtered = _filters(department, position) or min_salary is not None or max_salary is not None
+        return self._lock.read() if filtered else nullcontext()
+
+    def _iter_filtered(
+        self,
+        after: Optional[int],
+        limit: int,
+        department: Optional[str],
+        position: Optional[str],
+        min_salary: Optional[Decimal],
+        max_salary: Optional[Decimal]
+    ) -> Iterator[tuple[int, Row]]:
+        filters = _filters(department, position)
+        if min_salary is None and max_salary is None:
+            return self._iter_matching(filters, after) if filters else self._iter_after(self._rows, after)
+
+        self._build_salary_structures()
+        in_range = self._salary_index.count(min_salary, max_salary)
+        # Going through the salary index costs sorting the positions of the
+        # whole range; a scan in position order reads about limit * size /
+        # in_range rows to fill a page, so the index wins for narrow ranges.
+        narrow = in_range * in_range <= limit * self._size
+        if narrow and (not filters or in_range <= min(self._estimate_matches(name, value) for name, value in filters.items())):
+            return self._iter_salary_range(after, filters, min_salary, max_salary)
+
+        entries = self._iter_matching(filters, after) if filters else self._iter_after(self._rows, after)
+        low, high = _bounds(min_salary, max_salary)
+        return ((key, row) for key, row in entries if low <= in_cents(row[_SALARY]) <= high)
+
+    def _iter_salary_range(
+        self,
+        after: Optional[int],
+        filters: dict[str, str],
+        min_salary: Optional[Decimal],
+        max_salary: Optional[Decimal]
+    ) -> Iterator[tuple[int, Row]]:
+        """Rows in the salary range, in position order after `after`, read off the salary index."""
+        positions = sorted(position for _, position in self._salary_index.scan(min_salary, max_salary))
+        start = bisect_right(positions, after) if after is not None else 0
+        entries = ((position, self._row_at(position)) for position in positions[start:])
+        if filters:
+            entries = (
+                (position, row)
+                for position, row in entries
+                if all(row[_FILTER_COLUMNS[name]] == wanted for name, wanted in filters.items())
+            )
+        return entries
+
+    def _iter_by_salary(
+        self,
+        after: Optional[SalaryKey],
+        descending: bool,
+        department: Optional[str],
+        position: Optional[str],
+        min_salary: Optional[Decimal],
+        max_salary: Optional[Decimal]
+    ) -> Iterator[tuple[SalaryKey, Row]]:
+        self._build_salary_structures()
+        filters = _filters(department, position)
+        entries = (
+            (key, self._row_at(key[1]))
+            for key in self._salary_index.scan(min_salary, max_salary, after, descending)
+        )
+        if filters:
+            entries = (
+                (key, row)
+                for key, row in entries
+                if all(row[_FILTER_COLUMNS[name]] == wanted for name, wanted in filters.items())
+            )
+        return entries
+
+    def _iter_matching(self, filters: dict[str, str], after: Optional[int]) -> Iterator[tuple[int, Row]]:
+        field = min(filters, key=lambda name: self._estimate_matches(name, filters[name]))
+        value = filters[field]
+        positions = self._filter_index[field].get(value, [])
+        start = bisect_right(positions, after) if after is not None else 0
+        changes = ((position, self._rows.get(position)) for position in positions[start:])
+        if self._snapshot is not None:
+            changes = merge_with_snapshot(
+                self._snapshot,
+                self._rows,
+                changes,
+                after,
+                self._snapshot.positions_of(field, value, after)
+            )
+        return (
+            (position, row)
+            for position, row in changes
+            if all(row[_FILTER_COLUMNS[name]] == wanted for name, wanted in filters.items())
+        )
+
+    def _build_salary_structures(self) -> None:
+        """Build the aggregates and salary index in one pass if not built yet."""
+        if self._aggregates is not None:
+            return
+        with self._salary_lock:
+            if self._aggregates is None:
+                aggregates = SalaryAggregates()
+                entries = []
+                for position, row in self._iter_after(self._rows, None):
+                    aggregates.add(row[_DEPARTMENT], row[_SALARY])
+                    entries.append((row[_SALARY], position))
+                self._salary_index = SalaryIndex(entries)
+                self._aggregates = aggregates
+
+    def _estimate_matches(self, field: str, value: str) -> int:
+        matches = len(self._filter_index[field].get(value, ()))
+        if self._snapshot is not None:
+            matches += self._snapshot.count_of(field, value)
+        return matches
+
+    def _defer_indexes(self) -> None:
+        self._aggregates = None
+        self._salary_index = None
+
+    def _index_put(self, position: int, row: Row, previous: Optional[Row], replaced: Optional[Row]) -> None:
+        for field, column in _FILTER_COLUMNS.items():
+            if previous is not None and previous[column] == row[column]:
+                continue
+            index = self._filter_index[field]
+            if previous is not None:
+                self._unindex(index, previous[column], position)
+            insort(index.setdefault(row[column], []), position)
+        if self._aggregates is not None:
+            if replaced is not None:
+                self._aggregates.remove(replaced[_DEPARTMENT], replaced[_SALARY])
+                self._salary_index.remove(replaced[_SALARY], position)
+            self._aggregates.add(row[_DEPARTMENT], row[_SALARY])
+            self._salary_index.add(row[_SALARY], position)
+
+    def _index_remove(self, position: int, row: Optional[Row]) -> None:
+        if self._aggregates is not None:
+            removed = row if row is not None else self._snapshot.row_at(position)
+            self._aggregates.remove(removed[_DEPARTMENT], removed[_SALARY])
+            self._salary_index.remove(removed[_SALARY], position)
+        if row is not None:
+            for field, column in _FILTER_COLUMNS.items():
+                self._unindex(self._filter_index[field], row[column], position)
+
+    @staticmethod
+    def _unindex(index: dict[str, list[int]], value: str, position: int) -> None:
+        positions = index[value]
+        del positions[bisect_left(positions, position)]
+        if not positions:
+            del index[value]
+
+
+class AsyncEmployeeRepository(AsyncRepository):
+    """Awaitable read interface over an employee repository; see AsyncRepository."""
+
+    __slots__ = ()
+
+    async def get_page_json(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        department: Optional[str] = None,
+        position: Optional[str] = None,
+        min_salary: Optional[Decimal] = None,
+        max_salary: Optional[Decimal] = None
+    ) -> tuple[list[bytes], Optional[int]]:
+        call = self._call if min_salary is None and max_salary is None else self._call_in_thread
+        return await call(
+            self._repository.get_page_json, limit, after, department, position, min_salary, max_salary
+        )
+
+    async def get_salary_page_json(
+        self,
+        limit: int,
+        after: Optional[SalaryKey] = None,
+        descending: bool = False,
+        department: Optional[str] = None,
+        position: Optional[str] = None,
+        min_salary: Optional[Decimal] = None,
+        max_salary: Optional[Decimal] = None
+    ) -> tuple[list[bytes], Optional[SalaryKey]]:
+        return await self._call_in_thread(
+            self._repository.get_salary_page_json,
+            limit, after, descending, department, position, min_salary, max_salary
+        )
+
+    async def salary_stats(self) -> list[DepartmentSalaryStats]:
+        return await self._call_in_thread(self._repository.salary_stats)
@@ -0,0 +1,65 @@
+from decimal import Decimal
+from typing import Iterable, Iterator, Optional
+from src.employee.aggregates import Salary, in_cents
+from src.sorted_list import SortedList
+
+# Sorts after every position, so (amount, _LAST) bounds all entries of amount.
+_LAST = float("inf")
+
+# (salary in cents, position) of an indexed employee; also the resume key of
+# a salary-ordered page.
+SalaryKey = tuple[Salary, int]
+
+
+class SalaryIndex:
+    """Employee positions ordered by salary, ties broken by position.
+
+    Range bounds are found by binary search, so a range scan costs one
+    search plus the entries it yields, and the highest or lowest salaries
+    are read straight off the ends. Entries are held in a SortedList, so an
+    add or remove shifts one bucket of entries rather than all of them.
+    """
+
+    def __init__(self, entries: Iterable[SalaryKey] = ()):
+        self._entries = SortedList((in_cents(salary), position) for salary, position in entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, salary: Salary, position: int) -> None:
+        self._entries.add((in_cents(salary), position))
+
+    def remove(self, salary: Salary, position: int) -> None:
+        self._entries.remove((in_cents(salary), position))
+
+    def count(self, min_salary: Optional[Decimal] = None, max_salary: Optional[Decimal] = None) -> int:
+        """Number of entries with `min_salary <= salary <= max_salary`, by two binary searches."""
+        start, stop = self._range(min_salary, max_salary)
+        return stop - start
+
+    def _range(self, min_salary: Optional[Decimal], max_salary: Optional[Decimal]) -> tuple[int, int]:
+        entries = self._entries
+        start = entries.bisect_left((in_cents(min_salary),)) if min_salary is not None else 0
+        stop = entries.bisect_right((in_cents(max_salary), _LAST)) if max_salary is not None else len(entries)
+        return start, stop
+
+    def scan(
+        self,
+        min_salary: Optional[Decimal] = None,
+        max_salary: Optional[Decimal] = None,
+        after: Optional[SalaryKey] = None,
+        descending: bool = False
+    ) -> Iterator[SalaryKey]:
+        """Yield entries with `min_salary <= salary <= max_salary` past `after`.
+
+        Salaries are compared in cents; `after` is an entry previously
+        yielded in the same direction.
+        """
+        entries = self._entries
+        start, stop = self._range(min_salary, max_salary)
+        if after is not None:
+            if descending:
+                stop = min(stop, entries.bisect_left(after))
+            else:
+                start = max(start, entries.bisect_right(after))
+        return entries.islice(start, stop, reverse=descending)
@@ -1,10 +1,54 @@
+import threading
 import uuid
-from typing import Optional
+from functools import partial
+from typing import AsyncIterator, Callable, Iterator, Optional
 from decimal import Decimal
-from src.employee.domain import Employee
-from src.employee.repository import EmployeeRepository
+from src.employee.domain import DepartmentSalaryStats, Employee
+from src.employee.repository import AsyncEmployeeRepository, BaseEmployeeRepository, EmployeeRepository
+from src.employee.sqlite_repository import SqliteEmployeeRepository
+from src.changes import Change, stream_changes
+from src.durability import PeriodicCompactor, WriteAheadLog
+from src.metrics import TimedRepository, registry
+from src.storage import durability_dir, snapshot_interval, sqlite_path, storage_backend, wal_fsync
+from src.pagination import MAX_PAGE_SIZE, encode_cursor, decode_cursor, encode_key_cursor, decode_key_cursor
+from src.versions import VersionConflict
 
-_repository = EmployeeRepository()
+# Accepted `order_by` values, mapped to whether the order is descending.
+SALARY_ORDERS = {"salary": False, "-salary": True}
+
+
+def _create_repository() -> BaseEmployeeRepository:
+    if storage_backend() == "sqlite":
+        return SqliteEmployeeRepository(sqlite_path())
+    directory = durability_dir()
+    if directory is None:
+        return EmployeeRepository()
+    repository = EmployeeRepository(WriteAheadLog(directory, "employees", fsync=wal_fsync()))
+    PeriodicCompactor(repository, snapshot_interval()).start()
+    return repository
+
+
+_repository = TimedRepository(_create_repository(), "employees")
+registry.gauge("store_records", "Records held by each store.", {"store": "employees"}, lambda: count_employees())
+_warmed_up = threading.Event()
+
+
+def _warm_up(repository: BaseEmployeeRepository) -> None:
+    repository.warm_up()
+    _warmed_up.set()
+
+
+# Indexes are built off the event loop and ahead of traffic; readiness
+# waits for them.
+threading.Thread(target=_warm_up, args=(_repository,), name="employees-warm-up", daemon=True).start()
+
+
+def is_warmed_up() -> bool:
+    return _warmed_up.is_set()
+
+
+def _async_repository() -> AsyncEmployeeRepository:
+    return AsyncEmployeeRepository(_repository)
 
 
 def create_employee(
@@ -15,9 +59,6 @@ def create_employee(
     position: str,
     salary: Decimal
 ) -> Employee:
-    if _repository.exists_by_email(email):
-        raise ValueError(f"Employee with email '{email}' already exists")
-    
     employee = Employee(
         id=uuid.uuid4(),
         name=name,
@@ -27,7 +68,34 @@ def create_employee(
         position=position,
         salary=salary
     )
-    return _repository.add(employee)
+    with _repository.transaction():
+        if _repository.exists_by_email(email):
+            raise ValueError(f"Employee with email '{email}' already exists")
+        return _repository.add(employee)
+
+
+def create_employees_bulk(entries: list[dict], atomic: bool = True) -> tuple[list[Employee], dict[int, str]]:
+    """Create many employees in one pass.
+
+    Each entry holds the keyword arguments of `create_employee`. Returns the
+    created employees and a mapping of entry index to error message. Emails are
+    checked against the store and against earlier entries of the same batch.
+    When `atomic` is set and any entry fails, nothing is stored.
+    """
+    candidates = [Employee(id=uuid.uuid4(), **entry) for entry in entries]
+    errors: dict[int, str] = {}
+    batch_emails: set[str] = set()
+    employees: list[Employee] = []
+    with _repository.transaction():
+        for index, employee in enumerate(candidates):
+            if employee.email in batch_emails or _repository.exists_by_email(employee.email):
+                errors[index] = f"Employee with email '{employee.email}' already exists"
+                continue
+            batch_emails.add(employee.email)
+            employees.append(employee)
+        if atomic and errors:
+            return [], errors
+        return _repository.add_many(employees), errors
 
 
 def get_employee(employee_id: uuid.UUID) -> Employee:
@@ -37,10 +105,181 @@ def get_employee(employee_id: uuid.UUID) -> Employee:
     return employee
 
 
+def get_employee_json(employee_id: uuid.UUID) -> tuple[bytes, int]:
+    """`get_employee`, already serialized to JSON, and the employee's version."""
+    versioned = _repository.get_json(employee_id)
+    if versioned is None:
+        raise ValueError(f"Employee with id '{employee_id}' not found")
+    return versioned
+
+
+async def get_employee_json_async(employee_id: uuid.UUID) -> tuple[bytes, int]:
+    versioned = await _async_repository().get_json(employee_id)
+    if versioned is None:
+        raise ValueError(f"Employee with id '{employee_id}' not found")
+    return versioned
+
+
+def get_employee_version(employee_id: uuid.UUID) -> int:
+    version = _repository.get_version(employee_id)
+    if version is None:
+        raise ValueError(f"Employee with id '{employee_id}' not found")
+    return version
+
+
+async def get_employee_version_async(employee_id: uuid.UUID) -> int:
+    version = await _async_repository().get_version(employee_id)
+    if version is None:
+        raise ValueError(f"Employee with id '{employee_id}' not found")
+    return version
+
+
+def get_employee_by_email(email: str) -> Employee:
+    employee = _repository.get_by_email(email)
+    if employee is None:
+        raise ValueError(f"Employee with email '{email}' not found")
+    return employee
+
+
+async def get_employee_by_email_async(email: str) -> Employee:
+    employee = await _async_repository().get_by_email(email)
+    if employee is None:
+        raise ValueError(f"Employee with email '{email}' not found")
+    return employee
+
+
 def get_all_employees() -> list[Employee]:
     return _repository.get_all()
 
 
+def count_employees() -> int:
+    return _repository.count()
+
+
+def get_employees_page(
+    limit: int,
+    cursor: Optional[str] = None,
+    department: Optional[str] = None,
+    position: Optional[str] = None,
+    min_salary: Optional[Decimal] = None,
+    max_salary: Optional[Decimal] = None,
+    order_by: Optional[str] = None
+) -> tuple[list[Employee], Optional[str]]:
+    """Page through employees in insertion order, or by salary when `order_by` is given.
+
+    Cursors are only valid with the ordering that produced them.
+    """
+    fetch, encode = _page_request(
+        _repository.get_page, _repository.get_salary_page,
+        limit, cursor, department, position, min_salary, max_salary, order_by
+    )
+    employees, next_key = fetch()
+    return employees, encode(next_key)
+
+
+def get_employees_page_json(
+    limit: int,
+    cursor: Optional[str] = None,
+    department: Optional[str] = None,
+    position: Optional[str] = None,
+    min_salary: Optional[Decimal] = None,
+    max_salary: Optional[Decimal] = None,
+    order_by: Optional[str] = None
+) -> tuple[list[bytes], Optional[str]]:
+    """`get_employees_page` with each employee already serialized to JSON."""
+    fetch, encode = _page_request(
+        _repository.get_page_json, _repository.get_salary_page_json,
+        limit, cursor, department, position, min_salary, max_salary, order_by
+    )
+    employees, next_key = fetch()
+    return employees, encode(next_key)
+
+
+async def get_employees_page_json_async(
+    limit: int,
+    cursor: Optional[str] = None,
+    department: Optional[str] = None,
+    position: Optional[str] = None,
+    min_salary: Optional[Decimal] = None,
+    max_salary: Optional[Decimal] = None,
+    order_by: Optional[str] = None
+) -> tuple[list[bytes], Optional[str]]:
+    repository = _async_repository()
+    fetch, encode = _page_request(
+        repository.get_page_json, repository.get_salary_page_json,
+        limit, cursor, department, position, min_salary, max_salary, order_by
+    )
+    employees, next_key = await fetch()
+    return employees, encode(next_key)
+
+
+def _page_request(
+    by_position: Callable,
+    by_salary: Callable,
+    limit: int,
+    cursor: Optional[str],
+    department: Optional[str],
+    position: Optional[str],
+    min_salary: Optional[Decimal],
+    max_salary: Optional[Decimal],
+    order_by: Optional[str]
+) -> tuple[Callable, Callable[..., Optional[str]]]:
+    """The repository call fetching the page, and the encoder of the cursor it returns."""
+    filters = dict(department=department, position=position, min_salary=min_salary, max_salary=max_salary)
+    if order_by is not None:
+        if order_by not in SALARY_ORDERS:
+            raise ValueError(f"Unsupported order '{order_by}'")
+        fetch = partial(
+            by_salary, limit, after=decode_key_cursor(cursor), descending=SALARY_ORDERS[order_by], **filters
+        )
+        return fetch, encode_key_cursor
+    return partial(by_position, limit, after=decode_cursor(cursor), **filters), encode_cursor
+
+
+def iter_employee_batches(batch_size: int) -> Iterator[list[Employee]]:
+    """Yield every employee in insertion order, `batch_size` at a time."""
+    return _repository.iter_batches(batch_size)
+
+
+def get_salary_stats() -> list[DepartmentSalaryStats]:
+    return _repository.salary_stats()
+
+
+async def get_salary_stats_async() -> list[DepartmentSalaryStats]:
+    return await _async_repository().salary_stats()
+
+
+def get_employee_changes(since: Optional[int], limit: int) -> tuple[list[Change], int]:
+    """Up to `limit` writes after change sequence `since`, and the sequence to ask for next.
+
+    Without `since` there are no changes, only the sequence of the latest
+    write: a consumer reads it before downloading every employee, then follows
+    the changes from it. Raises ChangesExpired when `since` is older than the
+    changes retained, after which the consumer has to download everything again.
+    """
+    if since is None:
+        return [], _repository.latest_change()
+    changes = _repository.get_changes(since, limit)
+    return changes, changes[-1].sequence if changes else since
+
+
+async def get_employee_changes_async(since: Optional[int], limit: int) -> tuple[list[Change], int]:
+    repository = _async_repository()
+    if since is None:
+        return [], await repository.latest_change()
+    changes = await repository.get_changes(since, limit)
+    return changes, changes[-1].sequence if changes else since
+
+
+async def stream_employee_changes(since: Optional[int]) -> AsyncIterator[bytes]:
+    """Server-Sent Events for every write after `since`, or after the latest one without it."""
+    repository = _async_repository()
+    if since is None:
+        since = await repository.latest_change()
+    async for event in stream_changes(partial(repository.get_changes, limit=MAX_PAGE_SIZE), since):
+        yield event
+
+
 def update_employee(
     employee_id: uuid.UUID,
     name: Optional[str] = None,
@@ -48,26 +287,61 @@ def update_employee(
     phone: Optional[str] = None,
     department: Optional[str] = None,
     position: Optional[str] = None,
-    salary: Optional[Decimal] = None
+    salary: Optional[Decimal] = None,
+    expected_version: Optional[int] = None
 ) -> Employee:
-    employee = _repository.get(employee_id)
-    if employee is None:
-        raise ValueError(f"Employee with id '{employee_id}' not found")
-    
-    if email and email != employee.email:
-        if _repository.exists_by_email(email, exclude_id=employee_id):
-            raise ValueError(f"Employee with email '{email}' already exists")
-    
-    updated = Employee(
-        id=employee.id,
-        name=name if name is not None else employee.name,
-        email=email if email is not None else employee.email,
-        phone=phone if phone is not None else employee.phone,
-        department=department if department is not None else employee.department,
-        position=position if position is not None else employee.position,
-        salary=salary if salary is not None else employee.salary
-    )
-    return _repository.update(updated)
+    """Apply the given fields to the stored employee; see `update_employee_versioned`."""
+    return update_employee_versioned(employee_id, name, email, phone, department, position, salary, expected_version)[0]
+
+
+def update_employee_versioned(
+    employee_id: uuid.UUID,
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    phone: Optional[str] = None,
+    department: Optional[str] = None,
+    position: Optional[str] = None,
+    salary: Optional[Decimal] = None,
+    expected_version: Optional[int] = None
+) -> tuple[Employee, int]:
+    """Apply the given fields to the stored employee.
+
+    The change is written only if the employee is still at the version it
+    was read at. Without `expected_version` a concurrent write just means
+    reading and merging again; with it, the caller's version must be the
+    current one or VersionConflict is raised. Only an email change locks
+    the store, to keep emails unique. Returns the stored employee and its
+    new version.
+    """
+    while True:
+        versioned = _repository.get_versioned(employee_id)
+        if versioned is None:
+            raise ValueError(f"Employee with id '{employee_id}' not found")
+        employee, version = versioned
+        if expected_version is not None and version != expected_version:
+            raise VersionConflict(f"Employee with id '{employee_id}' is no longer at version {expected_version}")
+
+        updated = Employee(
+            id=employee.id,
+            name=name if name is not None else employee.name,
+            email=email if email is not None else employee.email,
+            phone=phone if phone is not None else employee.phone,
+            department=department if department is not None else employee.department,
+            position=position if position is not None else employee.position,
+            salary=salary if salary is not None else employee.salary
+        )
+        # Each write moves a record to the next version, and this one is
+        # conditional on `version`.
+        try:
+            if email and email != employee.email:
+                with _repository.transaction():
+                    if _repository.exists_by_email(email, exclude_id=employee_id):
+                        raise ValueError(f"Employee with email '{email}' already exists")
+                    return _repository.update(updated, expected_version=version), version + 1
+            return _repository.update(updated, expected_version=version), version + 1
+        except VersionConflict:
+            if expected_version is not None:
+                raise
 
 
 def delete_employee(employee_id: uuid.UUID) -> None:
@@ -0,0 +1,382 @@
+import sqlite3
+import uuid
+from decimal import Decimal
+from contextlib import AbstractContextManager
+from typing import Optional
+from src.employee.aggregates import compute_salary_stats, department_stats, from_cents, in_cents
+from src.employee.domain import DepartmentSalaryStats, Employee
+from src.employee.repository import BaseEmployeeRepository
+from src.employee.salary_index import SalaryKey
+from src.changes import (
+    CHANGE_CREATE,
+    CHANGE_DELETE,
+    CHANGE_UPDATE,
+    DEFAULT_CHANGE_RETENTION,
+    Change,
+    check_retained,
+    initial_sequence,
+)
+from src.storage import SqliteConnectionPool, execute_script
+from src.versions import VersionConflict
+
+
+def _cents_of(salary: str) -> str:
+    """SQL expression for the salary text `salary` in integer cents, or NULL when not in whole cents.
+
+    Salaries are stored as exact decimal text; those too long to be
+    counted in 64-bit integers, or signed, are left NULL too.
+    """
+    return f"""(CASE
+    WHEN {salary} GLOB '*[^0-9.]*' OR length({salary}) > 15 THEN NULL
+    WHEN instr({salary}, '.') = 0 THEN CAST({salary} AS INTEGER) * 100
+    WHEN length({salary}) - instr({salary}, '.') = 2 THEN CAST(replace({salary}, '.', '') AS INTEGER)
+    WHEN length({salary}) - instr({salary}, '.') = 1 THEN CAST(replace({salary}, '.', '') AS INTEGER) * 10
+END)"""
+
+
+def _count_in(department: str, salary: str, sign: str) -> str:
+    """Statement adding (`sign` '+') or taking away ('-') one salary from its department's totals."""
+    cents = _cents_of(salary)
+    return f"""INSERT INTO employees_departments (department, headcount, total_cents, inexact)
+    VALUES ({department}, {sign}1, {sign}coalesce({cents}, 0), {sign}({cents} IS NULL))
+    ON CONFLICT (department) DO UPDATE SET
+        headcount = headcount + excluded.headcount,
+        total_cents = total_cents + excluded.total_cents,
+        inexact = inexact + excluded.inexact;
+    DELETE FROM employees_departments WHERE department = {department} AND headcount = 0;"""
+
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS employees (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id BLOB NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    department TEXT NOT NULL,
+    position TEXT NOT NULL,
+    salary TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE UNIQUE INDEX IF NOT EXISTS employees_email ON employees (email);
+CREATE INDEX IF NOT EXISTS employees_department ON employees (department, seq);
+CREATE INDEX IF NOT EXISTS employees_position ON employees (position, seq);
+CREATE INDEX IF NOT EXISTS employees_salary ON employees (CAST(salary AS REAL), seq);
+CREATE INDEX IF NOT EXISTS employees_department_salary ON employees (department, CAST(salary AS REAL));
+CREATE TABLE IF NOT EXISTS employees_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    operation TEXT NOT NULL,
+    id BLOB NOT NULL,
+    name TEXT,
+    email TEXT,
+    phone TEXT,
+    department TEXT,
+    position TEXT,
+    salary TEXT,
+    version INTEGER
+);
+CREATE TRIGGER IF NOT EXISTS employees_changes_insert AFTER INSERT ON employees BEGIN
+    INSERT INTO employees_changes (operation, id, name, email, phone, department, position, salary, version)
+    VALUES ('{CHANGE_CREATE}', new.id, new.name, new.email, new.phone, new.department, new.position, new.salary, new.version);
+END;
+CREATE TRIGGER IF NOT EXISTS employees_changes_update AFTER UPDATE ON employees BEGIN
+    INSERT INTO employees_changes (operation, id, name, email, phone, department, position, salary, version)
+    VALUES ('{CHANGE_UPDATE}', new.id, new.name, new.email, new.phone, new.department, new.position, new.salary, new.version);
+END;
+CREATE TRIGGER IF NOT EXISTS employees_changes_delete AFTER DELETE ON employees BEGIN
+    INSERT INTO employees_changes (operation, id) VALUES ('{CHANGE_DELETE}', old.id);
+END;
+CREATE TABLE IF NOT EXISTS employees_departments (
+    department TEXT PRIMARY KEY,
+    headcount INTEGER NOT NULL,
+    total_cents INTEGER NOT NULL,
+    inexact INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS employees_departments_insert AFTER INSERT ON employees BEGIN
+    {_count_in("new.department", "new.salary", "+")}
+END;
+CREATE TRIGGER IF NOT EXISTS employees_departments_update AFTER UPDATE OF department, salary ON employees
+WHEN old.department IS NOT new.department OR old.salary IS NOT new.salary BEGIN
+    {_count_in("old.department", "old.salary", "-")}
+    {_count_in("new.department", "new.salary", "+")}
+END;
+CREATE TRIGGER IF NOT EXISTS employees_departments_delete AFTER DELETE ON employees BEGIN
+    {_count_in("old.department", "old.salary", "-")}
+END;
+CREATE TRIGGER IF NOT EXISTS employees_changes_retention AFTER INSERT ON employees_changes BEGIN
+    DELETE FROM employees_changes WHERE seq <= new.seq - {DEFAULT_CHANGE_RETENTION};
+END;
+"""
+_HAS_VERSION = "SELECT 1 FROM pragma_table_info('employees') WHERE name = 'version'"
+_HAS_CHANGES = "SELECT 1 FROM sqlite_master WHERE name = 'employees_changes'"
+# Like in-memory change logs, a new one counts from the current time, so a
+# consumer's position in a database that was since replaced reads as expired.
+_START_CHANGES = "INSERT INTO sqlite_sequence (name, seq) VALUES ('employees_changes', ?)"
+_ADD_VERSION = "ALTER TABLE employees ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+_HAS_DEPARTMENTS = "SELECT 1 FROM sqlite_master WHERE name = 'employees_departments'"
+# Databases created before the department totals existed get them counted once.
+_COUNT_DEPARTMENTS = f"""
+INSERT INTO employees_departments (department, headcount, total_cents, inexact)
+SELECT department, count(*), coalesce(sum(cents), 0), count(*) - count(cents)
+FROM (SELECT department, {_cents_of("salary")} AS cents FROM employees)
+GROUP BY department
+"""
+
+_COLUMNS = "id, name, email, phone, department, position, salary"
+
+_UPSERT = f"""
+INSERT INTO employees ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    name = excluded.name,
+    email = excluded.email,
+    phone = excluded.phone,
+    department = excluded.department,
+    position = excluded.position,
+    salary = excluded.salary,
+    version = version + 1
+"""
+_UPDATE_IF_VERSION = """
+UPDATE employees SET name = ?, email = ?, phone = ?, department = ?, position = ?, salary = ?, version = version + 1
+WHERE id = ? AND version = ?
+"""
+_SELECT_BY_ID = f"SELECT {_COLUMNS} FROM employees WHERE id = ?"
+_SELECT_VERSIONED = f"SELECT {_COLUMNS}, version FROM employees WHERE id = ?"
+_SELECT_VERSION = "SELECT version FROM employees WHERE id = ?"
+_SELECT_BY_EMAIL = f"SELECT {_COLUMNS} FROM employees WHERE email = ?"
+_COUNT = "SELECT count(*) FROM employees"
+_SELECT_ALL = f"SELECT {_COLUMNS} FROM employees ORDER BY seq"
+_SELECT_PAGE = f"SELECT seq, {_COLUMNS} FROM employees WHERE seq > ?{{filters}} ORDER BY seq LIMIT ?"
+# Salary ordering and bounds go through the employees_salary expression index,
+# so queries must spell the expression exactly as it is indexed.
+_SALARY_VALUE = "CAST(salary AS REAL)"
+_SELECT_SALARY_PAGE = f"SELECT seq, {_COLUMNS} FROM employees WHERE 1{{filters}} ORDER BY {{order}} LIMIT ?"
+# Min and max come off the ends of each department's employees_department_salary range.
+_SELECT_DEPARTMENTS = f"""
+SELECT department, headcount, total_cents, inexact,
+    (SELECT salary FROM employees WHERE department = d.department ORDER BY {_SALARY_VALUE} LIMIT 1),
+    (SELECT salary FROM employees WHERE department = d.department ORDER BY {_SALARY_VALUE} DESC LIMIT 1)
+FROM employees_departments AS d ORDER BY department
+"""
+_SELECT_DEPARTMENT_SALARIES = "SELECT department, salary FROM employees WHERE department = ?"
+_DELETE = "DELETE FROM employees WHERE id = ?"
+_SELECT_ID_BY_EMAIL = "SELECT id FROM employees WHERE email = ?"
+_SELECT_CHANGES = (
+    "SELECT seq, operation, id, name, email, phone, department, position, salary, version "
+    "FROM employees_changes WHERE seq > ? ORDER BY seq LIMIT ?"
+)
+_SELECT_LATEST_CHANGE = "SELECT seq FROM sqlite_sequence WHERE name = 'employees_changes'"
+
+
+def _to_row(employee: Employee) -> tuple:
+    return (
+        employee.id.bytes,
+        employee.name,
+        employee.email,
+        employee.phone,
+        employee.department,
+        employee.position,
+        str(employee.salary)
+    )
+
+
+def _change_from_row(row: tuple) -> Change:
+    sequence, operation, id_, *columns, version = row
+    if operation == CHANGE_DELETE:
+        return Change(sequence, operation, uuid.UUID(bytes=id_), None, None)
+    body = _from_row((id_, *columns)).model_dump_json().encode()
+    return Change(sequence, operation, uuid.UUID(bytes=id_), version, body)
+
+
+def _from_row(row: tuple) -> Employee:
+    return Employee(
+        id=uuid.UUID(bytes=row[0]),
+        name=row[1],
+        email=row[2],
+        phone=row[3],
+        department=row[4],
+        position=row[5],
+        salary=Decimal(row[6])
+    )
+
+
+def _filters(
+    department: Optional[str],
+    position: Optional[str],
+    min_salary: Optional[Decimal],
+    max_salary: Optional[Decimal]
+) -> tuple[list[str], list]:
+    """WHERE conditions and their parameters for the given filters."""
+    conditions, parameters = [], []
+    for column, value in (("department", department), ("position", position)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            parameters.append(value)
+    if min_salary is not None:
+        conditions.append(f"{_SALARY_VALUE} >= ?")
+        parameters.append(float(min_salary))
+    if max_salary is not None:
+        conditions.append(f"{_SALARY_VALUE} <= ?")
+        parameters.append(float(max_salary))
+    return conditions, parameters
+
+
+class SqliteEmployeeRepository(BaseEmployeeRepository):
+    """SQLite-backed repository for Employee entities."""
+
+    def __init__(self, path: str, pool_size: int = 4):
+        self._pool = SqliteConnectionPool(path, pool_size)
+        with self._pool.transaction() as connection:
+            has_changes = connection.execute(_HAS_CHANGES).fetchone() is not None
+            has_departments = connection.execute(_HAS_DEPARTMENTS).fetchone() is not None
+            execute_script(connection, _SCHEMA)
+            if not has_changes:
+                connection.execute(_START_CHANGES, (initial_sequence(),))
+            if connection.execute(_HAS_VERSION).fetchone() is None:
+                connection.execute(_ADD_VERSION)
+            if not has_departments:
+                connection.execute(_COUNT_DEPARTMENTS)
+
+    def transaction(self) -> AbstractContextManager[None]:
+        return self._pool.transaction()
+
+    def add(self, employee: Employee) -> Employee:
+        return self.add_many([employee])[0]
+
+    def add_many(self, employees: list[Employee]) -> list[Employee]:
+        try:
+            with self._pool.transaction() as connection:
+                connection.executemany(_UPSERT, [_to_row(employee) for employee in employees])
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"Employee email already exists: {e}")
+        return employees
+
+    def get(self, employee_id: uuid.UUID) -> Optional[Employee]:
+        with self._pool.connection() as connection:
+            row = connection.execute(_SELECT_BY_ID, (employee_id.bytes,)).fetchone()
+        return _from_row(row) if row else None
+
+    def get_versioned(self, employee_id: uuid.UUID) -> Optional[tuple[Employee, int]]:
+        with self._pool.connection() as connection:
+            row = connection.execute(_SELECT_VERSIONED, (employee_id.bytes,)).fetchone()
+        return (_from_row(row), row[-1]) if row else None
+
+    def get_version(self, employee_id: uuid.UUID) -> Optional[int]:
+        with self._pool.connection() as connection:
+            row = connection.execute(_SELECT_VERSION, (employee_id.bytes,)).fetchone()
+        return row[0] if row else None
+
+    def get_by_email(self, email: str) -> Optional[Employee]:
+        with self._pool.connection() as connection:
+            row = connection.execute(_SELECT_BY_EMAIL, (email,)).fetchone()
+        return _from_row(row) if row else None
+
+    def count(self) -> int:
+        with self._pool.connection() as connection:
+            return connection.execute(_COUNT).fetchone()[0]
+
+    def get_all(self) -> list[Employee]:
+        with self._pool.connection() as connection:
+            return [_from_row(row) for row in connection.execute(_SELECT_ALL)]
+
+    def get_page(
+        self,
+        limit: int,
+        after: Optional[int] = None,
+        department: Optional[str] = None,
+        position: Optional[str] = None,
+        min_salary: Optional[Decimal] = None,
+        max_salary: Optional[Decimal] = None
+    ) -> tuple[list[Employee], Optional[int]]:
+        conditions, parameters = _filters(department, position, min_salary, max_salary)
+        query = _SELECT_PAGE.format(filters="".join(f" AND {condition}" for condition in conditions))
+        parameters = (after if after is not None else 0, *parameters, limit + 1)
+        with self._pool.connection() as connection:
+            rows = connection.execute(query, parameters).fetchall()
+        page = [_from_row(row[1:]) for row in rows[:limit]]
+        return page, (rows[limit - 1][0] if len(rows) > limit else None)
+
+    def get_salary_page(
+        self,
+        limit: int,
+        after: Optional[SalaryKey] = None,
+        descending: bool = False,
+        department: Optional[str] = None,
+        position: Optional[str] = None,
+        min_salary: Optional[Decimal] = None,
+        max_salary: Optional[Decimal] = None
+    ) -> tuple[list[Employee], Optional[SalaryKey]]:
+        conditions, parameters = _filters(department, position, min_salary, max_salary)
+        if after is not None:
+            conditions.append(f"({_SALARY_VALUE}, seq) {'<' if descending else '>'} (?, ?)")
+            parameters.extend((float(Decimal(after[0]).scaleb(-2)), after[1]))
+        direction = "DESC" if descending else "ASC"
+        query = _SELECT_SALARY_PAGE.format(
+            filters="".join(f" AND {condition}" for condition in conditions),
+            order=f"{_SALARY_VALUE} {direction}, seq {direction}"
+        )
+        parameters = (*parameters, limit + 1)
+        with self._pool.connection() as connection:
+            rows = connection.execute(query, parameters).fetchall()
+        page = [_from_row(row[1:]) for row in rows[:limit]]
+        if len(rows) <= limit:
+            return page, None
+        last = rows[limit - 1]
+        return page, (in_cents(Decimal(last[-1])), last[0])
+
+    def salary_stats(self) -> list[DepartmentSalaryStats]:
+        """Statistics from the per-department totals that triggers keep on every write.
+
+        Totals are exact integer cents. A department holding salaries that
+        are not whole cents has them summed in Python from its own rows
+        instead, as SQLite's SUM() of decimal text is floating point.
+        """
+        result = []
+        with self._pool.connection() as connection:
+            for department, headcount, total_cents, inexact, min_salary, max_salary in connection.execute(
+                _SELECT_DEPARTMENTS
+            ).fetchall():
+                if inexact:
+                    rows = connection.execute(_SELECT_DEPARTMENT_SALARIES, (department,)).fetchall()
+                    result.extend(compute_salary_stats((department, Decimal(salary)) for department, salary in rows))
+                else:
+                    result.append(department_stats(
+                        department, headcount, from_cents(total_cents), Decimal(min_salary), Decimal(max_salary)
+                    ))
+        return result
+
+    def update(self, employee: Employee, expected_version: Optional[int] = None) -> Employee:
+        if expected_version is None:
+            return self.add(employee)
+        id_, *fields = _to_row(employee)
+        try:
+            with self._pool.transaction() as connection:
+                updated = connection.execute(_UPDATE_IF_VERSION, (*fields, id_, expected_version)).rowcount
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"Employee email already exists: {e}")
+        if not updated:
+            raise VersionConflict(f"Employee with id '{employee.id}' is no longer at version {expected_version}")
+        return employee
+
+    def delete(self, employee_id: uuid.UUID) -> bool:
+        with self._pool.transaction() as connection:
+            return connection.execute(_DELETE, (employee_id.bytes,)).rowcount > 0
+
+    def exists_by_email(self, email: str, exclude_id: Optional[uuid.UUID] = None) -> bool:
+        with self._pool.connection() as connection:
+            row = connection.execute(_SELECT_ID_BY_EMAIL, (email,)).fetchone()
+        return row is not None and (exclude_id is None or row[0] != exclude_id.bytes)
+
+    def get_changes(self, after: int, limit: int) -> list[Change]:
+        """Changes are written by triggers, so they include those of every process on the database."""
+        with self._pool.connection() as connection:
+            rows = connection.execute(_SELECT_CHANGES, (after, limit)).fetchall()
+            latest = connection.execute(_SELECT_LATEST_CHANGE).fetchone()[0]
+        check_retained(after, rows[0][0] if rows else None, latest)
+        return [_change_from_row(row) for row in rows]
+
+    def latest_change(self) -> int:
+        with self._pool.connection() as connection:
+            return connection.execute(_SELECT_LATEST_CHANGE).fetchone()[0]
+
+    def close(self) -> None:
+        self._pool.close()
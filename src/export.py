@@ -0,0 +1,53 @@
+import csv
+import io
+from typing import Iterable, Iterator, Optional
+from pydantic import BaseModel
+
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def resolve_export_format(format: Optional[str], accept: Optional[str]) -> str:
+    """Pick the export format from the `format` query parameter, falling back to `Accept`.
+
+    `format` is one of EXPORT_MEDIA_TYPES, as the endpoints validate it.
+    An `Accept` naming no supported media type gets NDJSON.
+    """
+    if format is not None:
+        return format
+    if accept:
+        for media_range in accept.split(","):
+            media_type = media_range.split(";")[0].strip()
+            for name, supported in EXPORT_MEDIA_TYPES.items():
+                if media_type == supported:
+                    return name
+    return "ndjson"
+
+
+def stream_export(batches: Iterable[list[BaseModel]], format: str, fields: list[str]) -> Iterator[str]:
+    """Serialize record batches lazily, yielding one chunk of text per batch."""
+    if format == "csv":
+        return _stream_csv(batches, fields)
+    return _stream_ndjson(batches)
+
+
+def _stream_ndjson(batches: Iterable[list[BaseModel]]) -> Iterator[str]:
+    for batch in batches:
+        yield "".join(record.model_dump_json() + "\n" for record in batch)
+
+
+def _stream_csv(batches: Iterable[list[BaseModel]], fields: list[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for record in batch:
+            writer.writerow([getattr(record, field) for field in fields])
+        yield buffer.getvalue()
@@ -1,8 +1,18 @@
 from fastapi import FastAPI
 from src.customer.api import router as customer_router
 from src.employee.api import router as employee_router
+from src.health import router as health_router
+from src.imports.api import router as import_router
+from src.metrics import MetricsMiddleware, router as metrics_router
+from src.profiling import ProfilingMiddleware, profile_dir, profile_interval, profile_token
 
 app = FastAPI(title="CESA7000")
+app.add_middleware(MetricsMiddleware)
+if profile_token() is not None:
+    app.add_middleware(ProfilingMiddleware, token=profile_token(), directory=profile_dir(), interval=profile_interval())
 
 app.include_router(customer_router)
-app.include_router(employee_router)
\ No newline at end of file
+app.include_router(employee_router)
+app.include_router(import_router)
+app.include_router(metrics_router)
+app.include_router(health_router)
@@ -0,0 +1,50 @@
+from typing import Callable
+from fastapi import APIRouter, Response
+from fastapi.responses import JSONResponse
+from src.customer.service import count_customers, is_warmed_up as customers_warmed_up
+from src.employee.service import count_employees, is_warmed_up as employees_warmed_up
+from src.responses import JSON_MEDIA_TYPE
+
+_LIVE = b'{"status":"ok"}'
+
+# Stores checked for readiness: the call that reads their size and whether
+# their indexes have been built. Counting goes to the store itself, so a
+# SQLite store also proves its database reachable.
+_STORES: dict[str, tuple[Callable[[], int], Callable[[], bool]]] = {
+    "customers": (count_customers, customers_warmed_up),
+    "employees": (count_employees, employees_warmed_up),
+}
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/healthz", include_in_schema=False)
+async def liveness_endpoint():
+    """The process is serving requests; answered on the event loop without touching any store."""
+    return Response(content=_LIVE, media_type=JSON_MEDIA_TYPE)
+
+
+@router.get("/readyz", include_in_schema=False)
+def readiness_endpoint():
+    """Whether every store is warmed up and answers, with its size; 503 when any is not.
+
+    Stores load their data while the app is imported, so what readiness
+    waits for is the warm-up that builds the search and salary indexes of
+    in-memory stores in the background, and for SQLite stores, that the
+    database is reachable.
+    """
+    stores = {}
+    ready = True
+    for name, (count, warmed_up) in _STORES.items():
+        try:
+            records = count()
+        except Exception as e:
+            stores[name] = {"ready": False, "error": str(e)}
+            ready = False
+            continue
+        stores[name] = {"ready": warmed_up(), "records": records}
+        ready = ready and stores[name]["ready"]
+    return JSONResponse(
+        {"status": "ready" if ready else "unavailable", "stores": stores},
+        status_code=200 if ready else 503
+    )
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import uuid
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from src.customer.api import CreateCustomerRequest
+from src.customer.service import create_customers_bulk
+from src.employee.api import CreateEmployeeRequest
+from src.employee.service import create_employees_bulk
+from src.imports.domain import ImportJob
+from src.imports.service import create_import_job, get_import_job, run_import
+
+IMPORT_TARGETS = {
+    "customers": (CreateCustomerRequest, create_customers_bulk),
+    "employees": (CreateEmployeeRequest, create_employees_bulk),
+}
+
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+}
+
+
+# Response Models
+class ImportJobResponse(BaseModel):
+    id: uuid.UUID
+    target: str
+    format: str
+    status: str
+    rows_processed: int
+    rows_rejected: int
+    rows_per_second: float
+    errors: list[str]
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+
+def _to_response(job: ImportJob) -> ImportJobResponse:
+    return ImportJobResponse(**job.model_dump(), rows_per_second=job.rows_per_second)
+
+
+# Router
+router = APIRouter(prefix="/imports", tags=["imports"])
+
+
+@router.post("/{target}", response_model=ImportJobResponse, status_code=202)
+async def start_import_endpoint(
+    target: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$")
+):
+    if target not in IMPORT_TARGETS:
+        raise HTTPException(status_code=404, detail=f"Unknown import target '{target}'")
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    import_format = format or IMPORT_CONTENT_TYPES.get(content_type)
+    if import_format is None:
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass format=")
+
+    # Spool the upload to disk chunk by chunk so the body is never held in
+    # memory; writes go to a worker thread so the event loop keeps serving.
+    with tempfile.NamedTemporaryFile(prefix="import-", delete=False) as upload:
+        try:
+            async for chunk in request.stream():
+                await run_in_threadpool(upload.write, chunk)
+        except BaseException:
+            os.remove(upload.name)
+            raise
+
+    job = create_import_job(target, import_format)
+    row_model, create_bulk = IMPORT_TARGETS[target]
+    background_tasks.add_task(run_import, job.id, upload.name, row_model, create_bulk)
+    return _to_response(job)
+
+
+@router.get("/{job_id}", response_model=ImportJobResponse)
+def get_import_job_endpoint(job_id: uuid.UUID):
+    try:
+        return _to_response(get_import_job(job_id))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+import uuid
+
+
+class ImportJob(BaseModel):
+    id: uuid.UUID
+    target: str
+    format: str
+    status: str = "pending"
+    rows_processed: int = 0
+    rows_rejected: int = 0
+    errors: list[str] = []
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        elapsed = ((self.finished_at or datetime.now()) - self.started_at).total_seconds()
+        return self.rows_processed / elapsed if elapsed > 0 else 0.0
@@ -0,0 +1,39 @@
+import uuid
+from abc import ABC, abstractmethod
+from typing import Optional
+from src.imports.domain import ImportJob
+
+
+class BaseImportJobRepository(ABC):
+    """Storage interface the import service depends on."""
+
+    @abstractmethod
+    def add(self, job: ImportJob) -> ImportJob: ...
+
+    @abstractmethod
+    def get(self, job_id: uuid.UUID) -> Optional[ImportJob]: ...
+
+    @abstractmethod
+    def update(self, job: ImportJob) -> ImportJob:
+        """Store the job's current status and progress."""
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
+
+
+class ImportJobRepository(BaseImportJobRepository):
+    """In-memory repository for ImportJob entities."""
+
+    def __init__(self):
+        self._storage: dict[uuid.UUID, ImportJob] = {}
+
+    def add(self, job: ImportJob) -> ImportJob:
+        self._storage[job.id] = job
+        return job
+
+    def get(self, job_id: uuid.UUID) -> Optional[ImportJob]:
+        return self._storage.get(job_id)
+
+    def update(self, job: ImportJob) -> ImportJob:
+        self._storage[job.id] = job
+        return job
@@ -0,0 +1,125 @@
+import csv
+import os
+import uuid
+from datetime import datetime
+from typing import Callable, Iterator, TextIO, Union
+from pydantic import BaseModel, ValidationError
+from src.imports.domain import ImportJob
+from src.imports.repository import BaseImportJobRepository, ImportJobRepository
+from src.imports.sqlite_repository import SqliteImportJobRepository
+from src.metrics import TimedRepository
+from src.storage import sqlite_path, storage_backend
+
+IMPORT_FORMATS = ("csv", "ndjson")
+IMPORT_CHUNK_SIZE = 1000
+MAX_RECORDED_ERRORS = 100
+
+
+def _create_repository() -> BaseImportJobRepository:
+    # Jobs live next to the records they import, so with the shared SQLite
+    # backend every worker sees the progress of every import.
+    if storage_backend() == "sqlite":
+        return SqliteImportJobRepository(sqlite_path())
+    return ImportJobRepository()
+
+
+_repository = TimedRepository(_create_repository(), "import_jobs")
+
+
+def create_import_job(target: str, format: str) -> ImportJob:
+    if format not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format '{format}'")
+    job = ImportJob(id=uuid.uuid4(), target=target, format=format)
+    return _repository.add(job)
+
+
+def get_import_job(job_id: uuid.UUID) -> ImportJob:
+    job = _repository.get(job_id)
+    if job is None:
+        raise ValueError(f"Import job with id '{job_id}' not found")
+    return job
+
+
+def run_import(
+    job_id: uuid.UUID,
+    path: str,
+    row_model: type[BaseModel],
+    create_bulk: Callable[..., tuple[list, dict[int, str]]],
+    chunk_size: int = IMPORT_CHUNK_SIZE
+) -> ImportJob:
+    """Validate and insert the rows of an uploaded file, updating job progress per chunk.
+
+    The file is read row by row so memory is bounded by `chunk_size`. Rows
+    that fail `row_model` validation or are rejected by `create_bulk` count
+    as rejected. The file is removed once the import finishes.
+    """
+    job = get_import_job(job_id)
+    job.status = "running"
+    job.started_at = datetime.now()
+    _repository.update(job)
+    chunk: list[dict] = []
+    chunk_rows: list[int] = []
+    try:
+        with open(path, newline="", encoding="utf-8") as source:
+            for row_number, raw in _read_rows(source, job.format):
+                try:
+                    if isinstance(raw, str):
+                        row = row_model.model_validate_json(raw)
+                    else:
+                        row = row_model.model_validate(raw)
+                except ValidationError as e:
+                    job.rows_processed += 1
+                    _reject(job, row_number, _describe(e))
+                    continue
+                chunk.append(row.model_dump())
+                chunk_rows.append(row_number)
+                if len(chunk) >= chunk_size:
+                    _flush(job, chunk, chunk_rows, create_bulk)
+            _flush(job, chunk, chunk_rows, create_bulk)
+        job.status = "completed"
+    except Exception as e:
+        # Unreadable files and failing stores alike end the job, rather than
+        # leaving it running forever.
+        job.status = "failed"
+        job.errors.append(str(e))
+    finally:
+        job.finished_at = datetime.now()
+        _repository.update(job)
+        os.remove(path)
+    return job
+
+
+def _read_rows(source: TextIO, format: str) -> Iterator[tuple[int, Union[str, dict]]]:
+    if format == "csv":
+        reader = csv.DictReader(source)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(source, start=1):
+        if line.strip():
+            yield line_number, line
+
+
+def _flush(job: ImportJob, chunk: list[dict], chunk_rows: list[int], create_bulk) -> None:
+    if not chunk:
+        return
+    _, errors = create_bulk(chunk, atomic=False)
+    job.rows_processed += len(chunk)
+    for index, detail in errors.items():
+        _reject(job, chunk_rows[index], detail)
+    chunk.clear()
+    chunk_rows.clear()
+    _repository.update(job)
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+def _reject(job: ImportJob, row_number: int, detail: str) -> None:
+    job.rows_rejected += 1
+    if len(job.errors) < MAX_RECORDED_ERRORS:
+        job.errors.append(f"Row {row_number}: {detail}")
@@ -0,0 +1,44 @@
+import uuid
+from typing import Optional
+from src.imports.domain import ImportJob
+from src.imports.repository import BaseImportJobRepository
+from src.storage import SqliteConnectionPool, execute_script
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS import_jobs (
+    id BLOB PRIMARY KEY,
+    job TEXT NOT NULL
+);
+"""
+
+_UPSERT = "INSERT INTO import_jobs (id, job) VALUES (?, ?) ON CONFLICT (id) DO UPDATE SET job = excluded.job"
+_SELECT_BY_ID = "SELECT job FROM import_jobs WHERE id = ?"
+
+
+class SqliteImportJobRepository(BaseImportJobRepository):
+    """SQLite-backed repository for ImportJob entities.
+
+    Jobs are stored as their JSON encoding, so any process sharing the
+    database can report the progress of an import another one is running.
+    """
+
+    def __init__(self, path: str, pool_size: int = 2):
+        self._pool = SqliteConnectionPool(path, pool_size)
+        with self._pool.transaction() as connection:
+            execute_script(connection, _SCHEMA)
+
+    def add(self, job: ImportJob) -> ImportJob:
+        return self.update(job)
+
+    def get(self, job_id: uuid.UUID) -> Optional[ImportJob]:
+        with self._pool.connection() as connection:
+            row = connection.execute(_SELECT_BY_ID, (job_id.bytes,)).fetchone()
+        return ImportJob.model_validate_json(row[0]) if row else None
+
+    def update(self, job: ImportJob) -> ImportJob:
+        with self._pool.transaction() as connection:
+            connection.execute(_UPSERT, (job.id.bytes, job.model_dump_json()))
+        return job
+
+    def close(self) -> None:
+        self._pool.close()
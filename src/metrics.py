@@ -0,0 +1,220 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable
+from fastapi import APIRouter, Response
+
+_logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Label value for requests that matched no route, so unknown paths do not
+# each get their own series.
+UNMATCHED_ROUTE = "unmatched"
+
+# Repository calls that are not timed: they return a context manager or an
+# iterator whose work happens after the call.
+_UNTIMED = frozenset({"transaction", "iter_batches", "close"})
+
+
+class Histogram:
+    """Counts of observed values per bucket, plus their sum."""
+
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        # One count per bucket and a last one for values above every bound.
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+def _render_histogram(lines: list[str], name: str, label_names: tuple[str, ...], series: dict) -> None:
+    for values, histogram in sorted(series.items()):
+        labels = _labels(label_names, values)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        cumulative += histogram.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {cumulative}")
+
+
+class MetricsRegistry:
+    """Request and repository metrics, rendered in the Prometheus text format.
+
+    Recording takes one lock, a dict lookup and a bisect; counts and error
+    counts are derived from the latency histograms when rendering. Gauges
+    are read from their callbacks only when rendering.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: dict[tuple[str, str, int], Histogram] = {}
+        self._operations: dict[tuple[str, str], Histogram] = {}
+        self._gauges: dict[str, tuple[str, dict[tuple[tuple[str, str], ...], Callable[[], float]]]] = {}
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route, status)
+        with self._lock:
+            histogram = self._requests.get(key)
+            if histogram is None:
+                histogram = self._requests[key] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_operation(self, store: str, operation: str, seconds: float) -> None:
+        key = (store, operation)
+        with self._lock:
+            histogram = self._operations.get(key)
+            if histogram is None:
+                histogram = self._operations[key] = Histogram()
+            histogram.observe(seconds)
+
+    def gauge(self, name: str, description: str, labels: dict[str, str], read: Callable[[], float]) -> None:
+        """Report the value `read` returns at each scrape as gauge `name` with `labels`."""
+        with self._lock:
+            self._gauges.setdefault(name, (description, {}))[1][tuple(labels.items())] = read
+
+    def render(self) -> bytes:
+        with self._lock:
+            requests = {key: _copy(histogram) for key, histogram in self._requests.items()}
+            operations = {key: _copy(histogram) for key, histogram in self._operations.items()}
+            gauges = {name: (description, dict(series)) for name, (description, series) in self._gauges.items()}
+
+        lines = [
+            "# HELP http_requests_total Requests handled, by method, route template and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), histogram in sorted(requests.items()):
+            labels = _labels(("method", "route", "status"), (method, route, status))
+            lines.append(f"http_requests_total{{{labels}}} {sum(histogram.counts)}")
+
+        errors: dict[tuple[str, str], int] = {}
+        for (method, route, status), histogram in requests.items():
+            if status >= 500:
+                errors[method, route] = errors.get((method, route), 0) + sum(histogram.counts)
+        lines.append("# HELP http_request_errors_total Requests that failed with a server error, by method and route template.")
+        lines.append("# TYPE http_request_errors_total counter")
+        for (method, route), count in sorted(errors.items()):
+            lines.append(f"http_request_errors_total{{{_labels(('method', 'route'), (method, route))}}} {count}")
+
+        lines.append("# HELP http_request_duration_seconds Time to send the whole response, by method, route template and status.")
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        _render_histogram(lines, "http_request_duration_seconds", ("method", "route", "status"), requests)
+
+        lines.append("# HELP repository_operation_duration_seconds Time spent in repository calls, by store and operation.")
+        lines.append("# TYPE repository_operation_duration_seconds histogram")
+        _render_histogram(lines, "repository_operation_duration_seconds", ("store", "operation"), operations)
+
+        for name, (description, series) in sorted(gauges.items()):
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, read in series.items():
+                names, values = zip(*labels) if labels else ((), ())
+                try:
+                    value = read()
+                except Exception:
+                    # One failing store must not take the other series down.
+                    _logger.warning("Skipping gauge %s{%s}", name, _labels(names, values), exc_info=True)
+                    continue
+                lines.append(f"{name}{{{_labels(names, values)}}} {value}")
+        return ("\n".join(lines) + "\n").encode()
+
+
+def _copy(histogram: Histogram) -> Histogram:
+    copy = Histogram()
+    copy.counts = list(histogram.counts)
+    copy.sum = histogram.sum
+    return copy
+
+
+registry = MetricsRegistry()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording every HTTP request in `registry`.
+
+    Requests are labelled with the template of the route that handled
+    them, such as `/customers/{customer_id}`, which the router leaves in
+    the scope. Latency runs until the last byte of the response is sent.
+    """
+
+    def __init__(self, app, metrics: MetricsRegistry = registry):
+        self._app = app
+        self._metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self._app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            self._metrics.observe_request(
+                scope["method"],
+                route.path if route is not None else UNMATCHED_ROUTE,
+                status,
+                time.perf_counter() - start
+            )
+
+
+class TimedRepository:
+    """Forwards to a repository, recording how long each call takes in `registry`."""
+
+    def __init__(self, repository, store: str, metrics: MetricsRegistry = registry):
+        self._repository = repository
+        self._store = store
+        self._metrics = metrics
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._repository, name)
+        if not callable(attribute) or name in _UNTIMED:
+            return attribute
+
+        @wraps(attribute)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                self._metrics.observe_operation(self._store, name, time.perf_counter() - start)
+
+        # Later lookups find the wrapper directly, without __getattr__.
+        setattr(self, name, timed)
+        return timed
+
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics_endpoint():
+    return Response(content=registry.render(), media_type=METRICS_MEDIA_TYPE)
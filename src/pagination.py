@@ -0,0 +1,48 @@
+import base64
+import binascii
+from decimal import Decimal
+from typing import Optional, Union
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(position: Optional[Union[int, str]]) -> Optional[str]:
+    if position is None:
+        return None
+    return base64.urlsafe_b64encode(str(position).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if cursor is None:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        position = int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    if position < 0:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    return position
+
+
+def encode_key_cursor(key: Optional[tuple[Union[int, Decimal], int]]) -> Optional[str]:
+    """Encode a (sort value, position) resume key, as used by sorted pages."""
+    if key is None:
+        return None
+    value, position = key
+    return encode_cursor(f"{value}:{position}")
+
+
+def decode_key_cursor(cursor: Optional[str]) -> Optional[tuple[Decimal, int]]:
+    if cursor is None:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, position = base64.urlsafe_b64decode(padded.encode()).decode().split(":")
+        key = Decimal(value), int(position)
+    except (binascii.Error, UnicodeDecodeError, ValueError, ArithmeticError):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    if not key[0].is_finite() or key[1] < 0:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    return key
@@ -0,0 +1,116 @@
+from typing import Any, Iterator, Optional
+
+# Nodes hold WIDTH children followed by the token of the editor that owns
+# them; only the owning editor may change a node in place.
+_BITS = 5
+_WIDTH = 1 << _BITS
+_MASK = _WIDTH - 1
+
+
+def _get(root: Optional[list], shift: int, position: int) -> Any:
+    if root is None or position >> shift >= _WIDTH:
+        return None
+    node = root
+    while shift:
+        node = node[(position >> shift) & _MASK]
+        if node is None:
+            return None
+        shift -= _BITS
+    return node[position & _MASK]
+
+
+def _leaves(node: list, shift: int, base: int, start: int) -> Iterator[tuple[int, list]]:
+    """Yield (first position, leaf) for the leaves under `node` holding positions from `start`."""
+    if shift == 0:
+        yield base, node
+        return
+    for index in range(max(0, (start - base) >> shift), _WIDTH):
+        child = node[index]
+        if child is not None:
+            yield from _leaves(child, shift - _BITS, base + (index << shift), start)
+
+
+def _items(root: list, shift: int, start: int) -> Iterator[tuple[int, Any]]:
+    for base, leaf in _leaves(root, shift, 0, start):
+        for index in range(max(0, start - base), _WIDTH):
+            value = leaf[index]
+            if value is not None:
+                yield base + index, value
+
+
+class PositionMap:
+    """Immutable map of non-negative integer positions to values, in position order.
+
+    A 32-way trie: lookups and edits touch one node per level, and a new
+    version shares every node it did not change with the old one. Holding
+    on to a map is therefore an O(1) snapshot that later edits never
+    disturb. Maps are changed through a `PositionMapEditor`.
+    """
+
+    __slots__ = ("_root", "_shift")
+
+    def __init__(self, root: Optional[list] = None, shift: int = 0):
+        self._root = root
+        self._shift = shift
+
+    def get(self, position: int) -> Any:
+        """The value at `position`, or None."""
+        return _get(self._root, self._shift, position)
+
+    def items(self, after: Optional[int] = None) -> Iterator[tuple[int, Any]]:
+        """Yield (position, value) pairs with position greater than `after`, ascending."""
+        if self._root is None:
+            return iter(())
+        return _items(self._root, self._shift, after + 1 if after is not None else 0)
+
+    def edit(self) -> "PositionMapEditor":
+        return PositionMapEditor(self._root, self._shift)
+
+
+class PositionMapEditor:
+    """Mutable builder of `PositionMap` versions.
+
+    Nodes are copied the first time an edit reaches them and changed in
+    place after that, so a batch of edits copies each touched node once.
+    `freeze` publishes the current state; later edits copy again, leaving
+    every published map unchanged.
+    """
+
+    __slots__ = ("_root", "_shift", "_token")
+
+    def __init__(self, root: Optional[list] = None, shift: int = 0):
+        self._root = root
+        self._shift = shift
+        self._token = object()
+
+    def get(self, position: int) -> Any:
+        return _get(self._root, self._shift, position)
+
+    def set(self, position: int, value: Any) -> None:
+        """Store `value` at `position`; None removes the entry."""
+        while position >> self._shift >= _WIDTH:
+            root = self._owned(None)
+            root[0] = self._root
+            self._root = root
+            self._shift += _BITS
+        node = self._root = self._owned(self._root)
+        shift = self._shift
+        while shift:
+            index = (position >> shift) & _MASK
+            child = node[index] = self._owned(node[index])
+            node = child
+            shift -= _BITS
+        node[position & _MASK] = value
+
+    def freeze(self) -> PositionMap:
+        self._token = object()
+        return PositionMap(self._root, self._shift)
+
+    def _owned(self, node: Optional[list]) -> list:
+        if node is None:
+            node = [None] * _WIDTH
+            node.append(self._token)
+        elif node[_WIDTH] is not self._token:
+            node = node[:]
+            node[_WIDTH] = self._token
+        return node
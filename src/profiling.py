@@ -0,0 +1,177 @@
+import contextvars
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Optional
+from urllib.parse import parse_qsl
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAMETER = "profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+# Stand-in for the stack of a sample taken while the request ran nowhere,
+# such as when it awaited a free worker thread or the client.
+AWAITING_FRAME = "[awaiting]"
+
+_current_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+
+def profile_token() -> Optional[str]:
+    """Token requests present to be profiled, from PROFILE_TOKEN; unset disables profiling."""
+    return os.environ.get("PROFILE_TOKEN") or None
+
+
+def profile_dir() -> str:
+    return os.environ.get("PROFILE_DIR", "profiles")
+
+
+def profile_interval() -> float:
+    """Seconds between samples, from PROFILE_INTERVAL (default: 0.001)."""
+    return float(os.environ.get("PROFILE_INTERVAL", "0.001"))
+
+
+class RequestProfile:
+    """Sampling profiler following a single request across threads.
+
+    A background thread samples the stack of every thread. A sample of the
+    event loop belongs to the request while the request's own frame is on
+    it; a sample of a worker thread belongs to it while the thread runs a
+    call in the request's context, as anyio's worker threads keep it in a
+    `context` local. Stacks are counted from those frames up, so the
+    profile shows where the request spent wall-clock time, including time
+    blocked on locks or I/O in worker threads.
+    """
+
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._samples: Counter[tuple[str, ...]] = Counter()
+        self._labels: dict = {}
+        # Starting and stopping the sampler are left out of the samples.
+        self._sampling = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._frame = None
+        self._context_token = None
+
+    def start(self, frame) -> None:
+        """Start sampling the request running in `frame` and the calls made in the current context."""
+        self._frame = frame
+        self._context_token = _current_profile.set(self)
+        self._thread.start()
+        self._sampling.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+        _current_profile.reset(self._context_token)
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        self._sampling.wait()
+        while not self._stopped.wait(self._interval):
+            stacks = [
+                stack for thread, frame in sys._current_frames().items()
+                if thread != me and (stack := self._stack(frame)) is not None
+            ]
+            if self._stopped.is_set():
+                break
+            self._samples.update(stacks or [(AWAITING_FRAME,)])
+
+    def _stack(self, leaf) -> Optional[tuple[str, ...]]:
+        """Labels of the frames from the request's entry point to `leaf`, or None when it is not the request's."""
+        frames = []
+        frame = leaf
+        while frame is not None:
+            if frame is self._frame:
+                frames.append(frame)
+                break
+            if "context" in frame.f_code.co_varnames:
+                context = frame.f_locals.get("context")
+                if isinstance(context, contextvars.Context) and context.get(_current_profile) is self:
+                    break
+            frames.append(frame)
+            frame = frame.f_back
+        if frame is None:
+            return None
+        return tuple(self._label(frame.f_code) for frame in reversed(frames))
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def collapsed(self, root: str) -> str:
+        """The samples in collapsed-stack format, one `frame;frame;... count` line per stack, under `root`."""
+        return "".join(
+            f"{';'.join((root,) + stack)} {count}\n"
+            for stack, count in sorted(self._samples.items())
+        )
+
+
+def _requested_token(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return value.decode("latin-1")
+    for name, value in parse_qsl(scope["query_string"].decode("latin-1")):
+        if name == PROFILE_QUERY_PARAMETER:
+            return value
+    return None
+
+
+def _file_name(profile_id: str, method: str, route: str) -> str:
+    slug = "".join(character if character.isalnum() else "_" for character in route).strip("_")
+    return f"{profile_id}-{method}-{slug or 'root'}.folded"
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling the requests that present the profiling token.
+
+    The token comes in an `X-Profile` header or a `profile` query parameter.
+    The response is sent unchanged, with an `X-Profile-Id` header naming the
+    profile, which is written to `directory` once the response is complete,
+    in the collapsed-stack format that flame graph tools read. Only requests
+    presenting the token are sampled; the app adds this middleware only when
+    a token is configured.
+    """
+
+    def __init__(self, app, token: str, directory: str, interval: float):
+        self._app = app
+        self._token = token.encode()
+        self._directory = directory
+        self._interval = interval
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+        token = _requested_token(scope)
+        if token is None or not hmac.compare_digest(token.encode(), self._token):
+            await self._app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}-{uuid.uuid4().hex[:8]}"
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (PROFILE_ID_HEADER, profile_id.encode())]}
+            await send(message)
+
+        profile = RequestProfile(self._interval)
+        profile.start(sys._getframe())
+        try:
+            await self._app(scope, receive, send_with_id)
+        finally:
+            profile.stop()
+            route = scope.get("route")
+            template = route.path if route is not None else scope["path"]
+            os.makedirs(self._directory, exist_ok=True)
+            path = os.path.join(self._directory, _file_name(profile_id, scope["method"], template))
+            with open(path, "w") as file:
+                file.write(profile.collapsed(f"{scope['method']} {template}"))
@@ -0,0 +1,106 @@
+import sys
+import uuid
+from decimal import Decimal
+from typing import Generic, TypeVar, Union
+from pydantic import BaseModel
+
+Model = TypeVar("Model", bound=BaseModel)
+
+# A row is a plain tuple: the 16-byte id, the remaining model fields in
+# declaration order, then the record's version. Tuples carry no per-instance
+# dict, and the field values are stored as compactly as they can be restored
+# exactly.
+Row = tuple
+
+
+def _to_cents(amount: Decimal) -> Union[int, Decimal]:
+    """Two-decimal amounts become integer cents; anything else is kept as is."""
+    if amount.as_tuple().exponent == -2:
+        return int(amount.scaleb(2))
+    return amount
+
+
+def _from_cents(value: Union[int, Decimal]) -> Decimal:
+    return Decimal(value).scaleb(-2) if isinstance(value, int) else value
+
+
+class RowCodec(Generic[Model]):
+    """Converts between domain models and compact rows.
+
+    `interned` fields share one string object per distinct value and
+    `cents` fields hold Decimal amounts as scaled integers. `email` and the
+    `indexed` fields get lookup tables in binary snapshots. Models are
+    rebuilt with `model_construct`, since every row came from a validated
+    model.
+    """
+
+    def __init__(
+        self,
+        model: type[Model],
+        interned: tuple[str, ...] = (),
+        cents: tuple[str, ...] = (),
+        indexed: tuple[str, ...] = ()
+    ):
+        names = list(model.model_fields)
+        if names[0] != "id":
+            raise ValueError(f"{model.__name__} must declare 'id' as its first field")
+        self.model = model
+        self.fields = names[1:]
+        self._interned = [name in interned for name in self.fields]
+        self._cents = [name in cents for name in self.fields]
+        self._email = self.fields.index("email") + 1
+        self.indexed = ("email", *indexed)
+
+    def column(self, name: str) -> int:
+        """Index of field `name` within a row."""
+        return self.fields.index(name) + 1
+
+    def to_row(self, record: Model, version: int = 1) -> Row:
+        values = [record.id.bytes]
+        for name, interned, cents in zip(self.fields, self._interned, self._cents):
+            value = getattr(record, name)
+            if interned:
+                value = sys.intern(value)
+            elif cents:
+                value = _to_cents(value)
+            values.append(value)
+        values.append(version)
+        return tuple(values)
+
+    def to_model(self, row: Row) -> Model:
+        values = {"id": uuid.UUID(bytes=row[0])}
+        for name, cents, value in zip(self.fields, self._cents, row[1:]):
+            values[name] = _from_cents(value) if cents else value
+        return self.model.model_construct(**values)
+
+    def to_json(self, row: Row) -> bytes:
+        """The model's JSON encoding, as a response would carry it."""
+        return self.to_model(row).model_dump_json().encode()
+
+    def email_of(self, row: Row) -> str:
+        return row[self._email]
+
+    @staticmethod
+    def version_of(row: Row) -> int:
+        return row[-1]
+
+    def to_texts(self, row: Row) -> list[str]:
+        """Field values after the id and then the version, as text, for the binary snapshot."""
+        texts = [
+            str(_from_cents(value)) if cents else value
+            for cents, value in zip(self._cents, row[1:])
+        ]
+        texts.append(str(row[-1]))
+        return texts
+
+    def from_texts(self, key: bytes, texts: list[str]) -> Row:
+        """Inverse of `to_texts`; texts without a version are at version 1."""
+        values = [key]
+        for text, interned, cents in zip(texts, self._interned, self._cents):
+            if interned:
+                text = sys.intern(text)
+            elif cents:
+                text = _to_cents(Decimal(text))
+            values.append(text)
+        values.append(int(texts[len(self.fields)]) if len(texts) > len(self.fields) else 1)
+        return tuple(values)
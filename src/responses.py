@@ -0,0 +1,22 @@
+import json
+from typing import Optional
+from fastapi import Response
+from src.versions import format_etag
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+def json_response(body: bytes, version: Optional[int] = None) -> Response:
+    """Send an already serialized JSON body as is, tagged with `version` if given."""
+    headers = {"ETag": format_etag(version)} if version is not None else None
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
+
+
+def not_modified(version: int) -> Response:
+    return Response(status_code=304, headers={"ETag": format_etag(version)})
+
+
+def json_page_response(items: list[bytes], next_cursor: Optional[str]) -> Response:
+    """A page shaped like the `*PageResponse` models, joined from serialized items."""
+    body = b'{"items":[' + b",".join(items) + b'],"next_cursor":' + json.dumps(next_cursor).encode() + b"}"
+    return json_response(body)
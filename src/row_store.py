@@ -0,0 +1,351 @@
+import uuid
+from contextlib import contextmanager
+from itertools import islice
+from typing import Generic, Iterator, Optional, TypeVar
+from src.changes import CHANGE_DELETE, Change, ChangeLog, put_operation
+from src.concurrency import ReadWriteLock
+from src.durability import DELETE, PUT, WriteAheadLog
+from src.persistent import PositionMap, PositionMapEditor
+from src.records import Model, Row, RowCodec
+from src.snapshot import DELETED, BinarySnapshot, merge_with_snapshot, overlay_from
+from src.versions import VersionConflict
+
+Key = TypeVar("Key")
+
+
+def page_of(entries: Iterator[tuple[Key, Row]], limit: int) -> tuple[list[Row], Optional[Key]]:
+    """The first `limit` rows of (key, row) `entries` and the key to resume from, if any remain."""
+    entries = list(islice(entries, limit + 1))
+    return [row for _, row in entries[:limit]], (entries[limit - 1][0] if len(entries) > limit else None)
+
+
+class RowStore(Generic[Model]):
+    """In-memory storage engine of the entity repositories.
+
+    Safe to share between threads: reads run concurrently, writes are
+    serialized, and `transaction()` makes a check-then-write sequence atomic.
+    Records are held as compact rows keyed by their 16-byte id and turned
+    back into models only when returned. A row ends with the record's
+    version, which conditional updates check under the write lock.
+
+    The JSON encoding of a record is cached when first read through
+    `get_json` or a JSON page and dropped when the record changes.
+
+    Scans in insertion order take no lock: they iterate an immutable version
+    of the store captured in O(1) when they start, so they never wait for or
+    see writes made after that.
+
+    When given a write-ahead log, the store is rebuilt from it on startup and
+    every write is appended to it. Rows from the log's binary snapshot stay
+    in the memory-mapped file and are decoded on first access; only rows
+    written since then are held in memory.
+
+    Writes are also recorded in a bounded change log, which holds the row
+    each write left behind. Writes replayed on startup are not recorded.
+
+    Entity repositories keep their own indexes up to date through
+    `_index_put` and `_index_remove`. Those they build on first use are
+    dropped by `_defer_indexes` when a snapshot is restored, so startup does
+    not scan the snapshot; subclasses set up their indexes before calling
+    `__init__`, which replays the log through those hooks.
+    """
+
+    def __init__(self, codec: RowCodec[Model], wal: Optional[WriteAheadLog], change_retention: int):
+        self._codec = codec
+        self._lock = ReadWriteLock()
+        self._storage: dict[bytes, Row] = {}
+        self._email_index: dict[str, bytes] = {}
+        self._snapshot: Optional[BinarySnapshot] = None
+        # The rows in `_storage` by position, plus DELETED at the positions
+        # of deleted snapshot rows. Snapshot rows occupy positions
+        # 0..len(snapshot)-1 and keep theirs when replaced. Writers edit
+        # `_changes` and publish it to `_rows` before releasing the write
+        # lock; scans read `_rows`.
+        self._sequence: dict[bytes, int] = {}
+        self._changes = PositionMapEditor()
+        self._rows: PositionMap = self._changes.freeze()
+        self._next_sequence = 0
+        self._size = 0
+        self._json_cache: dict[bytes, tuple[Row, bytes]] = {}
+        self._change_log = ChangeLog(change_retention)
+        self._wal = None
+        if wal is not None:
+            self._restore(wal)
+        self._wal = wal
+
+    @property
+    def blocking(self) -> bool:
+        # Reads only wait on I/O when queued behind a writer that syncs the
+        # log, and only wait at all while a writer holds or awaits the lock.
+        return (self._wal is not None and self._wal.fsync) or self._lock.writing
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Hold the write lock across several repository calls."""
+        with self._lock.write():
+            yield
+
+    def add(self, record: Model) -> Model:
+        with self._lock.write():
+            self._put(record)
+            self._publish()
+            return record
+
+    def add_many(self, records: list[Model]) -> list[Model]:
+        with self._lock.write():
+            for record in records:
+                self._put(record)
+            self._publish()
+            return records
+
+    def get(self, record_id: uuid.UUID) -> Optional[Model]:
+        with self._lock.read():
+            row = self._row(record_id.bytes)
+        return self._codec.to_model(row) if row is not None else None
+
+    def get_versioned(self, record_id: uuid.UUID) -> Optional[tuple[Model, int]]:
+        with self._lock.read():
+            row = self._row(record_id.bytes)
+        return (self._codec.to_model(row), self._codec.version_of(row)) if row is not None else None
+
+    def get_version(self, record_id: uuid.UUID) -> Optional[int]:
+        with self._lock.read():
+            row = self._row(record_id.bytes)
+        return self._codec.version_of(row) if row is not None else None
+
+    def get_json(self, record_id: uuid.UUID) -> Optional[tuple[bytes, int]]:
+        with self._lock.read():
+            row = self._row(record_id.bytes)
+            return (self._json_of(row), self._codec.version_of(row)) if row is not None else None
+
+    def get_by_email(self, email: str) -> Optional[Model]:
+        with self._lock.read():
+            key = self._key_of_email(email)
+            row = self._row(key) if key is not None else None
+        return self._codec.to_model(row) if row is not None else None
+
+    def count(self) -> int:
+        return self._size
+
+    def get_all(self) -> list[Model]:
+        rows = [row for _, row in self._iter_after(self._rows, None)]
+        return [self._codec.to_model(row) for row in rows]
+
+    def iter_batches(self, batch_size: int) -> Iterator[list[Model]]:
+        """Yield every record as of this call, `batch_size` at a time in insertion order."""
+        return self._batches(self._iter_after(self._rows, None), batch_size)
+
+    def update(self, record: Model, expected_version: Optional[int] = None) -> Model:
+        with self._lock.write():
+            if expected_version is not None:
+                row = self._row(record.id.bytes)
+                if row is None or self._codec.version_of(row) != expected_version:
+                    raise self._conflict(record.id, expected_version)
+            self._put(record)
+            self._publish()
+            return record
+
+    def delete(self, record_id: uuid.UUID) -> bool:
+        with self._lock.write():
+            if not self._remove(record_id.bytes):
+                return False
+            self._publish()
+            self._change_log.append(CHANGE_DELETE, record_id.bytes, None)
+            if self._wal is not None:
+                self._wal.append_delete(record_id)
+            return True
+
+    def exists_by_email(self, email: str, exclude_id: Optional[uuid.UUID] = None) -> bool:
+        with self._lock.read():
+            key = self._key_of_email(email)
+        return key is not None and (exclude_id is None or key != exclude_id.bytes)
+
+    def get_changes(self, after: int, limit: int) -> list[Change]:
+        with self._lock.read():
+            entries = self._change_log.since(after, limit)
+        return [self._change(*entry) for entry in entries]
+
+    def latest_change(self) -> int:
+        with self._lock.read():
+            return self._change_log.latest
+
+    def compact(self) -> None:
+        """Fold the write-ahead log into a fresh snapshot.
+
+        Only the current version of the store is taken, in O(1), under the
+        write lock; merging it with the snapshot and writing the new file
+        happen after writers are released.
+        """
+        if self._wal is None:
+            return
+        with self._wal.compaction():
+            with self._lock.write():
+                changes = self._rows
+                self._wal.rotate()
+            rows = (row for _, row in self._iter_after(changes, None))
+            self._wal.write_snapshot(rows, self._codec)
+
+    def close(self) -> None:
+        if self._wal is not None:
+            self._wal.close()
+        if self._snapshot is not None:
+            self._snapshot.close()
+
+    def _index_put(self, position: int, row: Row, previous: Optional[Row], replaced: Optional[Row]) -> None:
+        """Index `row`, written at `position` over the in-memory row `previous`.
+
+        `replaced` is the row it replaces, whether held in memory or in the
+        snapshot; both are None for a new record.
+        """
+
+    def _index_remove(self, position: int, row: Optional[Row]) -> None:
+        """Unindex the row deleted from `position`; None when it is the snapshot's row there."""
+
+    def _defer_indexes(self) -> None:
+        """Drop the indexes built on first use, as a snapshot has been restored."""
+
+    def _restore(self, wal: WriteAheadLog) -> None:
+        self._snapshot = wal.open_snapshot(self._codec)
+        if self._snapshot is not None:
+            self._next_sequence = len(self._snapshot)
+            self._size = len(self._snapshot)
+            self._defer_indexes()
+        for operation, payload, version in wal.replay():
+            if operation == PUT:
+                record = self._codec.model.model_validate_json(payload)
+                if version is None:
+                    version = self._next_version(record.id.bytes)
+                self._apply_put(self._codec.to_row(record, version))
+            elif operation == DELETE:
+                self._remove(uuid.UUID(payload).bytes)
+        self._publish()
+
+    def _publish(self) -> None:
+        self._rows = self._changes.freeze()
+
+    def _iter_after(self, changes: PositionMap, after: Optional[int]) -> Iterator[tuple[int, Row]]:
+        """Live rows of the store version `changes` after position `after`."""
+        if self._snapshot is None:
+            # Deletion markers only ever stand in for snapshot rows.
+            return changes.items(after)
+        return merge_with_snapshot(self._snapshot, changes, overlay_from(changes, after), after)
+
+    def _batches(self, entries: Iterator[tuple[int, Row]], batch_size: int) -> Iterator[list[Model]]:
+        while batch := list(islice(entries, batch_size)):
+            yield [self._codec.to_model(row) for _, row in batch]
+
+    def _conflict(self, record_id: uuid.UUID, expected_version: int) -> VersionConflict:
+        return VersionConflict(
+            f"{self._codec.model.__name__} with id '{record_id}' is no longer at version {expected_version}"
+        )
+
+    def _json_of(self, row: Row) -> bytes:
+        # Entries hold the row they encode: a scan without the lock may read
+        # a row a writer has since replaced, whose encoding is then not
+        # returned for the current one.
+        key = row[0]
+        cached = self._json_cache.get(key)
+        if cached is not None and cached[0] is row:
+            return cached[1]
+        body = self._codec.to_json(row)
+        self._json_cache[key] = (row, body)
+        # Writers drop a key's entry after changing its row, so an entry
+        # stored once the row is gone was stored after that drop; it is
+        # dropped here instead of holding a deleted record's encoding.
+        if self._row(key) is not row:
+            self._json_cache.pop(key, None)
+        return body
+
+    def _change(self, sequence: int, operation: str, key: bytes, row: Optional[Row]) -> Change:
+        if row is None:
+            return Change(sequence, operation, uuid.UUID(bytes=key), None, None)
+        # Only the current row of a live record goes through the JSON cache;
+        # caching earlier versions or deleted records would evict the current
+        # encoding or hold memory nothing frees.
+        body = self._json_of(row) if self._storage.get(key) is row else self._codec.to_json(row)
+        return Change(sequence, operation, uuid.UUID(bytes=key), self._codec.version_of(row), body)
+
+    def _row_at(self, position: int) -> Row:
+        """Live row at `position`, whether held in memory or in the snapshot."""
+        return self._changes.get(position) or self._snapshot.row_at(position)
+
+    def _row(self, key: bytes) -> Optional[Row]:
+        row = self._storage.get(key)
+        if row is None:
+            position = self._snapshot_position(key)
+            if position is not None:
+                row = self._snapshot.row_at(position)
+        return row
+
+    def _key_of_email(self, email: str) -> Optional[bytes]:
+        key = self._email_index.get(email)
+        if key is not None or self._snapshot is None:
+            return key
+        for position in self._snapshot.positions_of_email(email):
+            if self._changes.get(position) is None:
+                return self._snapshot.key_at(position)
+        return None
+
+    def _snapshot_position(self, key: bytes) -> Optional[int]:
+        """Position of `key` in the snapshot, unless replaced or deleted since."""
+        if self._snapshot is None:
+            return None
+        position = self._snapshot.position_of(key)
+        return position if position is not None and self._changes.get(position) is None else None
+
+    def _next_version(self, key: bytes) -> int:
+        row = self._row(key)
+        return self._codec.version_of(row) + 1 if row is not None else 1
+
+    def _put(self, record: Model) -> None:
+        version = self._next_version(record.id.bytes)
+        row = self._codec.to_row(record, version)
+        self._apply_put(row)
+        self._change_log.append(put_operation(version), row[0], row)
+        if self._wal is not None:
+            self._wal.append_put(record, version)
+
+    def _apply_put(self, row: Row) -> None:
+        key = row[0]
+        previous = self._storage.get(key)
+        replaced = previous
+        if previous is None:
+            position = self._snapshot_position(key)
+            if position is None:
+                position = self._next_sequence
+                self._next_sequence += 1
+                self._size += 1
+            else:
+                replaced = self._snapshot.row_at(position)
+            self._sequence[key] = position
+        else:
+            position = self._sequence[key]
+            if self._codec.email_of(previous) != self._codec.email_of(row):
+                self._email_index.pop(self._codec.email_of(previous), None)
+        self._storage[key] = row
+        self._changes.set(position, row)
+        self._json_cache.pop(key, None)
+        self._email_index[self._codec.email_of(row)] = key
+        self._index_put(position, row, previous, replaced)
+
+    def _remove(self, key: bytes) -> bool:
+        row = self._storage.pop(key, None)
+        if row is None:
+            position = self._snapshot_position(key)
+            if position is None:
+                return False
+            self._changes.set(position, DELETED)
+            self._json_cache.pop(key, None)
+            self._index_remove(position, None)
+            self._size -= 1
+            return True
+        position = self._sequence.pop(key)
+        self._size -= 1
+        # A replaced snapshot row stays hidden behind a deletion marker.
+        self._changes.set(position, DELETED if self._snapshot is not None and position < len(self._snapshot) else None)
+        self._json_cache.pop(key, None)
+        self._index_remove(position, row)
+        email = self._codec.email_of(row)
+        if self._email_index.get(email) == key:
+            del self._email_index[email]
+        return True
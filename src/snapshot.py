@@ -0,0 +1,208 @@
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+from typing import Iterable, Iterator, Optional
+from src.persistent import PositionMap
+from src.records import Row, RowCodec
+
+# Layout: header, then records, then fixed-width tables.
+#   header   MAGIC, record count, offsets table, id table (u64 each), then
+#            one u64 table offset per indexed field of the codec
+#   records  u32 size, 16-byte id, u32 byte length of every other field and
+#            of the version, then those as concatenated utf-8 text
+#   offsets  u64 record offset per position (insertion order)
+#   ids      (16-byte uuid, u32 position) sorted by uuid
+#   fields   per indexed field, (8-byte value hash, u32 position) big-endian,
+#            so the raw bytes sort by hash and then by position
+MAGIC = b"CESASNP3"
+# Same layout, but records carry no version; their rows load at version 1.
+_UNVERSIONED_MAGIC = b"CESASNP2"
+_HEADER = struct.Struct("<8sQQQ")
+_LENGTH = struct.Struct("<I")
+_OFFSET = struct.Struct("<Q")
+_ID_ENTRY = struct.Struct("<16sI")
+_VALUE_ENTRY = struct.Struct(">8sI")
+# Held in an overlay at the position of a snapshot row deleted in memory;
+# live rows are never empty.
+DELETED: Row = ()
+
+
+def _value_key(value: str) -> bytes:
+    return hashlib.blake2b(value.encode(), digest_size=8).digest()
+
+
+def _encode(row: Row, codec: RowCodec) -> bytes:
+    texts = [text.encode() for text in codec.to_texts(row)]
+    payload = row[0] + struct.pack(f"<{len(texts)}I", *map(len, texts)) + b"".join(texts)
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def _decode(buffer, offset: int, codec: RowCodec, lengths: struct.Struct) -> Row:
+    (size,) = _LENGTH.unpack_from(buffer, offset)
+    start = offset + _LENGTH.size
+    raw = buffer[start:start + size]
+    texts = []
+    cursor = 16 + lengths.size
+    for length in lengths.unpack_from(raw, 16):
+        texts.append(raw[cursor:cursor + length].decode())
+        cursor += length
+    return codec.from_texts(raw[:16], texts)
+
+
+def write_binary_snapshot(path: str, rows: Iterable[Row], codec: RowCodec) -> None:
+    """Write `rows` in iteration order to `path` atomically."""
+    temporary_path = path + ".tmp"
+    columns = [codec.column(field) for field in codec.indexed]
+    tables_size = len(columns) * _OFFSET.size
+    offsets: list[int] = []
+    ids: list[tuple[bytes, int]] = []
+    values: list[list[tuple[bytes, int]]] = [[] for _ in columns]
+    with open(temporary_path, "wb") as snapshot:
+        snapshot.write(_HEADER.pack(MAGIC, 0, 0, 0) + bytes(tables_size))
+        for position, row in enumerate(rows):
+            offsets.append(snapshot.tell())
+            ids.append((row[0], position))
+            for table, column in zip(values, columns):
+                table.append((_value_key(row[column]), position))
+            snapshot.write(_encode(row, codec))
+        offsets_at = snapshot.tell()
+        snapshot.write(b"".join(_OFFSET.pack(offset) for offset in offsets))
+        ids_at = snapshot.tell()
+        ids.sort()
+        snapshot.write(b"".join(_ID_ENTRY.pack(*entry) for entry in ids))
+        tables_at = []
+        for table in values:
+            tables_at.append(snapshot.tell())
+            table.sort()
+            snapshot.write(b"".join(_VALUE_ENTRY.pack(*entry) for entry in table))
+        snapshot.seek(0)
+        snapshot.write(_HEADER.pack(MAGIC, len(offsets), offsets_at, ids_at))
+        snapshot.write(b"".join(_OFFSET.pack(offset) for offset in tables_at))
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+    os.replace(temporary_path, path)
+
+
+class BinarySnapshot:
+    """Read-only, memory-mapped view of a binary snapshot.
+
+    Opening only maps the file and reads the header, so it costs the same for
+    any number of records. Lookups binary-search the sorted tables and each
+    row is decoded the first time it is accessed.
+    """
+
+    def __init__(self, path: str, codec: RowCodec):
+        self._codec = codec
+        with open(path, "rb") as source:
+            self._buffer = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, self._offsets_at, self._ids_at = _HEADER.unpack_from(self._buffer)
+        if magic not in (MAGIC, _UNVERSIONED_MAGIC):
+            self._buffer.close()
+            raise ValueError(f"'{path}' is not a binary snapshot")
+        texts = len(codec.fields) + (magic == MAGIC)
+        self._lengths = struct.Struct(f"<{texts}I")
+        self._tables = {
+            field: (_OFFSET.unpack_from(self._buffer, _HEADER.size + i * _OFFSET.size)[0], codec.column(field))
+            for i, field in enumerate(codec.indexed)
+        }
+        self._decoded: dict[int, Row] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def row_at(self, position: int) -> Row:
+        row = self._decoded.get(position)
+        if row is None:
+            (offset,) = _OFFSET.unpack_from(self._buffer, self._offsets_at + position * _OFFSET.size)
+            row = _decode(self._buffer, offset, self._codec, self._lengths)
+            self._decoded[position] = row
+        return row
+
+    def key_at(self, position: int) -> bytes:
+        (offset,) = _OFFSET.unpack_from(self._buffer, self._offsets_at + position * _OFFSET.size)
+        start = offset + _LENGTH.size
+        return self._buffer[start:start + 16]
+
+    def position_of(self, key: bytes) -> Optional[int]:
+        index = self._search(self._ids_at, _ID_ENTRY, key)
+        if index < self._count:
+            found, position = _ID_ENTRY.unpack_from(self._buffer, self._ids_at + index * _ID_ENTRY.size)
+            if found == key:
+                return position
+        return None
+
+    def positions_of_email(self, email: str) -> Iterator[int]:
+        """Yield positions of records whose email is `email`."""
+        return self.positions_of("email", email)
+
+    def positions_of(self, field: str, value: str, after: Optional[int] = None) -> Iterator[int]:
+        """Yield, in ascending order, positions after `after` of records whose `field` is `value`."""
+        table_at, column = self._tables[field]
+        key = _value_key(value)
+        start = _VALUE_ENTRY.pack(key, after + 1 if after is not None else 0)
+        index = self._search(table_at, _VALUE_ENTRY, start)
+        while index < self._count:
+            found, position = _VALUE_ENTRY.unpack_from(self._buffer, table_at + index * _VALUE_ENTRY.size)
+            if found != key:
+                return
+            if self.row_at(position)[column] == value:
+                yield position
+            index += 1
+
+    def count_of(self, field: str, value: str) -> int:
+        """Number of table entries for `value`; an upper bound if hashes collide."""
+        table_at, _ = self._tables[field]
+        key = _value_key(value)
+        first = self._search(table_at, _VALUE_ENTRY, _VALUE_ENTRY.pack(key, 0))
+        last = self._search(table_at, _VALUE_ENTRY, _VALUE_ENTRY.pack(key, 0xFFFFFFFF))
+        return last - first
+
+    def _search(self, table_at: int, entry: struct.Struct, key: bytes) -> int:
+        """Index of the first entry in a sorted table whose key is >= `key`."""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            start = table_at + middle * entry.size
+            if self._buffer[start:start + len(key)] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def close(self) -> None:
+        self._decoded.clear()
+        self._buffer.close()
+
+
+def merge_with_snapshot(
+    snapshot: Optional[BinarySnapshot],
+    changes: PositionMap,
+    overlay: Iterator[tuple[int, Row]],
+    after: Optional[int] = None,
+    positions: Optional[Iterable[int]] = None
+) -> Iterator[tuple[int, Row]]:
+    """Merge snapshot rows with in-memory ones in position order.
+
+    `overlay` yields (position, row) pairs in ascending position order,
+    starting after `after`. Snapshot rows come from `positions` (ascending,
+    after `after`), or from every position after `after` when not given;
+    rows at a position held in `changes` were replaced or deleted in memory
+    and are skipped.
+    """
+    if snapshot is None:
+        return overlay
+    if positions is None:
+        positions = range(after + 1 if after is not None else 0, len(snapshot))
+    base = (
+        (position, snapshot.row_at(position))
+        for position in positions
+        if changes.get(position) is None
+    )
+    return heapq.merge(base, overlay, key=lambda entry: entry[0])
+
+
+def overlay_from(changes: PositionMap, after: Optional[int]) -> Iterator[tuple[int, Row]]:
+    """Yield the live (position, row) pairs of `changes` after `after`."""
+    return ((position, row) for position, row in changes.items(after) if row)
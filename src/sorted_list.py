@@ -0,0 +1,123 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate, islice
+from typing import Any, Iterable, Iterator, Optional
+
+# Buckets split once they hold twice this many values.
+DEFAULT_LOAD = 1000
+
+
+class SortedList:
+    """Values kept in ascending order, in buckets of about `load` values.
+
+    An add or remove shifts values within one bucket rather than the whole
+    list, so writes cost a binary search over the bucket maxima plus a
+    shift of at most 2 * `load` values. Positional reads also go through
+    bucket offsets, which are worked out again on the first read after a
+    write.
+    """
+
+    def __init__(self, values: Iterable[Any] = (), load: int = DEFAULT_LOAD):
+        ordered = sorted(values)
+        self._load = load
+        self._buckets: list[list] = [ordered[start:start + load] for start in range(0, len(ordered), load)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._len = len(ordered)
+        self._offsets: Optional[list[int]] = None
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator:
+        for bucket in self._buckets:
+            yield from bucket
+
+    def __getitem__(self, index: int) -> Any:
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("SortedList index out of range")
+        if index == 0:
+            return self._buckets[0][0]
+        if index == self._len - 1:
+            return self._buckets[-1][-1]
+        offsets = self._bucket_offsets()
+        bucket = bisect_right(offsets, index) - 1
+        return self._buckets[bucket][index - offsets[bucket]]
+
+    def add(self, value: Any) -> None:
+        if not self._buckets:
+            self._buckets.append([value])
+            self._maxes.append(value)
+        else:
+            index = min(bisect_left(self._maxes, value), len(self._buckets) - 1)
+            bucket = self._buckets[index]
+            insort(bucket, value)
+            self._maxes[index] = bucket[-1]
+            if len(bucket) > 2 * self._load:
+                self._buckets[index:index + 1] = [bucket[:self._load], bucket[self._load:]]
+                self._maxes[index:index + 1] = [bucket[self._load - 1], bucket[-1]]
+        self._len += 1
+        self._offsets = None
+
+    def remove(self, value: Any) -> None:
+        """Remove one occurrence of `value`; raises ValueError when there is none."""
+        index = bisect_left(self._maxes, value)
+        if index < len(self._buckets):
+            bucket = self._buckets[index]
+            position = bisect_left(bucket, value)
+            if bucket[position] == value:
+                del bucket[position]
+                if bucket:
+                    self._maxes[index] = bucket[-1]
+                else:
+                    del self._buckets[index]
+                    del self._maxes[index]
+                self._len -= 1
+                self._offsets = None
+                return
+        raise ValueError(f"{value!r} not in SortedList")
+
+    def bisect_left(self, value: Any) -> int:
+        """Index of the first value not less than `value`."""
+        index = bisect_left(self._maxes, value)
+        if index == len(self._buckets):
+            return self._len
+        return self._bucket_offsets()[index] + bisect_left(self._buckets[index], value)
+
+    def bisect_right(self, value: Any) -> int:
+        """Index of the first value greater than `value`."""
+        index = bisect_right(self._maxes, value)
+        if index == len(self._buckets):
+            return self._len
+        return self._bucket_offsets()[index] + bisect_right(self._buckets[index], value)
+
+    def islice(self, start: int, stop: int, reverse: bool = False) -> Iterator:
+        """Iterate over the values at indices `start` to `stop`, from the last when `reverse`."""
+        start, stop = max(start, 0), min(stop, self._len)
+        if start >= stop:
+            return iter(())
+        offsets = self._bucket_offsets()
+        first = bisect_right(offsets, start) - 1
+        last = bisect_right(offsets, stop - 1) - 1
+        if reverse:
+            return self._iter_reversed(first, start - offsets[first], last, stop - offsets[last])
+        return islice(self._iter_from(first, start - offsets[first]), stop - start)
+
+    def _iter_from(self, bucket: int, index: int) -> Iterator:
+        yield from islice(self._buckets[bucket], index, None)
+        for following in islice(self._buckets, bucket + 1, None):
+            yield from following
+
+    def _iter_reversed(self, first: int, start: int, last: int, stop: int) -> Iterator:
+        if first == last:
+            yield from reversed(self._buckets[last][start:stop])
+            return
+        yield from reversed(self._buckets[last][:stop])
+        for bucket in range(last - 1, first, -1):
+            yield from reversed(self._buckets[bucket])
+        yield from reversed(self._buckets[first][start:])
+
+    def _bucket_offsets(self) -> list[int]:
+        if self._offsets is None:
+            self._offsets = [0, *accumulate(len(bucket) for bucket in self._buckets)][:-1] if self._buckets else []
+        return self._offsets
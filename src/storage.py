@@ -0,0 +1,123 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+STORAGE_BACKENDS = ("memory", "sqlite")
+
+
+def storage_backend() -> str:
+    """Backend selected by the STORAGE_BACKEND environment variable (default: memory)."""
+    backend = os.environ.get("STORAGE_BACKEND", "memory")
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unsupported storage backend '{backend}'")
+    if backend == "memory" and worker_count() > 1:
+        # Each process would hold its own diverging copy of the data.
+        raise ValueError("The memory backend serves a single process; use STORAGE_BACKEND=sqlite with several workers")
+    return backend
+
+
+def sqlite_path() -> str:
+    return os.environ.get("SQLITE_PATH", "cesa7000.db")
+
+
+def durability_dir() -> Optional[str]:
+    """Directory for in-memory write-ahead logs and snapshots; unset disables durability."""
+    return os.environ.get("DURABILITY_DIR") or None
+
+
+def snapshot_interval() -> float:
+    return float(os.environ.get("SNAPSHOT_INTERVAL", "300"))
+
+
+def wal_fsync() -> bool:
+    return os.environ.get("WAL_FSYNC", "0") == "1"
+
+
+def worker_count() -> int:
+    """Server processes sharing the storage, from WEB_CONCURRENCY as uvicorn reads it (default: 1)."""
+    return int(os.environ.get("WEB_CONCURRENCY", "1"))
+
+
+def execute_script(connection: sqlite3.Connection, script: str) -> None:
+    """Run the statements of `script` one by one in the current transaction.
+
+    Unlike `executescript`, which commits first, this lets schema setup and
+    the migrations that depend on it run as one transaction, so processes
+    starting together on one database do not race each other.
+    """
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            connection.execute(statement)
+            statement = ""
+
+
+class SqliteConnectionPool:
+    """Fixed-size pool of SQLite connections to one database file.
+
+    Connections run in WAL mode so readers never block the writer. A thread
+    keeps the connection it checked out for the duration of a `connection()`
+    or `transaction()` block, so nested calls share one transaction.
+    """
+
+    def __init__(self, path: str, size: int = 4):
+        self._path = path
+        self._pool: queue.Queue[sqlite3.Connection] = queue.Queue()
+        self._local = threading.local()
+        self._connections = [self._connect() for _ in range(size)]
+        for connection in self._connections:
+            self._pool.put(connection)
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None leaves transaction control to transaction();
+        # cached_statements keeps the prepared statements of every query.
+        connection = sqlite3.connect(
+            self._path,
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        current = getattr(self._local, "connection", None)
+        if current is not None:
+            yield current
+            return
+        connection = self._pool.get()
+        self._local.connection = connection
+        try:
+            yield connection
+        finally:
+            self._local.connection = None
+            self._pool.put(connection)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self.connection() as connection:
+            depth = getattr(self._local, "depth", 0)
+            if depth == 0:
+                connection.execute("BEGIN IMMEDIATE")
+            self._local.depth = depth + 1
+            try:
+                yield connection
+            except BaseException:
+                self._local.depth = depth
+                if depth == 0:
+                    connection.rollback()
+                raise
+            self._local.depth = depth
+            if depth == 0:
+                connection.commit()
+
+    def close(self) -> None:
+        for connection in self._connections:
+            connection.close()
@@ -0,0 +1,39 @@
+from typing import Optional
+
+
+class VersionConflict(ValueError):
+    """A conditional write found the record at a different version than expected."""
+
+
+def format_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _etags(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",")]
+
+
+def etag_matches(header: str, version: int) -> bool:
+    """Whether an `If-None-Match` header lists `version`, or is `*`.
+
+    If-None-Match compares weakly, so `W/"3"` matches version 3.
+    """
+    etag = format_etag(version)
+    return any(tag == "*" or tag.removeprefix("W/") == etag for tag in _etags(header))
+
+
+def parse_if_match(header: Optional[str]) -> Optional[int]:
+    """The version an `If-Match` header requires, or None for no header or `*`.
+
+    Only one entity tag is supported, since a write can only expect one
+    version. If-Match compares strongly, so a weak tag never matches and
+    raises VersionConflict.
+    """
+    if header is None or header.strip() == "*":
+        return None
+    tags = _etags(header)
+    if len(tags) == 1 and tags[0].startswith("W/"):
+        raise VersionConflict(f"Weak entity tag {tags[0]} cannot satisfy If-Match")
+    if len(tags) != 1 or not tags[0].startswith('"') or not tags[0].endswith('"') or not tags[0][1:-1].isdigit():
+        raise ValueError("If-Match must hold a single entity tag or '*'")
+    return int(tags[0][1:-1])
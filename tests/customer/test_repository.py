@@ -1,13 +1,27 @@
+import asyncio
+import random
+import threading
 import uuid
 import pytest
 from src.customer.domain import Customer
-from src.customer.repository import CustomerRepository
+from src.customer import repository as repository_module
+from src.customer.repository import AsyncCustomerRepository, CustomerRepository
+from src.customer.sqlite_repository import SqliteCustomerRepository
+from src.customer.search import top_matches
+from src.durability import WriteAheadLog
+from src.changes import ChangesExpired
+from src.versions import VersionConflict
 
 
-@pytest.fixture
-def repository():
-    """Create a fresh repository instance for each test."""
-    return CustomerRepository()
+@pytest.fixture(params=["memory", "sqlite"])
+def repository(request, tmp_path):
+    """Create a fresh repository instance of each backend for each test."""
+    if request.param == "sqlite":
+        repo = SqliteCustomerRepository(str(tmp_path / "customers.db"))
+    else:
+        repo = CustomerRepository()
+    yield repo
+    repo.close()
 
 
 @pytest.fixture
@@ -23,7 +37,7 @@ def sample_customer():
 
 
 class TestCustomerRepository:
-    """Unit tests for CustomerRepository."""
+    """Unit tests for CustomerRepository and SqliteCustomerRepository."""
 
     def test_add_customer(self, repository, sample_customer):
         """Verify customer is stored correctly."""
@@ -108,6 +122,17 @@ class TestCustomerRepository:
         assert result is True
         assert repository.get(sample_customer.id) is None
 
+    def test_count_follows_writes(self, repository, sample_customer):
+        """Counts records as they are added, updated and deleted."""
+        other = sample_customer.model_copy(update={"id": uuid.uuid4(), "email": "other@example.com"})
+        repository.add(sample_customer)
+        repository.add(other)
+        repository.update(sample_customer)
+        repository.delete(other.id)
+        repository.delete(other.id)
+
+        assert repository.count() == 1
+
     def test_delete_customer_not_found(self, repository):
         """Returns False for missing ID."""
         non_existent_id = uuid.uuid4()
@@ -141,3 +166,531 @@ class TestCustomerRepository:
             exclude_id=other_id
         )
         assert result is True
+
+    def test_get_by_email(self, repository, sample_customer):
+        """Retrieve existing customer by email."""
+        repository.add(sample_customer)
+
+        assert repository.get_by_email("john@example.com") == sample_customer
+        assert repository.get_by_email("other@example.com") is None
+
+    def test_email_index_follows_update(self, repository, sample_customer):
+        """Changing the email releases the old one and claims the new one."""
+        repository.add(sample_customer)
+        updated = sample_customer.model_copy(update={"email": "john.new@example.com"})
+
+        repository.update(updated)
+
+        assert repository.exists_by_email("john@example.com") is False
+        assert repository.exists_by_email("john.new@example.com") is True
+        assert repository.get_by_email("john.new@example.com") == updated
+
+    def test_email_index_follows_delete(self, repository, sample_customer):
+        """Deleting a customer frees its email."""
+        repository.add(sample_customer)
+
+        repository.delete(sample_customer.id)
+
+        assert repository.exists_by_email("john@example.com") is False
+        assert repository.get_by_email("john@example.com") is None
+
+    def test_get_page_follows_insertion_order(self, repository, sample_customer):
+        """Pages walk the store in insertion order and skip deleted customers."""
+        customers = [
+            sample_customer.model_copy(update={"id": uuid.uuid4(), "email": f"customer{i}@example.com"})
+            for i in range(5)
+        ]
+        for customer in customers:
+            repository.add(customer)
+        repository.delete(customers[1].id)
+
+        first, position = repository.get_page(2)
+        second, end = repository.get_page(2, after=position)
+
+        assert first == [customers[0], customers[2]]
+        assert second == [customers[3], customers[4]]
+        assert end is None
+
+    def test_get_page_survives_compaction(self, repository, sample_customer):
+        """Positions stay valid after deleted slots are compacted."""
+        customers = [
+            sample_customer.model_copy(update={"id": uuid.uuid4(), "email": f"customer{i}@example.com"})
+            for i in range(6)
+        ]
+        for customer in customers:
+            repository.add(customer)
+        _, position = repository.get_page(3)
+        for customer in customers[:4]:
+            repository.delete(customer.id)
+
+        result, end = repository.get_page(10, after=position)
+
+        assert result == [customers[4], customers[5]]
+        assert end is None
+
+    def test_json_reads_follow_writes(self, repository, sample_customer):
+        """Serialized customers match the models and change with updates and deletes."""
+        other = sample_customer.model_copy(update={"id": uuid.uuid4(), "email": "other@example.com"})
+        repository.add_many([sample_customer, other])
+        assert repository.get_json(sample_customer.id) == (sample_customer.model_dump_json().encode(), 1)
+
+        updated = repository.update(sample_customer.model_copy(update={"name": "Renamed"}))
+        repository.delete(other.id)
+
+        assert repository.get_json(sample_customer.id) == (updated.model_dump_json().encode(), 2)
+        assert repository.get_json(other.id) is None
+        assert repository.get_page_json(10) == ([updated.model_dump_json().encode()], None)
+
+    def test_async_reads_match_sync(self, repository, sample_customer):
+        """The awaitable interface returns what the repository itself does."""
+        repository.add(sample_customer)
+        reads = AsyncCustomerRepository(repository)
+
+        async def read_all():
+            return await asyncio.gather(
+                reads.get_json(sample_customer.id),
+                reads.get_version(sample_customer.id),
+                reads.get_by_email(sample_customer.email),
+                reads.get_page_json(10),
+                reads.search(["john"], 10)
+            )
+
+        assert asyncio.run(read_all()) == [
+            repository.get_json(sample_customer.id),
+            1,
+            sample_customer,
+            repository.get_page_json(10),
+            [sample_customer]
+        ]
+
+    def test_versions_and_conditional_update(self, repository, sample_customer):
+        """Every write bumps the version; an update expecting a stale version is refused."""
+        repository.add(sample_customer)
+        assert repository.get_version(sample_customer.id) == 1
+
+        renamed = repository.update(sample_customer.model_copy(update={"name": "Renamed"}), expected_version=1)
+        assert repository.get_versioned(sample_customer.id) == (renamed, 2)
+
+        with pytest.raises(VersionConflict):
+            repository.update(sample_customer.model_copy(update={"name": "Stale"}), expected_version=1)
+        assert repository.get(sample_customer.id) == renamed
+
+        repository.update(sample_customer)
+        assert repository.get_version(sample_customer.id) == 3
+        repository.delete(sample_customer.id)
+        assert repository.get_version(sample_customer.id) is None
+        with pytest.raises(VersionConflict):
+            repository.update(sample_customer, expected_version=3)
+
+    def test_changes_follow_writes(self, repository, sample_customer):
+        """Every write is listed after the sequence read before it, with the customer it left behind."""
+        start = repository.latest_change()
+        repository.add(sample_customer)
+        renamed = repository.update(sample_customer.model_copy(update={"name": "Renamed"}))
+        repository.delete(sample_customer.id)
+
+        changes = repository.get_changes(start, 10)
+        assert [change.sequence for change in changes] == [start + 1, start + 2, start + 3]
+        assert [(change.operation, change.id, change.version) for change in changes] == [
+            ("create", sample_customer.id, 1),
+            ("update", sample_customer.id, 2),
+            ("delete", sample_customer.id, None)
+        ]
+        assert changes[1].body == renamed.model_dump_json().encode()
+        assert changes[2].body is None
+        assert repository.get_changes(start, 1) == changes[:1]
+        assert repository.get_changes(changes[-1].sequence, 10) == []
+        assert repository.latest_change() == start + 3
+
+    def test_changes_from_an_unknown_sequence_expire(self, repository, sample_customer):
+        """A sequence past the latest one belongs to another log and must be resynced from."""
+        repository.add(sample_customer)
+        with pytest.raises(ChangesExpired):
+            repository.get_changes(repository.latest_change() + 1, 10)
+
+    def test_search(self, repository, sample_customer):
+        """Finds word prefixes and, for longer terms, substrings; every term must match."""
+        customers = [
+            sample_customer.model_copy(update={"id": uuid.uuid4(), "email": f"c{i}@{domain}", "name": name, "address": address})
+            for i, (name, domain, address) in enumerate([
+                ("Ana Main", "acme.com", "1 Oak Road"),
+                ("Bob Stone", "example.com", "22 Mainland Ave"),
+                ("Carla Ruiz", "acme.com", "9 Domain Street"),
+            ])
+        ]
+        repository.add_many(customers)
+
+        assert repository.search(["main"], 10) == [customers[0], customers[1], customers[2]]
+        assert repository.search(["acme", "oak"], 10) == [customers[0]]
+        assert repository.search(["st"], 10) == [customers[1], customers[2]]
+        assert repository.search(["ai"], 10) == []
+        assert repository.search(["ruiz"], 10) == [customers[2]]
+        assert repository.search(["main"], 1) == [customers[0]]
+        assert repository.search(["nowhere"], 10) == []
+
+    def test_search_follows_updates_and_deletes(self, repository, sample_customer):
+        """Changed and deleted customers are found by their current text only."""
+        other = sample_customer.model_copy(update={"id": uuid.uuid4(), "email": "jane@example.com", "name": "Jane Roe"})
+        repository.add_many([sample_customer, other])
+
+        moved = repository.update(sample_customer.model_copy(update={"address": "5 Elm Court"}))
+        repository.delete(other.id)
+
+        assert repository.search(["elm"], 10) == [moved]
+        assert repository.search(["main"], 10) == []
+        assert repository.search(["jane"], 10) == []
+
+    def test_search_matches_full_ranking(self, repository, sample_customer):
+        """Indexed results equal ranking every stored customer, after random writes."""
+        rng = random.Random(14)
+        words = ["main", "mainland", "domain", "oak", "ana", "anabel", "st", "street"]
+        queries = [["main"], ["ana", "st"], ["oak"], ["ma"], ["an", "main"], ["omai"], ["street", "oak"]]
+
+        def text():
+            return " ".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+
+        for step in range(80):
+            stored = repository.get_all()
+            if stored and rng.random() < 0.3:
+                repository.delete(rng.choice(stored).id)
+            elif stored and rng.random() < 0.4:
+                repository.update(rng.choice(stored).model_copy(update={"name": text(), "address": text()}))
+            else:
+                repository.add(sample_customer.model_copy(update={
+                    "id": uuid.uuid4(), "email": f"{rng.choice(words)}{step}@example.com", "name": text(), "address": text()
+                }))
+            if step % 8 == 0:
+                stored = repository.get_all()
+                for terms in queries:
+                    expected = top_matches(terms, ((c, (c.name, c.email, c.address)) for c in stored), 5)
+                    assert repository.search(terms, 5) == expected
+
+
+@pytest.fixture
+def reopen(tmp_path):
+    """Open durable repositories over one directory, closing them afterwards."""
+    opened = []
+
+    def open_repository():
+        repo = CustomerRepository(WriteAheadLog(str(tmp_path), "customers"))
+        opened.append(repo)
+        return repo
+
+    yield open_repository
+    for repo in opened:
+        repo.close()
+
+
+class TestChangeRetention:
+    """Unit tests for the bounded change log of CustomerRepository."""
+
+    def test_changes_older_than_retention_expire(self, sample_customer):
+        """Once a write falls out of the log, reading from before it asks for a resync."""
+        repository = CustomerRepository(change_retention=2)
+        start = repository.latest_change()
+        for index in range(3):
+            repository.add(sample_customer.model_copy(update={"id": uuid.uuid4(), "email": f"{index}@example.com"}))
+        with pytest.raises(ChangesExpired):
+            repository.get_changes(start, 10)
+        assert [change.sequence for change in repository.get_changes(start + 1, 10)] == [start + 2, start + 3]
+
+    def test_reading_changes_caches_only_live_records(self, sample_customer):
+        """Encodings of deleted records and earlier versions stay out of the JSON cache."""
+        repository = CustomerRepository()
+        start = repository.latest_change()
+        repository.add(sample_customer)
+        repository.update(sample_customer.model_copy(update={"name": "Renamed"}))
+        for index in range(10):
+            other = sample_customer.model_copy(update={"id": uuid.uuid4(), "email": f"{index}@example.com"})
+            repository.add(other)
+            repository.delete(other.id)
+
+        changes = repository.get_changes(start, 100)
+
+        assert b"Renamed" not in changes[0].body
+        assert len(repository._json_cache) <= repository.count()
+        assert b"Renamed" in repository.get_json(sample_customer.id)[0]
+
+
+class TestJsonCache:
+    """Unit tests for the JSON cache of CustomerRepository under concurrent writes."""
+
+    def test_delete_during_page_encoding(self, sample_customer, monkeypatch):
+        """A record deleted while a page encodes it leaves no entry behind."""
+        repository = CustomerRepository()
+        repository.add(sample_customer)
+        to_json = repository_module._CODEC.to_json
+
+        def delete_while_encoding(row):
+            body = to_json(row)
+            repository.delete(sample_customer.id)
+            return body
+
+        monkeypatch.setattr(repository_module._CODEC, "to_json", delete_while_encoding)
+        bodies, _ = repository.get_page_json(10)
+
+        assert len(bodies) == 1
+        assert repository._json_cache == {}
+
+    def test_concurrent_deletes_and_pages(self, sample_customer):
+        """Entries only ever remain for live records while pages race deletes."""
+        repository = CustomerRepository()
+        customers = [
+            sample_customer.model_copy(update={"id": uuid.uuid4(), "email": f"{index}@example.com"})
+            for index in range(200)
+        ]
+        repository.add_many(customers)
+        done = threading.Event()
+
+        def read_pages():
+            while not done.is_set():
+                repository.get_page_json(50)
+
+        readers = [threading.Thread(target=read_pages) for _ in range(2)]
+        for reader in readers:
+            reader.start()
+        for customer in customers[:150]:
+            repository.delete(customer.id)
+        done.set()
+        for reader in readers:
+            reader.join()
+
+        live = {customer.id.bytes for customer in customers[150:]}
+        assert set(repository._json_cache) <= live
+
+
+class TestDurableCustomerRepository:
+    """Unit tests for CustomerRepository with a write-ahead log."""
+
+    def test_writes_survive_restart(self, reopen, sample_customer):
+        """Adds, updates and deletes are replayed on startup."""
+        repository = reopen()
+        other = sample_customer.model_copy(update={"id": uuid.uuid4(), "email": "other@example.com"})
+        repository.add(sample_customer)
+        repository.add(other)
+        repository.update(sample_customer.model_copy(update={"name": "John Updated"}))
+        repository.delete(other.id)
+        repository.close()
+
+        restored = reopen()
+
+        assert restored.get(sample_customer.id).name == "John Updated"
+        assert restored.get(other.id) is None
+        assert restored.exists_by_email("other@example.com") is False
+        assert restored.count() == 1
+
+    def test_compaction_keeps_state(self, reopen, sample_customer, tmp_path):
+        """State is rebuilt from the snapshot plus writes made after it."""
+        repository = reopen()
+        repository.add(sample_customer)
+        repository.compact()
+        later = sample_customer.model_copy(update={"id": uuid.uuid4(), "email": "later@example.com"})
+        repository.add(later)
+        repository.close()
+
+        restored = reopen()
+
+        assert restored.get_all() == [sample_customer, later]
+        assert not (tmp_path / "customers.log.old").exists()
+
+    def test_interrupted_compaction_loses_nothing(self, reopen, sample_customer):
+        """A rotated log without a new snapshot is still replayed."""
+        repository = reopen()
+        repository.add(sample_customer)
+        repository._wal.rotate()
+        repository.delete(sample_customer.id)
+        repository.add(sample_customer.model_copy(update={"name": "Back Again"}))
+        repository.close()
+
+        restored = reopen()
+
+        assert restored.get(sample_customer.id).name == "Back Again"
+
+    def test_versions_survive_restart_and_compaction(self, reopen, sample_customer, tmp_path):
+        """Versions come back from the snapshot and the log; older log entries count from there."""
+        repository = reopen()
+        repository.add(sample_customer)
+        repository.update(sample_customer)
+        repository.compact()
+        repository.update(sample_customer)
+        repository.close()
+        assert reopen().get_version(sample_customer.id) == 3
+
+        with open(tmp_path / "customers.log", "a") as log:
+            log.write(f"P\t{sample_customer.model_dump_json()}\n")
+
+        assert reopen().get_version(sample_customer.id) == 4
+
+    def test_torn_final_entry_is_ignored(self, reopen, sample_customer, tmp_path):
+        """A partially written last line from a crash is skipped."""
+        repository = reopen()
+        repository.add(sample_customer)
+        repository.close()
+        with open(tmp_path / "customers.log", "a") as log:
+            log.write('P\t{"id": "trunc')
+
+        restored = reopen()
+        later = sample_customer.model_copy(update={"id": uuid.uuid4(), "email": "later@example.com"})
+        restored.add(later)
+        restored.close()
+
+        assert reopen().get_all() == [sample_customer, later]
+
+    def test_snapshot_serves_reads_without_loading(self, reopen, sample_customer):
+        """Customers in the binary snapshot are found by id and email."""
+        repository = reopen()
+        others = [
+            sample_customer.model_copy(update={"id": uuid.uuid4(), "email": f"customer{i}@example.com"})
+            for i in range(3)
+        ]
+        repository.add_many([sample_customer, *others])
+        repository.compact()
+        repository.close()
+
+        restored = reopen()
+
+        assert restored._storage == {}
+        assert restored.get(others[1].id) == others[1]
+        assert restored.get_by_email("john@example.com") == sample_customer
+        assert restored.exists_by_email("customer2@example.com", exclude_id=others[2].id) is False
+        assert restored.get_all() == [sample_customer, *others]
+
+    def test_warm_up_builds_indexes_off_the_request_path(self, reopen, sample_customer):
+        """Indexes dropped by a snapshot restore are built by warm_up, or else in a worker thread."""
+        repository = reopen()
+        repository.add(sample_customer)
+        repository.compact()
+        repository.close()
+        restored = reopen()
+        assert restored._search_index is None
+
+        restored.warm_up()
+
+        assert restored._search_index is not None
+        threads = []
+        build = restored._build_search_index
+
+        def recording_build():
+            threads.append(threading.get_ident())
+            build()
+
+        restored._build_search_index = recording_build
+        asyncio.run(AsyncCustomerRepository(restored).search(["john"], 5))
+        assert threads and threads[0] != threading.get_ident()
+
+    def test_reads_block_while_a_writer_holds_the_lock(self, sample_customer):
+        """Async reads leave the event loop only while they would wait for a writer."""
+        repository = CustomerRepository()
+        assert repository.blocking is False
+        with repository.transaction():
+            assert repository.blocking is True
+        assert repository.blocking is False
+
+    def test_writes_over_snapshot(self, reopen, sample_customer):
+        """Updates and deletes of snapshot customers keep their order and survive another compaction."""
+        repository = reopen()
+        others = [
+            sample_customer.model_copy(update={"id": uuid.uuid4(), "email": f"customer{i}@example.com"})
+            for i in range(3)
+        ]
+        repository.add_many([sample_customer, *others])
+        repository.compact()
+        repository.close()
+        restored = reopen()
+        moved = sample_customer.model_copy(update={"email": "moved@example.com"})
+        added = sample_customer.model_copy(update={"id": uuid.uuid4(), "email": "added@example.com"})
+
+        restored.update(moved)
+        restored.delete(others[0].id)
+        restored.add(added)
+
+        expected = [moved, others[1], others[2], added]
+        assert restored.get_all() == expected
+        assert restored.get_by_email("john@example.com") is None
+        assert restored.get(others[0].id) is None
+        assert restored.get_page(2) == (expected[:2], 2)
+        restored.compact()
+        restored.close()
+        assert reopen().get_all() == expected
+
+    def test_scans_read_the_version_they_started_on(self, reopen, sample_customer):
+        """Batches keep returning the store as of the call while writes land, without blocking them."""
+        repository = reopen()
+        others = [
+            sample_customer.model_copy(update={"id": uuid.uuid4(), "email": f"customer{i}@example.com"})
+            for i in range(4)
+        ]
+        repository.add_many([sample_customer, *others[:2]])
+        repository.compact()
+        repository.add_many(others[2:])
+        before = repository.get_all()
+        batches = repository.iter_batches(2)
+
+        first = next(batches)
+        moved = repository.update(sample_customer.model_copy(update={"name": "Moved"}))
+        repository.delete(others[1].id)
+        repository.delete(others[3].id)
+        added = repository.add(sample_customer.model_copy(update={"id": uuid.uuid4(), "email": "added@example.com"}))
+
+        assert [*first, *(customer for batch in batches for customer in batch)] == before
+        assert repository.get_all() == [moved, others[0], others[2], added]
+        assert repository.get_page_json(1) == ([moved.model_dump_json().encode()], 0)
+
+    def test_search_over_snapshot(self, reopen, sample_customer):
+        """The text index built lazily over a snapshot follows later writes."""
+        repository = reopen()
+        others = [
+            sample_customer.model_copy(update={"id": uuid.uuid4(), "email": f"customer{i}@example.com", "name": f"Ann {i}"})
+            for i in range(3)
+        ]
+        repository.add_many([sample_customer, *others])
+        repository.compact()
+        repository.close()
+        restored = reopen()
+
+        assert restored.search(["ann"], 10) == others
+        renamed = restored.update(others[1].model_copy(update={"name": "Zoe 1"}))
+        restored.delete(others[2].id)
+        added = restored.add(sample_customer.model_copy(update={"id": uuid.uuid4(), "email": "ann@example.com"}))
+
+        assert restored.search(["ann"], 10) == [others[0], added]
+        assert restored.search(["zoe"], 10) == [renamed]
+
+
+class TestSharedSqliteCustomerRepository:
+    """Unit tests for SqliteCustomerRepository instances sharing one database, as server workers do."""
+
+    def test_writes_are_visible_to_every_instance(self, tmp_path, sample_customer):
+        """Reads, versions and email uniqueness hold across instances."""
+        path = str(tmp_path / "customers.db")
+        first, second = SqliteCustomerRepository(path), SqliteCustomerRepository(path)
+        try:
+            first.add(sample_customer)
+            assert second.get(sample_customer.id) == sample_customer
+
+            second.update(sample_customer.model_copy(update={"name": "Renamed"}), expected_version=1)
+            assert first.get_versioned(sample_customer.id)[1] == 2
+            with pytest.raises(VersionConflict):
+                first.update(sample_customer, expected_version=1)
+
+            duplicate = sample_customer.model_copy(update={"id": uuid.uuid4()})
+            with pytest.raises(ValueError):
+                second.add(duplicate)
+            assert first.search(["renamed"], 10) == [sample_customer.model_copy(update={"name": "Renamed"})]
+        finally:
+            first.close()
+            second.close()
+
+    def test_changes_include_those_of_every_instance(self, tmp_path, sample_customer):
+        """Writes through one instance are listed in the change feed of another."""
+        path = str(tmp_path / "customers.db")
+        first, second = SqliteCustomerRepository(path), SqliteCustomerRepository(path)
+        try:
+            start = second.latest_change()
+            first.add(sample_customer)
+            second.delete(sample_customer.id)
+            assert [change.operation for change in first.get_changes(start, 10)] == ["create", "delete"]
+            assert second.latest_change() == first.latest_change() == start + 2
+        finally:
+            first.close()
+            second.close()
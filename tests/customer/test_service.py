@@ -1,16 +1,35 @@
+import asyncio
+import sys
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 import pytest
 from src.customer.domain import Customer
 from src.customer.repository import CustomerRepository
+from src.customer.sqlite_repository import SqliteCustomerRepository
 from src.customer import service
+from src.changes import ChangesExpired
+from src.versions import VersionConflict
 
 
-@pytest.fixture
-def fresh_repository(monkeypatch):
-    """Replace the module-level repository with a fresh instance for test isolation."""
-    repo = CustomerRepository()
+@pytest.fixture(params=["memory", "sqlite"])
+def fresh_repository(request, monkeypatch, tmp_path):
+    """Replace the module-level repository with a fresh instance of each backend for test isolation."""
+    if request.param == "sqlite":
+        repo = SqliteCustomerRepository(str(tmp_path / "customers.db"))
+    else:
+        repo = CustomerRepository()
     monkeypatch.setattr(service, "_repository", repo)
-    return repo
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def frequent_thread_switches():
+    """Make the interpreter switch threads as often as possible to surface races."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
 
 
 @pytest.fixture
@@ -60,6 +79,47 @@ class TestCreateCustomer:
         assert "already exists" in str(exc_info.value)
 
 
+def bulk_entry(name, email):
+    return {"name": name, "email": email, "phone": "123-456-7890", "address": "123 Main St"}
+
+
+class TestCreateCustomersBulk:
+    """Tests for create_customers_bulk service function."""
+
+    def test_create_customers_bulk(self, fresh_repository):
+        """Creates every customer of a valid batch."""
+        created, errors = service.create_customers_bulk([
+            bulk_entry("One", "one@example.com"),
+            bulk_entry("Two", "two@example.com"),
+        ])
+
+        assert errors == {}
+        assert [customer.name for customer in created] == ["One", "Two"]
+        assert all(fresh_repository.get(customer.id) == customer for customer in created)
+
+    def test_create_customers_bulk_duplicate_in_batch_is_atomic(self, fresh_repository):
+        """Rejects the whole batch when two entries share an email."""
+        created, errors = service.create_customers_bulk([
+            bulk_entry("One", "one@example.com"),
+            bulk_entry("Copy", "one@example.com"),
+        ])
+
+        assert created == []
+        assert "already exists" in errors[1]
+        assert fresh_repository.get_all() == []
+
+    def test_create_customers_bulk_partial(self, existing_customer, fresh_repository):
+        """Non-atomic batches store valid entries and report the rest."""
+        created, errors = service.create_customers_bulk([
+            bulk_entry("Clash", existing_customer.email),
+            bulk_entry("New", "new@example.com"),
+        ], atomic=False)
+
+        assert list(errors) == [0]
+        assert [customer.email for customer in created] == ["new@example.com"]
+        assert fresh_repository.exists_by_email("new@example.com") is True
+
+
 class TestGetCustomer:
     """Tests for get_customer service function."""
 
@@ -80,6 +140,47 @@ class TestGetCustomer:
         assert "not found" in str(exc_info.value)
 
 
+class TestGetCustomerJson:
+    """Tests for get_customer_json service function."""
+
+    def test_get_customer_json(self, existing_customer):
+        """Returns the customer serialized to JSON, with its version."""
+        assert service.get_customer_json(existing_customer.id) == (existing_customer.model_dump_json().encode(), 1)
+
+    def test_get_customer_json_async(self, existing_customer):
+        """The async variant returns the same body and version."""
+        assert asyncio.run(service.get_customer_json_async(existing_customer.id)) == service.get_customer_json(existing_customer.id)
+
+        with pytest.raises(ValueError) as exc_info:
+            asyncio.run(service.get_customer_json_async(uuid.uuid4()))
+
+        assert "not found" in str(exc_info.value)
+
+    def test_get_customer_json_not_found(self, fresh_repository):
+        """Raises ValueError for missing customer."""
+        with pytest.raises(ValueError) as exc_info:
+            service.get_customer_json(uuid.uuid4())
+
+        assert "not found" in str(exc_info.value)
+
+
+class TestGetCustomerByEmail:
+    """Tests for get_customer_by_email service function."""
+
+    def test_get_customer_by_email(self, existing_customer):
+        """Retrieves customer by email."""
+        result = service.get_customer_by_email("john@example.com")
+
+        assert result == existing_customer
+
+    def test_get_customer_by_email_not_found(self, fresh_repository):
+        """Raises ValueError for unknown email."""
+        with pytest.raises(ValueError) as exc_info:
+            service.get_customer_by_email("nobody@example.com")
+
+        assert "not found" in str(exc_info.value)
+
+
 class TestGetAllCustomers:
     """Tests for get_all_customers service function."""
 
@@ -110,6 +211,115 @@ class TestGetAllCustomers:
         
         assert result == []
 
+    def test_count_customers(self, existing_customer):
+        """Counts the stored customers."""
+        assert service.count_customers() == 1
+
+
+class TestGetCustomersPage:
+    """Tests for get_customers_page service function."""
+
+    def test_get_customers_page(self, existing_customer, fresh_repository):
+        """Cursor from one page resumes at the next."""
+        second = existing_customer.model_copy(update={"id": uuid.uuid4(), "email": "second@example.com"})
+        fresh_repository.add(second)
+
+        first_page, cursor = service.get_customers_page(limit=1)
+        second_page, end = service.get_customers_page(limit=1, cursor=cursor)
+
+        assert first_page == [existing_customer]
+        assert second_page == [second]
+        assert end is None
+
+    def test_get_customers_page_invalid_cursor(self, fresh_repository):
+        """Raises ValueError for a malformed cursor."""
+        with pytest.raises(ValueError) as exc_info:
+            service.get_customers_page(limit=10, cursor="not-a-cursor")
+
+        assert "Invalid cursor" in str(exc_info.value)
+
+
+class TestSearchCustomers:
+    """Tests for search_customers service function."""
+
+    def test_search_customers_ranks_name_matches_first(self, existing_customer, fresh_repository):
+        """A whole-word name match outranks a prefix match in the address."""
+        other = existing_customer.model_copy(update={
+            "id": uuid.uuid4(), "email": "main@example.com", "name": "Ann Main", "address": "1 Oak Road"
+        })
+        fresh_repository.add(other)
+
+        result = service.search_customers("MAIN", limit=10)
+
+        assert result == [other, existing_customer]
+
+    def test_search_customers_without_words(self, fresh_repository):
+        """Raises ValueError for a query with no letters or digits."""
+        with pytest.raises(ValueError) as exc_info:
+            service.search_customers("  -- ", limit=10)
+
+        assert "at least one letter or digit" in str(exc_info.value)
+
+
+class TestIterCustomerBatches:
+    """Tests for iter_customer_batches service function."""
+
+    def test_iter_customer_batches(self, existing_customer, fresh_repository):
+        """Yields every customer in bounded batches."""
+        others = [
+            existing_customer.model_copy(update={"id": uuid.uuid4(), "email": f"other{i}@example.com"})
+            for i in range(2)
+        ]
+        for other in others:
+            fresh_repository.add(other)
+
+        batches = list(service.iter_customer_batches(batch_size=2))
+
+        assert batches == [[existing_customer, others[0]], [others[1]]]
+
+    def test_iter_customer_batches_empty(self, fresh_repository):
+        """Yields nothing when no customers exist."""
+        assert list(service.iter_customer_batches(batch_size=2)) == []
+
+
+class TestGetCustomerChanges:
+    """Tests for get_customer_changes and stream_customer_changes service functions."""
+
+    def test_get_customer_changes(self, fresh_repository):
+        """Starting from the latest sequence, lists the writes made since and where to resume."""
+        changes, since = service.get_customer_changes(None, 10)
+        assert changes == []
+
+        created = service.create_customer(name="Jane Doe", email="jane@example.com", phone="098-765-4321", address="456 Oak Ave")
+        service.delete_customer(created.id)
+        changes, next_since = service.get_customer_changes(since, 10)
+        assert [(change.operation, change.id) for change in changes] == [("create", created.id), ("delete", created.id)]
+        assert next_since == changes[-1].sequence
+        assert service.get_customer_changes(next_since, 10) == ([], next_since)
+        assert asyncio.run(service.get_customer_changes_async(since, 10)) == (changes, next_since)
+
+    def test_get_customer_changes_expired(self, fresh_repository):
+        """A sequence the change log does not know asks for a full resync."""
+        _, since = service.get_customer_changes(None, 10)
+        with pytest.raises(ChangesExpired):
+            service.get_customer_changes(since + 1, 10)
+
+    def test_stream_customer_changes(self, fresh_repository):
+        """Each change is sent as an event whose id is its sequence."""
+        _, since = service.get_customer_changes(None, 10)
+        created = service.create_customer(name="Jane Doe", email="jane@example.com", phone="098-765-4321", address="456 Oak Ave")
+
+        async def first_event():
+            events = service.stream_customer_changes(since)
+            try:
+                return await anext(events)
+            finally:
+                await events.aclose()
+
+        event = asyncio.run(first_event())
+        assert event.startswith(b"id: %d\nevent: create\ndata: " % (since + 1))
+        assert str(created.id).encode() in event
+
 
 class TestUpdateCustomer:
     """Tests for update_customer service function."""
@@ -190,6 +400,25 @@ class TestUpdateCustomer:
         assert result.name == "New Name"
         assert result.email == existing_customer.email
 
+    def test_update_customer_expected_version(self, existing_customer):
+        """Applies only while the customer is at the expected version."""
+        service.update_customer(customer_id=existing_customer.id, name="First", expected_version=1)
+
+        with pytest.raises(VersionConflict):
+            service.update_customer(customer_id=existing_customer.id, name="Second", expected_version=1)
+
+        assert service.get_customer(existing_customer.id).name == "First"
+        assert service.get_customer_version(existing_customer.id) == 2
+
+    def test_update_customer_versioned_returns_new_version(self, existing_customer):
+        """Returns the version the write stored, for the response's ETag."""
+        service.update_customer(customer_id=existing_customer.id, name="First")
+
+        customer, version = service.update_customer_versioned(customer_id=existing_customer.id, name="Second", expected_version=2)
+
+        assert customer.name == "Second"
+        assert version == service.get_customer_version(existing_customer.id) == 3
+
 
 class TestDeleteCustomer:
     """Tests for delete_customer service function."""
@@ -209,3 +438,51 @@ class TestDeleteCustomer:
             service.delete_customer(non_existent_id)
         
         assert "not found" in str(exc_info.value)
+
+
+class TestConcurrentAccess:
+    """Stress tests for service functions called from many threads."""
+
+    def test_concurrent_creates_never_duplicate_emails(self, fresh_repository, frequent_thread_switches):
+        """Only one of many racing creates per email succeeds."""
+        def attempt(i):
+            try:
+                return service.create_customer(
+                    name=f"Racer {i}",
+                    email=f"racer{i % 20}@example.com",
+                    phone="123-456-7890",
+                    address="123 Main St"
+                )
+            except ValueError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            created = [customer for customer in pool.map(attempt, range(400)) if customer is not None]
+
+        stored = service.get_all_customers()
+        assert len(created) == 20
+        assert len(stored) == 20
+        assert len({customer.email for customer in stored}) == 20
+
+    def test_concurrent_updates_are_not_lost(self, existing_customer, frequent_thread_switches):
+        """Updates to different fields of one customer from two threads all land."""
+        def update_phone():
+            for i in range(300):
+                service.update_customer(customer_id=existing_customer.id, phone=f"phone-{i}")
+
+        def update_address():
+            for i in range(300):
+                service.update_customer(customer_id=existing_customer.id, address=f"address-{i}")
+
+        def read_pages():
+            for _ in range(300):
+                service.get_customers_page(limit=10)
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(update_phone), pool.submit(update_address), pool.submit(read_pages)]
+            for future in futures:
+                future.result()
+
+        result = service.get_customer(existing_customer.id)
+        assert result.phone == "phone-299"
+        assert result.address == "address-299"
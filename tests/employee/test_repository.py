@@ -1,14 +1,29 @@
+import asyncio
+import random
+import sqlite3
+import threading
 import uuid
 from decimal import Decimal
 import pytest
 from src.employee.domain import Employee
-from src.employee.repository import EmployeeRepository
+from src.employee import repository as repository_module
+from src.employee.repository import AsyncEmployeeRepository, EmployeeRepository
+from src.employee.sqlite_repository import SqliteEmployeeRepository
+from src.durability import WriteAheadLog
+from src.employee.aggregates import compute_salary_stats
+from src.changes import ChangesExpired
+from src.versions import VersionConflict
 
 
-@pytest.fixture
-def repository():
-    """Create a fresh repository instance for each test."""
-    return EmployeeRepository()
+@pytest.fixture(params=["memory", "sqlite"])
+def repository(request, tmp_path):
+    """Create a fresh repository instance of each backend for each test."""
+    if request.param == "sqlite":
+        repo = SqliteEmployeeRepository(str(tmp_path / "employees.db"))
+    else:
+        repo = EmployeeRepository()
+    yield repo
+    repo.close()
 
 
 @pytest.fixture
@@ -25,8 +40,50 @@ def sample_employee():
     )
 
 
+def recomputed_stats(repository):
+    return compute_salary_stats((employee.department, employee.salary) for employee in repository.get_all())
+
+
+def sorted_by_salary(repository, descending=False):
+    employees = repository.get_all()
+    order = {employee.id: position for position, employee in enumerate(employees)}
+    return sorted(employees, key=lambda e: (e.salary, order[e.id]), reverse=descending)
+
+
+def all_salary_pages(repository, limit, **kwargs):
+    employees, key = repository.get_salary_page(limit, **kwargs)
+    while key is not None:
+        page, key = repository.get_salary_page(limit, after=key, **kwargs)
+        employees += page
+    return employees
+
+
+def apply_random_writes(repository, template, rng, steps):
+    """Apply random adds, department moves, raises and deletes to `repository`."""
+    departments = ["Engineering", "Sales", "Finance"]
+    salaries = [Decimal("50000.00"), Decimal("61000.50"), Decimal("72500"), Decimal("99999.999")]
+    for step in range(steps):
+        stored = repository.get_all()
+        action = rng.choice(["add", "add", "update", "delete"]) if stored else "add"
+        if action == "add":
+            repository.add(template.model_copy(update={
+                "id": uuid.uuid4(),
+                "email": f"employee{step}-{rng.random()}@example.com",
+                "department": rng.choice(departments),
+                "salary": rng.choice(salaries)
+            }))
+        elif action == "update":
+            repository.update(rng.choice(stored).model_copy(update={
+                "department": rng.choice(departments),
+                "salary": rng.choice(salaries)
+            }))
+        else:
+            repository.delete(rng.choice(stored).id)
+        yield
+
+
 class TestEmployeeRepository:
-    """Unit tests for EmployeeRepository."""
+    """Unit tests for EmployeeRepository and SqliteEmployeeRepository."""
 
     def test_add_employee(self, repository, sample_employee):
         """Verify employee is stored correctly."""
@@ -122,6 +179,17 @@ class TestEmployeeRepository:
         assert result is True
         assert repository.get(sample_employee.id) is None
 
+    def test_count_follows_writes(self, repository, sample_employee):
+        """Counts records as they are added, updated and deleted."""
+        other = sample_employee.model_copy(update={"id": uuid.uuid4(), "email": "other@example.com"})
+        repository.add(sample_employee)
+        repository.add(other)
+        repository.update(sample_employee)
+        repository.delete(other.id)
+        repository.delete(other.id)
+
+        assert repository.count() == 1
+
     def test_delete_employee_not_found(self, repository):
         """Returns False for missing ID."""
         non_existent_id = uuid.uuid4()
@@ -155,3 +223,639 @@ class TestEmployeeRepository:
             exclude_id=other_id
         )
         assert result is True
+
+    def test_get_by_email(self, repository, sample_employee):
+        """Retrieve existing employee by email."""
+        repository.add(sample_employee)
+
+        assert repository.get_by_email("john@example.com") == sample_employee
+        assert repository.get_by_email("other@example.com") is None
+
+    def test_email_index_follows_update(self, repository, sample_employee):
+        """Changing the email releases the old one and claims the new one."""
+        repository.add(sample_employee)
+        updated = sample_employee.model_copy(update={"email": "john.new@example.com"})
+
+        repository.update(updated)
+
+        assert repository.exists_by_email("john@example.com") is False
+        assert repository.exists_by_email("john.new@example.com") is True
+        assert repository.get_by_email("john.new@example.com") == updated
+
+    def test_email_index_follows_delete(self, repository, sample_employee):
+        """Deleting a employee frees its email."""
+        repository.add(sample_employee)
+
+        repository.delete(sample_employee.id)
+
+        assert repository.exists_by_email("john@example.com") is False
+        assert repository.get_by_email("john@example.com") is None
+
+    def test_get_page_follows_insertion_order(self, repository, sample_employee):
+        """Pages walk the store in insertion order and skip deleted employees."""
+        employees = [
+            sample_employee.model_copy(update={"id": uuid.uuid4(), "email": f"employee{i}@example.com"})
+            for i in range(5)
+        ]
+        for employee in employees:
+            repository.add(employee)
+        repository.delete(employees[1].id)
+
+        first, position = repository.get_page(2)
+        second, end = repository.get_page(2, after=position)
+
+        assert first == [employees[0], employees[2]]
+        assert second == [employees[3], employees[4]]
+        assert end is None
+
+    def test_get_page_survives_compaction(self, repository, sample_employee):
+        """Positions stay valid after deleted slots are compacted."""
+        employees = [
+            sample_employee.model_copy(update={"id": uuid.uuid4(), "email": f"employee{i}@example.com"})
+            for i in range(6)
+        ]
+        for employee in employees:
+            repository.add(employee)
+        _, position = repository.get_page(3)
+        for employee in employees[:4]:
+            repository.delete(employee.id)
+
+        result, end = repository.get_page(10, after=position)
+
+        assert result == [employees[4], employees[5]]
+        assert end is None
+
+
+    def test_salary_round_trips_exactly(self, repository, sample_employee):
+        """Salaries keep their exact value and precision."""
+        salaries = [Decimal("75000.00"), Decimal("80000"), Decimal("91234.567"), Decimal("-0.50")]
+        employees = [
+            sample_employee.model_copy(update={"id": uuid.uuid4(), "email": f"e{i}@example.com", "salary": salary})
+            for i, salary in enumerate(salaries)
+        ]
+        repository.add_many(employees)
+
+        assert [str(repository.get(employee.id).salary) for employee in employees] == [str(s) for s in salaries]
+
+
+    def test_get_page_filtered(self, repository, sample_employee):
+        """Filters by department, position and both, in insertion order."""
+        staff = [
+            sample_employee.model_copy(update={
+                "id": uuid.uuid4(), "email": f"e{i}@example.com", "department": department, "position": position
+            })
+            for i, (department, position) in enumerate([
+                ("Engineering", "Engineer"), ("Sales", "Manager"), ("Engineering", "Manager"),
+                ("Engineering", "Engineer"), ("Sales", "Engineer"),
+            ])
+        ]
+        repository.add_many(staff)
+
+        engineering, _ = repository.get_page(10, department="Engineering")
+        managers, _ = repository.get_page(10, position="Manager")
+        both, _ = repository.get_page(10, department="Engineering", position="Engineer")
+        first, cursor = repository.get_page(1, department="Engineering")
+        rest, end = repository.get_page(10, after=cursor, department="Engineering")
+
+        assert engineering == [staff[0], staff[2], staff[3]]
+        assert managers == [staff[1], staff[2]]
+        assert both == [staff[0], staff[3]]
+        assert first + rest == engineering
+        assert end is None
+        assert repository.get_page(10, department="Finance") == ([], None)
+
+    def test_filters_follow_updates_and_deletes(self, repository, sample_employee):
+        """Department moves and deletions are reflected in filtered pages."""
+        other = sample_employee.model_copy(update={"id": uuid.uuid4(), "email": "other@example.com"})
+        repository.add_many([sample_employee, other])
+
+        moved = repository.update(sample_employee.model_copy(update={"department": "Finance"}))
+        repository.delete(other.id)
+
+        assert repository.get_page(10, department="Engineering") == ([], None)
+        assert repository.get_page(10, department="Finance") == ([moved], None)
+
+    def test_async_reads_match_sync(self, repository, sample_employee):
+        """The awaitable interface returns what the repository itself does."""
+        repository.add(sample_employee)
+        reads = AsyncEmployeeRepository(repository)
+
+        async def read_all():
+            return await asyncio.gather(
+                reads.get_json(sample_employee.id),
+                reads.get_by_email(sample_employee.email),
+                reads.get_page_json(10, department=sample_employee.department),
+                reads.get_salary_page_json(10, descending=True),
+                reads.salary_stats()
+            )
+
+        assert asyncio.run(read_all()) == [
+            repository.get_json(sample_employee.id),
+            sample_employee,
+            repository.get_page_json(10),
+            repository.get_salary_page_json(10),
+            repository.salary_stats()
+        ]
+
+    def test_conditional_update(self, repository, sample_employee):
+        """An update applies only while the stored employee is at the expected version."""
+        repository.add(sample_employee)
+        raised = repository.update(sample_employee.model_copy(update={"salary": Decimal("90000")}), expected_version=1)
+
+        with pytest.raises(VersionConflict):
+            repository.update(sample_employee, expected_version=1)
+        assert repository.get_versioned(sample_employee.id) == (raised, 2)
+        assert repository.get_version(uuid.uuid4()) is None
+
+    def test_changes_follow_writes(self, repository, sample_employee):
+        """Every write is listed after the sequence read before it, with the employee it left behind."""
+        start = repository.latest_change()
+        repository.add(sample_employee)
+        raised = repository.update(sample_employee.model_copy(update={"salary": Decimal("80000.50")}))
+        repository.delete(sample_employee.id)
+
+        changes = repository.get_changes(start, 10)
+        assert [change.sequence for change in changes] == [start + 1, start + 2, start + 3]
+        assert [(change.operation, change.id, change.version) for change in changes] == [
+            ("create", sample_employee.id, 1),
+            ("update", sample_employee.id, 2),
+            ("delete", sample_employee.id, None)
+        ]
+        assert Employee.model_validate_json(changes[1].body) == raised
+        assert changes[2].body is None
+        assert repository.get_changes(start, 1) == changes[:1]
+        assert repository.get_changes(changes[-1].sequence, 10) == []
+        assert repository.latest_change() == start + 3
+
+    def test_changes_from_an_unknown_sequence_expire(self, repository, sample_employee):
+        """A sequence past the latest one belongs to another log and must be resynced from."""
+        repository.add(sample_employee)
+        with pytest.raises(ChangesExpired):
+            repository.get_changes(repository.latest_change() + 1, 10)
+
+    def test_json_reads_follow_writes(self, repository, sample_employee):
+        """Serialized employees match the models and change with updates and deletes."""
+        other = sample_employee.model_copy(update={
+            "id": uuid.uuid4(), "email": "other@example.com", "salary": Decimal("1E+3")
+        })
+        repository.add_many([sample_employee, other])
+        assert repository.get_json(other.id) == (other.model_dump_json().encode(), 1)
+
+        raised = repository.update(sample_employee.model_copy(update={"salary": Decimal("80000.50")}))
+        repository.delete(other.id)
+
+        assert repository.get_json(sample_employee.id) == (raised.model_dump_json().encode(), 2)
+        assert repository.get_json(other.id) is None
+        assert repository.get_page_json(10, department="Engineering") == ([raised.model_dump_json().encode()], None)
+        assert repository.get_salary_page_json(10, descending=True) == ([raised.model_dump_json().encode()], None)
+
+    def test_get_salary_page(self, repository, sample_employee):
+        """Orders by salary with ties in insertion order, within inclusive bounds."""
+        staff = [
+            sample_employee.model_copy(update={"id": uuid.uuid4(), "email": f"e{i}@example.com", "salary": Decimal(salary)})
+            for i, salary in enumerate(["70000.00", "50000.00", "90000.5", "70000.00", "60000.00"])
+        ]
+        repository.add_many(staff)
+
+        lowest, key = repository.get_salary_page(2)
+        rest, end = repository.get_salary_page(10, after=key)
+        top, _ = repository.get_salary_page(2, descending=True)
+        ranged, _ = repository.get_salary_page(10, min_salary=Decimal("60000"), max_salary=Decimal("70000.00"))
+        upper, _ = repository.get_salary_page(10, descending=True, min_salary=Decimal("65000"))
+
+        assert lowest + rest == [staff[1], staff[4], staff[0], staff[3], staff[2]]
+        assert end is None
+        assert top == [staff[2], staff[3]]
+        assert ranged == [staff[4], staff[0], staff[3]]
+        assert upper == [staff[2], staff[3], staff[0]]
+        assert repository.get_salary_page(10, min_salary=Decimal("100000")) == ([], None)
+
+    def test_get_page_salary_range(self, repository, sample_employee):
+        """Salary bounds combine with the other filters in insertion order."""
+        staff = [
+            sample_employee.model_copy(update={
+                "id": uuid.uuid4(), "email": f"e{i}@example.com", "department": department, "salary": Decimal(salary)
+            })
+            for i, (department, salary) in enumerate([
+                ("Engineering", "90000.00"), ("Sales", "40000.00"), ("Engineering", "40000.00"), ("Engineering", "65000"),
+            ])
+        ]
+        repository.add_many(staff)
+
+        assert repository.get_page(10, min_salary=Decimal("50000")) == ([staff[0], staff[3]], None)
+        assert repository.get_page(10, max_salary=Decimal("40000.00")) == ([staff[1], staff[2]], None)
+        assert repository.get_page(10, department="Engineering", max_salary=Decimal("65000")) == (
+            [staff[2], staff[3]], None
+        )
+        first, cursor = repository.get_salary_page(1, department="Engineering")
+        assert first == [staff[2]]
+        assert repository.get_salary_page(10, after=cursor, department="Engineering") == ([staff[3], staff[0]], None)
+
+    def test_salary_pages_match_sort(self, repository, sample_employee):
+        """Salary-ordered pages equal a full sort after every write."""
+        rng = random.Random(13)
+
+        for step, _ in enumerate(apply_random_writes(repository, sample_employee, rng, steps=120)):
+            if step % 3 == 0:
+                assert all_salary_pages(repository, 7) == sorted_by_salary(repository)
+                assert all_salary_pages(repository, 7, descending=True) == sorted_by_salary(repository, True)
+
+    def test_get_page_salary_range_matches_filtered_scan(self, repository, sample_employee):
+        """Bounded pages, narrow or wide, equal filtering the whole store after every write."""
+        rng = random.Random(14)
+
+        def all_pages(limit, **kwargs):
+            employees, after = repository.get_page(limit, **kwargs)
+            while after is not None:
+                page, after = repository.get_page(limit, after=after, **kwargs)
+                employees += page
+            return employees
+
+        for step, _ in enumerate(apply_random_writes(repository, sample_employee, rng, steps=120)):
+            if step % 3 == 0:
+                for low, high, department in (
+                    ("61000.50", "61000.50", None), ("50000", "72500", None), ("72500", None, "Sales"),
+                ):
+                    bounds = {"min_salary": Decimal(low), "max_salary": Decimal(high) if high else None}
+                    expected = [
+                        employee for employee in repository.get_all()
+                        if Decimal(low) <= employee.salary <= Decimal(high or "Infinity")
+                        and department in (None, employee.department)
+                    ]
+                    assert all_pages(2, department=department, **bounds) == expected
+
+    def test_salary_stats(self, repository, sample_employee):
+        """Aggregates headcount, total, mean, min and max per department."""
+        repository.add_many([
+            sample_employee.model_copy(update={
+                "id": uuid.uuid4(), "email": f"e{i}@example.com", "department": department, "salary": Decimal(salary)
+            })
+            for i, (department, salary) in enumerate([
+                ("Engineering", "70000.00"), ("Engineering", "80000.00"), ("Engineering", "90000.01"),
+                ("Sales", "50000.00"),
+            ])
+        ])
+
+        engineering, sales = repository.salary_stats()
+
+        assert engineering.department == "Engineering"
+        assert engineering.headcount == 3
+        assert engineering.total_salary == Decimal("240000.01")
+        assert engineering.mean_salary == Decimal("80000.00")
+        assert engineering.min_salary == Decimal("70000.00")
+        assert engineering.max_salary == Decimal("90000.01")
+        assert (sales.department, sales.headcount) == ("Sales", 1)
+
+    def test_salary_stats_match_recomputation(self, repository, sample_employee):
+        """Incremental aggregates equal a full recomputation after every write."""
+        rng = random.Random(12)
+
+        for _ in apply_random_writes(repository, sample_employee, rng, steps=150):
+            assert repository.salary_stats() == recomputed_stats(repository)
+
+
+@pytest.fixture
+def reopen(tmp_path):
+    """Open durable repositories over one directory, closing them afterwards."""
+    opened = []
+
+    def open_repository():
+        repo = EmployeeRepository(WriteAheadLog(str(tmp_path), "employees"))
+        opened.append(repo)
+        return repo
+
+    yield open_repository
+    for repo in opened:
+        repo.close()
+
+
+class TestChangeRetention:
+    """Unit tests for the bounded change log of EmployeeRepository."""
+
+    def test_changes_older_than_retention_expire(self, sample_employee):
+        """Once a write falls out of the log, reading from before it asks for a resync."""
+        repository = EmployeeRepository(change_retention=2)
+        start = repository.latest_change()
+        for index in range(3):
+            repository.add(sample_employee.model_copy(update={"id": uuid.uuid4(), "email": f"{index}@example.com"}))
+        with pytest.raises(ChangesExpired):
+            repository.get_changes(start, 10)
+        assert [change.sequence for change in repository.get_changes(start + 1, 10)] == [start + 2, start + 3]
+
+    def test_reading_changes_caches_only_live_records(self, sample_employee):
+        """Encodings of deleted records and earlier versions stay out of the JSON cache."""
+        repository = EmployeeRepository()
+        start = repository.latest_change()
+        repository.add(sample_employee)
+        repository.update(sample_employee.model_copy(update={"name": "Renamed"}))
+        for index in range(10):
+            other = sample_employee.model_copy(update={"id": uuid.uuid4(), "email": f"{index}@example.com"})
+            repository.add(other)
+            repository.delete(other.id)
+
+        changes = repository.get_changes(start, 100)
+
+        assert b"Renamed" not in changes[0].body
+        assert len(repository._json_cache) <= repository.count()
+        assert b"Renamed" in repository.get_json(sample_employee.id)[0]
+
+
+class TestJsonCache:
+    """Unit tests for the JSON cache of EmployeeRepository under concurrent writes."""
+
+    def test_delete_during_page_encoding(self, sample_employee, monkeypatch):
+        """A record deleted while a page encodes it leaves no entry behind."""
+        repository = EmployeeRepository()
+        repository.add(sample_employee)
+        to_json = repository_module._CODEC.to_json
+
+        def delete_while_encoding(row):
+            body = to_json(row)
+            repository.delete(sample_employee.id)
+            return body
+
+        monkeypatch.setattr(repository_module._CODEC, "to_json", delete_while_encoding)
+        bodies, _ = repository.get_page_json(10)
+
+        assert len(bodies) == 1
+        assert repository._json_cache == {}
+
+    def test_concurrent_deletes_and_pages(self, sample_employee):
+        """Entries only ever remain for live records while pages race deletes."""
+        repository = EmployeeRepository()
+        employees = [
+            sample_employee.model_copy(update={"id": uuid.uuid4(), "email": f"{index}@example.com"})
+            for index in range(200)
+        ]
+        repository.add_many(employees)
+        done = threading.Event()
+
+        def read_pages():
+            while not done.is_set():
+                repository.get_page_json(50)
+
+        readers = [threading.Thread(target=read_pages) for _ in range(2)]
+        for reader in readers:
+            reader.start()
+        for employee in employees[:150]:
+            repository.delete(employee.id)
+        done.set()
+        for reader in readers:
+            reader.join()
+
+        live = {employee.id.bytes for employee in employees[150:]}
+        assert set(repository._json_cache) <= live
+
+
+class TestDurableEmployeeRepository:
+    """Unit tests for EmployeeRepository with a write-ahead log."""
+
+    def test_writes_survive_restart(self, reopen, sample_employee):
+        """Adds, updates and deletes are replayed on startup."""
+        repository = reopen()
+        other = sample_employee.model_copy(update={"id": uuid.uuid4(), "email": "other@example.com"})
+        repository.add(sample_employee)
+        repository.add(other)
+        repository.update(sample_employee.model_copy(update={"name": "John Updated"}))
+        repository.delete(other.id)
+        repository.close()
+
+        restored = reopen()
+
+        assert restored.get(sample_employee.id).name == "John Updated"
+        assert restored.get(other.id) is None
+        assert restored.exists_by_email("other@example.com") is False
+        assert restored.count() == 1
+
+    def test_compaction_keeps_state(self, reopen, sample_employee, tmp_path):
+        """State is rebuilt from the snapshot plus writes made after it."""
+        repository = reopen()
+        repository.add(sample_employee)
+        repository.compact()
+        later = sample_employee.model_copy(update={"id": uuid.uuid4(), "email": "later@example.com"})
+        repository.add(later)
+        repository.close()
+
+        restored = reopen()
+
+        assert restored.get_all() == [sample_employee, later]
+        assert not (tmp_path / "employees.log.old").exists()
+
+    def test_interrupted_compaction_loses_nothing(self, reopen, sample_employee):
+        """A rotated log without a new snapshot is still replayed."""
+        repository = reopen()
+        repository.add(sample_employee)
+        repository._wal.rotate()
+        repository.delete(sample_employee.id)
+        repository.add(sample_employee.model_copy(update={"name": "Back Again"}))
+        repository.close()
+
+        restored = reopen()
+
+        assert restored.get(sample_employee.id).name == "Back Again"
+
+    def test_torn_final_entry_is_ignored(self, reopen, sample_employee, tmp_path):
+        """A partially written last line from a crash is skipped."""
+        repository = reopen()
+        repository.add(sample_employee)
+        repository.close()
+        with open(tmp_path / "employees.log", "a") as log:
+            log.write('P\t{"id": "trunc')
+
+        restored = reopen()
+        later = sample_employee.model_copy(update={"id": uuid.uuid4(), "email": "later@example.com"})
+        restored.add(later)
+        restored.close()
+
+        assert reopen().get_all() == [sample_employee, later]
+
+    def test_snapshot_serves_reads_without_loading(self, reopen, sample_employee):
+        """Employees in the binary snapshot are found by id and email."""
+        repository = reopen()
+        others = [
+            sample_employee.model_copy(update={"id": uuid.uuid4(), "email": f"employee{i}@example.com"})
+            for i in range(3)
+        ]
+        repository.add_many([sample_employee, *others])
+        repository.compact()
+        repository.close()
+
+        restored = reopen()
+
+        assert restored._storage == {}
+        assert restored.get(others[1].id) == others[1]
+        assert restored.get_by_email("john@example.com") == sample_employee
+        assert restored.exists_by_email("employee2@example.com", exclude_id=others[2].id) is False
+        assert restored.get_all() == [sample_employee, *others]
+
+    def test_warm_up_builds_indexes_off_the_request_path(self, reopen, sample_employee):
+        """Indexes dropped by a snapshot restore are built by warm_up, or else in a worker thread."""
+        repository = reopen()
+        repository.add(sample_employee)
+        repository.compact()
+        repository.close()
+        restored = reopen()
+        assert restored._salary_index is None
+
+        restored.warm_up()
+
+        assert restored._salary_index is not None
+        threads = []
+        build = restored._build_salary_structures
+
+        def recording_build():
+            threads.append(threading.get_ident())
+            build()
+
+        restored._build_salary_structures = recording_build
+        asyncio.run(AsyncEmployeeRepository(restored).salary_stats())
+        assert threads and threads[0] != threading.get_ident()
+
+    def test_reads_block_while_a_writer_holds_the_lock(self, sample_employee):
+        """Async reads leave the event loop only while they would wait for a writer."""
+        repository = EmployeeRepository()
+        assert repository.blocking is False
+        with repository.transaction():
+            assert repository.blocking is True
+        assert repository.blocking is False
+
+    def test_writes_over_snapshot(self, reopen, sample_employee):
+        """Updates and deletes of snapshot employees keep their order and survive another compaction."""
+        repository = reopen()
+        others = [
+            sample_employee.model_copy(update={"id": uuid.uuid4(), "email": f"employee{i}@example.com"})
+            for i in range(3)
+        ]
+        repository.add_many([sample_employee, *others])
+        repository.compact()
+        repository.close()
+        restored = reopen()
+        moved = sample_employee.model_copy(update={"email": "moved@example.com"})
+        added = sample_employee.model_copy(update={"id": uuid.uuid4(), "email": "added@example.com"})
+
+        restored.update(moved)
+        restored.delete(others[0].id)
+        restored.add(added)
+
+        expected = [moved, others[1], others[2], added]
+        assert restored.get_all() == expected
+        assert restored.get_by_email("john@example.com") is None
+        assert restored.get(others[0].id) is None
+        assert restored.get_page(2) == (expected[:2], 2)
+        restored.compact()
+        restored.close()
+        assert reopen().get_all() == expected
+
+    def test_scans_read_the_version_they_started_on(self, reopen, sample_employee):
+        """Batches keep returning the store as of the call while writes land, without blocking them."""
+        rng = random.Random(9)
+        repository = reopen()
+        for _ in apply_random_writes(repository, sample_employee, rng, steps=40):
+            pass
+        repository.compact()
+        for _ in apply_random_writes(repository, sample_employee, rng, steps=40):
+            pass
+        before = repository.get_all()
+        batches = repository.iter_batches(3)
+
+        scanned = next(batches)
+        for _ in apply_random_writes(repository, sample_employee, rng, steps=40):
+            scanned += next(batches, [])
+        scanned += [employee for batch in batches for employee in batch]
+
+        assert scanned == before
+        assert repository.get_all() != before
+
+    def test_filters_over_snapshot(self, reopen, sample_employee):
+        """Filtered pages merge snapshot rows with later writes."""
+        repository = reopen()
+        staff = [
+            sample_employee.model_copy(update={
+                "id": uuid.uuid4(), "email": f"e{i}@example.com", "department": department
+            })
+            for i, department in enumerate(["Engineering", "Sales", "Engineering", "Engineering"])
+        ]
+        repository.add_many(staff)
+        repository.compact()
+        repository.close()
+        restored = reopen()
+        moved = staff[2].model_copy(update={"department": "Sales"})
+        added = sample_employee.model_copy(update={"id": uuid.uuid4(), "email": "new@example.com"})
+
+        restored.update(moved)
+        restored.add(added)
+
+        assert restored.get_page(10, department="Engineering") == ([staff[0], staff[3], added], None)
+        assert restored.get_page(10, department="Sales") == ([staff[1], moved], None)
+        assert restored.get_page(1, after=0, department="Engineering") == ([staff[3]], 3)
+
+    def test_salary_pages_over_snapshot(self, reopen, sample_employee):
+        """The salary index built lazily over a snapshot follows later writes."""
+        rng = random.Random(8)
+        repository = reopen()
+        for _ in apply_random_writes(repository, sample_employee, rng, steps=60):
+            pass
+        repository.compact()
+        repository.close()
+        restored = reopen()
+
+        assert all_salary_pages(restored, 5) == sorted_by_salary(restored)
+        for _ in apply_random_writes(restored, sample_employee, rng, steps=60):
+            pass
+        assert all_salary_pages(restored, 5, descending=True) == sorted_by_salary(restored, True)
+        assert all_salary_pages(restored, 5, min_salary=Decimal("61000.50"), max_salary=Decimal("72500")) == [
+            employee for employee in sorted_by_salary(restored)
+            if Decimal("61000.50") <= employee.salary <= Decimal("72500")
+        ]
+
+    def test_salary_stats_over_snapshot(self, reopen, sample_employee):
+        """Aggregates built lazily over a snapshot stay equal to a recomputation."""
+        rng = random.Random(7)
+        repository = reopen()
+        for _ in apply_random_writes(repository, sample_employee, rng, steps=60):
+            pass
+        repository.compact()
+        repository.close()
+        restored = reopen()
+        writes = apply_random_writes(restored, sample_employee, rng, steps=60)
+
+        for step, _ in enumerate(writes):
+            if step % 2:
+                assert restored.salary_stats() == recomputed_stats(restored)
+        assert restored.salary_stats() == recomputed_stats(restored)
+
+
+class TestSqliteSalaryStats:
+    """Unit tests for the per-department totals of SqliteEmployeeRepository."""
+
+    def test_stats_follow_writes_of_every_instance(self, tmp_path, sample_employee):
+        """Totals kept by triggers include writes made through another instance on the database."""
+        path = str(tmp_path / "employees.db")
+        first, second = SqliteEmployeeRepository(path), SqliteEmployeeRepository(path)
+        try:
+            for _ in apply_random_writes(first, sample_employee, random.Random(5), steps=60):
+                assert second.salary_stats() == recomputed_stats(second)
+        finally:
+            first.close()
+            second.close()
+
+    def test_totals_are_counted_for_older_databases(self, tmp_path, sample_employee):
+        """A database created before the totals existed gets them counted when opened."""
+        path = str(tmp_path / "employees.db")
+        repository = SqliteEmployeeRepository(path)
+        for _ in apply_random_writes(repository, sample_employee, random.Random(6), steps=40):
+            pass
+        expected = repository.salary_stats()
+        repository.close()
+        connection = sqlite3.connect(path)
+        with connection:
+            for trigger in ("insert", "update", "delete"):
+                connection.execute(f"DROP TRIGGER employees_departments_{trigger}")
+            connection.execute("DROP TABLE employees_departments")
+        connection.close()
+
+        reopened = SqliteEmployeeRepository(path)
+        try:
+            assert reopened.salary_stats() == expected == recomputed_stats(reopened)
+        finally:
+            reopened.close()
@@ -1,17 +1,36 @@
+import asyncio
+import sys
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 import pytest
 from src.employee.domain import Employee
 from src.employee.repository import EmployeeRepository
+from src.employee.sqlite_repository import SqliteEmployeeRepository
 from src.employee import service
+from src.changes import ChangesExpired
+from src.versions import VersionConflict
 
 
-@pytest.fixture
-def fresh_repository(monkeypatch):
-    """Replace the module-level repository with a fresh instance for test isolation."""
-    repo = EmployeeRepository()
+@pytest.fixture(params=["memory", "sqlite"])
+def fresh_repository(request, monkeypatch, tmp_path):
+    """Replace the module-level repository with a fresh instance of each backend for test isolation."""
+    if request.param == "sqlite":
+        repo = SqliteEmployeeRepository(str(tmp_path / "employees.db"))
+    else:
+        repo = EmployeeRepository()
     monkeypatch.setattr(service, "_repository", repo)
-    return repo
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def frequent_thread_switches():
+    """Make the interpreter switch threads as often as possible to surface races."""
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(interval)
 
 
 @pytest.fixture
@@ -69,6 +88,47 @@ class TestCreateEmployee:
         assert "already exists" in str(exc_info.value)
 
 
+def bulk_entry(name, email):
+    return {"name": name, "email": email, "phone": "123-456-7890", "department": "Engineering", "position": "Engineer", "salary": Decimal("70000.00")}
+
+
+class TestCreateEmployeesBulk:
+    """Tests for create_employees_bulk service function."""
+
+    def test_create_employees_bulk(self, fresh_repository):
+        """Creates every employee of a valid batch."""
+        created, errors = service.create_employees_bulk([
+            bulk_entry("One", "one@example.com"),
+            bulk_entry("Two", "two@example.com"),
+        ])
+
+        assert errors == {}
+        assert [employee.name for employee in created] == ["One", "Two"]
+        assert all(fresh_repository.get(employee.id) == employee for employee in created)
+
+    def test_create_employees_bulk_duplicate_in_batch_is_atomic(self, fresh_repository):
+        """Rejects the whole batch when two entries share an email."""
+        created, errors = service.create_employees_bulk([
+            bulk_entry("One", "one@example.com"),
+            bulk_entry("Copy", "one@example.com"),
+        ])
+
+        assert created == []
+        assert "already exists" in errors[1]
+        assert fresh_repository.get_all() == []
+
+    def test_create_employees_bulk_partial(self, existing_employee, fresh_repository):
+        """Non-atomic batches store valid entries and report the rest."""
+        created, errors = service.create_employees_bulk([
+            bulk_entry("Clash", existing_employee.email),
+            bulk_entry("New", "new@example.com"),
+        ], atomic=False)
+
+        assert list(errors) == [0]
+        assert [employee.email for employee in created] == ["new@example.com"]
+        assert fresh_repository.exists_by_email("new@example.com") is True
+
+
 class TestGetEmployee:
     """Tests for get_employee service function."""
 
@@ -89,6 +149,47 @@ class TestGetEmployee:
         assert "not found" in str(exc_info.value)
 
 
+class TestGetEmployeeJson:
+    """Tests for get_employee_json service function."""
+
+    def test_get_employee_json(self, existing_employee):
+        """Returns the employee serialized to JSON, with its version."""
+        assert service.get_employee_json(existing_employee.id) == (existing_employee.model_dump_json().encode(), 1)
+
+    def test_get_employee_json_async(self, existing_employee):
+        """The async variant returns the same body and version."""
+        assert asyncio.run(service.get_employee_json_async(existing_employee.id)) == service.get_employee_json(existing_employee.id)
+
+        with pytest.raises(ValueError) as exc_info:
+            asyncio.run(service.get_employee_json_async(uuid.uuid4()))
+
+        assert "not found" in str(exc_info.value)
+
+    def test_get_employee_json_not_found(self, fresh_repository):
+        """Raises ValueError for missing employee."""
+        with pytest.raises(ValueError) as exc_info:
+            service.get_employee_json(uuid.uuid4())
+
+        assert "not found" in str(exc_info.value)
+
+
+class TestGetEmployeeByEmail:
+    """Tests for get_employee_by_email service function."""
+
+    def test_get_employee_by_email(self, existing_employee):
+        """Retrieves employee by email."""
+        result = service.get_employee_by_email("john@example.com")
+
+        assert result == existing_employee
+
+    def test_get_employee_by_email_not_found(self, fresh_repository):
+        """Raises ValueError for unknown email."""
+        with pytest.raises(ValueError) as exc_info:
+            service.get_employee_by_email("nobody@example.com")
+
+        assert "not found" in str(exc_info.value)
+
+
 class TestGetAllEmployees:
     """Tests for get_all_employees service function."""
 
@@ -123,6 +224,147 @@ class TestGetAllEmployees:
         
         assert result == []
 
+    def test_count_employees(self, existing_employee):
+        """Counts the stored employees."""
+        assert service.count_employees() == 1
+
+
+class TestGetEmployeesPage:
+    """Tests for get_employees_page service function."""
+
+    def test_get_employees_page(self, existing_employee, fresh_repository):
+        """Cursor from one page resumes at the next."""
+        second = existing_employee.model_copy(update={"id": uuid.uuid4(), "email": "second@example.com"})
+        fresh_repository.add(second)
+
+        first_page, cursor = service.get_employees_page(limit=1)
+        second_page, end = service.get_employees_page(limit=1, cursor=cursor)
+
+        assert first_page == [existing_employee]
+        assert second_page == [second]
+        assert end is None
+
+    def test_get_employees_page_filtered(self, existing_employee, fresh_repository):
+        """Only employees matching the filters are returned."""
+        other = existing_employee.model_copy(update={
+            "id": uuid.uuid4(), "email": "second@example.com", "department": "Sales"
+        })
+        fresh_repository.add(other)
+
+        result, cursor = service.get_employees_page(limit=10, department="Sales")
+
+        assert result == [other]
+        assert cursor is None
+
+    def test_get_employees_page_by_salary(self, existing_employee, fresh_repository):
+        """Orders by salary in either direction and resumes from the cursor."""
+        richer = existing_employee.model_copy(update={
+            "id": uuid.uuid4(), "email": "second@example.com", "salary": Decimal("99000.00")
+        })
+        fresh_repository.add(richer)
+
+        top, cursor = service.get_employees_page(limit=1, order_by="-salary")
+        rest, end = service.get_employees_page(limit=1, cursor=cursor, order_by="-salary")
+        ranged, _ = service.get_employees_page(limit=10, min_salary=Decimal("80000"), order_by="salary")
+
+        assert top == [richer]
+        assert rest == [existing_employee]
+        assert end is None
+        assert ranged == [richer]
+
+    def test_get_employees_page_cursor_from_other_order(self, existing_employee, fresh_repository):
+        """A cursor is rejected by an ordering other than the one that produced it."""
+        fresh_repository.add(existing_employee.model_copy(update={"id": uuid.uuid4(), "email": "second@example.com"}))
+        _, cursor = service.get_employees_page(limit=1, order_by="salary")
+
+        with pytest.raises(ValueError) as exc_info:
+            service.get_employees_page(limit=1, cursor=cursor)
+
+        assert "Invalid cursor" in str(exc_info.value)
+
+    def test_get_employees_page_invalid_cursor(self, fresh_repository):
+        """Raises ValueError for a malformed cursor."""
+        with pytest.raises(ValueError) as exc_info:
+            service.get_employees_page(limit=10, cursor="not-a-cursor")
+
+        assert "Invalid cursor" in str(exc_info.value)
+
+
+class TestIterEmployeeBatches:
+    """Tests for iter_employee_batches service function."""
+
+    def test_iter_employee_batches(self, existing_employee, fresh_repository):
+        """Yields every employee in bounded batches."""
+        others = [
+            existing_employee.model_copy(update={"id": uuid.uuid4(), "email": f"other{i}@example.com"})
+            for i in range(2)
+        ]
+        for other in others:
+            fresh_repository.add(other)
+
+        batches = list(service.iter_employee_batches(batch_size=2))
+
+        assert batches == [[existing_employee, others[0]], [others[1]]]
+
+    def test_iter_employee_batches_empty(self, fresh_repository):
+        """Yields nothing when no employees exist."""
+        assert list(service.iter_employee_batches(batch_size=2)) == []
+
+
+class TestGetSalaryStats:
+    """Tests for get_salary_stats service function."""
+
+    def test_get_salary_stats(self, existing_employee):
+        """Reports the department of the existing employee."""
+        (stats,) = service.get_salary_stats()
+
+        assert stats.department == "Engineering"
+        assert stats.headcount == 1
+        assert stats.mean_salary == Decimal("75000.00")
+
+    def test_get_salary_stats_empty(self, fresh_repository):
+        """Returns no departments when no employees exist."""
+        assert service.get_salary_stats() == []
+
+
+class TestGetEmployeeChanges:
+    """Tests for get_employee_changes and stream_employee_changes service functions."""
+
+    def test_get_employee_changes(self, fresh_repository):
+        """Starting from the latest sequence, lists the writes made since and where to resume."""
+        changes, since = service.get_employee_changes(None, 10)
+        assert changes == []
+
+        created = service.create_employee(name="Jane Doe", email="jane@example.com", phone="098-765-4321", department="Sales", position="Rep", salary=Decimal("50000"))
+        service.delete_employee(created.id)
+        changes, next_since = service.get_employee_changes(since, 10)
+        assert [(change.operation, change.id) for change in changes] == [("create", created.id), ("delete", created.id)]
+        assert next_since == changes[-1].sequence
+        assert service.get_employee_changes(next_since, 10) == ([], next_since)
+        assert asyncio.run(service.get_employee_changes_async(since, 10)) == (changes, next_since)
+
+    def test_get_employee_changes_expired(self, fresh_repository):
+        """A sequence the change log does not know asks for a full resync."""
+        _, since = service.get_employee_changes(None, 10)
+        with pytest.raises(ChangesExpired):
+            service.get_employee_changes(since + 1, 10)
+
+    def test_stream_employee_changes(self, fresh_repository):
+        """Each change is sent as an event whose id is its sequence."""
+        _, since = service.get_employee_changes(None, 10)
+        created = service.create_employee(name="Jane Doe", email="jane@example.com", phone="098-765-4321", department="Sales", position="Rep", salary=Decimal("50000"))
+
+        async def first_event():
+            events = service.stream_employee_changes(since)
+            try:
+                return await anext(events)
+            finally:
+                await events.aclose()
+
+        event = asyncio.run(first_event())
+        assert event.startswith(b"id: %d\nevent: create\ndata: " % (since + 1))
+        assert str(created.id).encode() in event
+
 
 class TestUpdateEmployee:
     """Tests for update_employee service function."""
@@ -213,6 +455,25 @@ class TestUpdateEmployee:
         assert result.name == "New Name"
         assert result.email == existing_employee.email
 
+    def test_update_employee_expected_version(self, existing_employee):
+        """Applies only while the employee is at the expected version."""
+        service.update_employee(employee_id=existing_employee.id, name="First", expected_version=1)
+
+        with pytest.raises(VersionConflict):
+            service.update_employee(employee_id=existing_employee.id, name="Second", expected_version=1)
+
+        assert service.get_employee(existing_employee.id).name == "First"
+        assert service.get_employee_version(existing_employee.id) == 2
+
+    def test_update_employee_versioned_returns_new_version(self, existing_employee):
+        """Returns the version the write stored, for the response's ETag."""
+        service.update_employee(employee_id=existing_employee.id, name="First")
+
+        employee, version = service.update_employee_versioned(employee_id=existing_employee.id, name="Second", expected_version=2)
+
+        assert employee.name == "Second"
+        assert version == service.get_employee_version(existing_employee.id) == 3
+
 
 class TestDeleteEmployee:
     """Tests for delete_employee service function."""
@@ -232,3 +493,53 @@ class TestDeleteEmployee:
             service.delete_employee(non_existent_id)
         
         assert "not found" in str(exc_info.value)
+
+
+class TestConcurrentAccess:
+    """Stress tests for service functions called from many threads."""
+
+    def test_concurrent_creates_never_duplicate_emails(self, fresh_repository, frequent_thread_switches):
+        """Only one of many racing creates per email succeeds."""
+        def attempt(i):
+            try:
+                return service.create_employee(
+                    name=f"Racer {i}",
+                    email=f"racer{i % 20}@example.com",
+                    phone="123-456-7890",
+                    department="Engineering",
+                    position="Engineer",
+                    salary=Decimal("70000.00")
+                )
+            except ValueError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            created = [employee for employee in pool.map(attempt, range(400)) if employee is not None]
+
+        stored = service.get_all_employees()
+        assert len(created) == 20
+        assert len(stored) == 20
+        assert len({employee.email for employee in stored}) == 20
+
+    def test_concurrent_updates_are_not_lost(self, existing_employee, frequent_thread_switches):
+        """Updates to different fields of one employee from two threads all land."""
+        def update_phone():
+            for i in range(300):
+                service.update_employee(employee_id=existing_employee.id, phone=f"phone-{i}")
+
+        def update_department():
+            for i in range(300):
+                service.update_employee(employee_id=existing_employee.id, department=f"department-{i}")
+
+        def read_pages():
+            for _ in range(300):
+                service.get_employees_page(limit=10)
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(update_phone), pool.submit(update_department), pool.submit(read_pages)]
+            for future in futures:
+                future.result()
+
+        result = service.get_employee(existing_employee.id)
+        assert result.phone == "phone-299"
+        assert result.department == "department-299"
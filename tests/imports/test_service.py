@@ -0,0 +1,129 @@
+import uuid
+import pytest
+from src.customer.api import CreateCustomerRequest
+from src.customer.repository import CustomerRepository
+from src.customer import service as customer_service
+from src.imports.repository import ImportJobRepository
+from src.imports.sqlite_repository import SqliteImportJobRepository
+from src.imports import service
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def fresh_repository(request, monkeypatch, tmp_path):
+    """Replace the module-level repositories with fresh instances of each backend for test isolation."""
+    if request.param == "sqlite":
+        repo = SqliteImportJobRepository(str(tmp_path / "imports.db"))
+    else:
+        repo = ImportJobRepository()
+    monkeypatch.setattr(service, "_repository", repo)
+    monkeypatch.setattr(customer_service, "_repository", CustomerRepository())
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def write_upload(tmp_path):
+    """Write upload content to a temporary file and return its path."""
+    def write(content):
+        path = tmp_path / f"upload-{uuid.uuid4()}"
+        path.write_text(content)
+        return str(path)
+    return write
+
+
+def customer_csv(rows):
+    lines = ["name,email,phone,address"]
+    lines += [f"Customer {i},customer{i}@example.com,123-456-7890,{i} Main St" for i in range(rows)]
+    return "\n".join(lines) + "\n"
+
+
+class TestCreateImportJob:
+    """Tests for create_import_job service function."""
+
+    def test_create_import_job(self, fresh_repository):
+        """Creates a pending job."""
+        job = service.create_import_job("customers", "csv")
+
+        assert job.status == "pending"
+        assert fresh_repository.get(job.id) == job
+
+    def test_create_import_job_unsupported_format(self, fresh_repository):
+        """Raises ValueError for unknown formats."""
+        with pytest.raises(ValueError) as exc_info:
+            service.create_import_job("customers", "xml")
+
+        assert "Unsupported" in str(exc_info.value)
+
+
+class TestGetImportJob:
+    """Tests for get_import_job service function."""
+
+    def test_get_import_job_not_found(self, fresh_repository):
+        """Raises ValueError for missing job."""
+        with pytest.raises(ValueError) as exc_info:
+            service.get_import_job(uuid.uuid4())
+
+        assert "not found" in str(exc_info.value)
+
+
+class TestRunImport:
+    """Tests for run_import service function."""
+
+    def test_run_import_csv_in_chunks(self, fresh_repository, write_upload):
+        """Imports every valid CSV row across several chunks."""
+        job = service.create_import_job("customers", "csv")
+        path = write_upload(customer_csv(25))
+
+        result = service.run_import(
+            job.id, path, CreateCustomerRequest, customer_service.create_customers_bulk, chunk_size=10
+        )
+
+        assert result.status == "completed"
+        assert result.rows_processed == 25
+        assert result.rows_rejected == 0
+        assert len(customer_service.get_all_customers()) == 25
+        assert result.finished_at is not None
+        assert fresh_repository.get(job.id) == result
+
+    def test_run_import_rejects_invalid_rows(self, fresh_repository, write_upload):
+        """Counts rows failing validation or email uniqueness as rejected."""
+        job = service.create_import_job("customers", "ndjson")
+        path = write_upload(
+            '{"name": "A", "email": "a@example.com", "phone": "1", "address": "x"}\n'
+            '{"name": "B", "email": "not-an-email", "phone": "1", "address": "x"}\n'
+            "not json\n"
+            '{"name": "C", "email": "a@example.com", "phone": "1", "address": "x"}\n'
+        )
+
+        result = service.run_import(
+            job.id, path, CreateCustomerRequest, customer_service.create_customers_bulk
+        )
+
+        assert result.rows_processed == 4
+        assert result.rows_rejected == 3
+        assert [error.split(":")[0] for error in result.errors] == ["Row 2", "Row 3", "Row 4"]
+        assert len(customer_service.get_all_customers()) == 1
+
+    def test_run_import_removes_upload(self, fresh_repository, write_upload):
+        """Deletes the spooled upload when done."""
+        job = service.create_import_job("customers", "csv")
+        path = write_upload(customer_csv(1))
+
+        service.run_import(job.id, path, CreateCustomerRequest, customer_service.create_customers_bulk)
+
+        with pytest.raises(FileNotFoundError):
+            open(path)
+
+    def test_run_import_fails_job_when_store_errors(self, fresh_repository, write_upload):
+        """Any error while importing marks the job failed instead of leaving it running."""
+        job = service.create_import_job("customers", "csv")
+        path = write_upload(customer_csv(2))
+
+        def failing_bulk(entries, atomic=True):
+            raise RuntimeError("database is locked")
+
+        result = service.run_import(job.id, path, CreateCustomerRequest, failing_bulk)
+
+        assert result.status == "failed"
+        assert result.errors == ["database is locked"]
+        assert service.get_import_job(job.id).status == "failed"
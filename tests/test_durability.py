@@ -0,0 +1,33 @@
+import threading
+from src.durability import PeriodicCompactor
+
+
+class FlakyRepository:
+    """Fails its first compaction, then records the later ones."""
+
+    def __init__(self):
+        self.attempts = 0
+        self.compacted = threading.Event()
+
+    def compact(self):
+        self.attempts += 1
+        if self.attempts == 1:
+            raise OSError(28, "No space left on device")
+        self.compacted.set()
+
+
+class TestPeriodicCompactor:
+    """Tests for PeriodicCompactor."""
+
+    def test_keeps_compacting_after_a_failure(self, caplog):
+        """A failed compaction is logged and retried on the next tick."""
+        repository = FlakyRepository()
+        compactor = PeriodicCompactor(repository, 0.01).start()
+        try:
+            assert repository.compacted.wait(5)
+        finally:
+            compactor.stop()
+
+        assert repository.attempts >= 2
+        assert "Compaction failed" in caplog.text
+        assert "No space left on device" in caplog.text
@@ -0,0 +1,132 @@
+import csv
+import io
+import json
+from decimal import Decimal
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from src.customer import service as customer_service
+from src.customer.api import router as customer_router
+from src.customer.repository import CustomerRepository
+from src.employee import service as employee_service
+from src.employee.api import router as employee_router
+from src.employee.repository import EmployeeRepository
+from src.export import resolve_export_format, stream_export
+
+
+class Record(BaseModel):
+    name: str
+    salary: Decimal
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """A client of an app serving both stores, each replaced with a fresh in-memory repository."""
+    monkeypatch.setattr(customer_service, "_repository", CustomerRepository())
+    monkeypatch.setattr(employee_service, "_repository", EmployeeRepository())
+    app = FastAPI()
+    app.include_router(customer_router)
+    app.include_router(employee_router)
+    return TestClient(app)
+
+
+class TestResolveExportFormat:
+    """Tests for resolve_export_format."""
+
+    def test_defaults_to_ndjson(self):
+        """Without a format or Accept header, exports are NDJSON."""
+        assert resolve_export_format(None, None) == "ndjson"
+        assert resolve_export_format(None, "*/*") == "ndjson"
+        assert resolve_export_format(None, "application/json") == "ndjson"
+
+    def test_accept_negotiation(self):
+        """The first supported media type in Accept picks the format, parameters ignored."""
+        assert resolve_export_format(None, "text/csv") == "csv"
+        assert resolve_export_format(None, "text/html, text/csv;q=0.9, */*;q=0.1") == "csv"
+        assert resolve_export_format(None, "application/x-ndjson, text/csv") == "ndjson"
+
+    def test_format_overrides_accept(self):
+        """The format query parameter wins over Accept."""
+        assert resolve_export_format("ndjson", "text/csv") == "ndjson"
+        assert resolve_export_format("csv", "application/x-ndjson") == "csv"
+
+
+class TestStreamExport:
+    """Tests for stream_export."""
+
+    def test_ndjson(self):
+        """Yields one chunk per batch, one JSON object per line."""
+        batches = [[Record(name="Ann", salary=Decimal("1.50"))], [Record(name="Bob", salary=Decimal("2"))]]
+
+        chunks = list(stream_export(batches, "ndjson", ["name", "salary"]))
+
+        assert len(chunks) == 2
+        assert [json.loads(line) for line in "".join(chunks).splitlines()] == [
+            {"name": "Ann", "salary": "1.50"},
+            {"name": "Bob", "salary": "2"},
+        ]
+
+    def test_csv_header_and_quoting(self):
+        """Starts with a header row, and quotes values holding commas, quotes or newlines."""
+        batches = [[
+            Record(name='Doe, "Jane"', salary=Decimal("50000.00")),
+            Record(name="line\nbreak", salary=Decimal("0.10")),
+        ]]
+
+        text = "".join(stream_export(batches, "csv", ["name", "salary"]))
+
+        assert text.splitlines()[0] == "name,salary"
+        assert '"Doe, ""Jane""",50000.00' in text
+        assert list(csv.reader(io.StringIO(text))) == [
+            ["name", "salary"],
+            ['Doe, "Jane"', "50000.00"],
+            ["line\nbreak", "0.10"],
+        ]
+
+    def test_csv_without_records(self):
+        """An empty export still has its header row."""
+        assert "".join(stream_export([], "csv", ["name", "salary"])) == "name,salary\r\n"
+
+
+class TestExportEndpoints:
+    """Tests for GET /customers/export and /employees/export."""
+
+    def test_customers_ndjson(self, client):
+        """Streams every customer as NDJSON by default."""
+        customer = customer_service.create_customer("Jane Doe", "jane@example.com", "1", "1 Main St, Springfield")
+
+        response = client.get("/customers/export")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert [json.loads(line) for line in response.text.splitlines()] == [json.loads(customer.model_dump_json())]
+
+    def test_customers_csv_from_accept(self, client):
+        """Falls back to the Accept header for the format."""
+        customer = customer_service.create_customer("Jane Doe", "jane@example.com", "1", "1 Main St, Springfield")
+
+        response = client.get("/customers/export", headers={"Accept": "text/csv"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert list(csv.reader(io.StringIO(response.text))) == [
+            ["id", "name", "email", "phone", "address"],
+            [str(customer.id), "Jane Doe", "jane@example.com", "1", "1 Main St, Springfield"],
+        ]
+
+    def test_employees_format_overrides_accept(self, client):
+        """The format parameter wins over Accept, with salaries written as exact decimals."""
+        employee = employee_service.create_employee("Jane Doe", "jane@example.com", "1", "Sales", "Rep", Decimal("50000.10"))
+
+        ndjson = client.get("/employees/export", params={"format": "ndjson"}, headers={"Accept": "text/csv"})
+        rows = list(csv.DictReader(io.StringIO(client.get("/employees/export", params={"format": "csv"}).text)))
+
+        assert ndjson.headers["content-type"] == "application/x-ndjson"
+        assert json.loads(ndjson.text)["salary"] == "50000.10"
+        assert [(row["id"], row["salary"]) for row in rows] == [(str(employee.id), "50000.10")]
+
+    def test_unsupported_format(self, client):
+        """Formats other than ndjson and csv are rejected before any export starts."""
+        assert client.get("/customers/export", params={"format": "xml"}).status_code == 422
+        assert client.get("/employees/export", params={"format": "xml"}).status_code == 422
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import threading
+import pytest
+from src.customer import service as customer_service
+from src.customer.repository import CustomerRepository
+from src.employee import service as employee_service
+from src.employee.repository import EmployeeRepository
+from src.health import liveness_endpoint, readiness_endpoint
+
+
+@pytest.fixture
+def stores(monkeypatch):
+    """Replace both services' repositories with fresh, warmed-up in-memory ones."""
+    warmed_up = threading.Event()
+    warmed_up.set()
+    for service, repository in ((customer_service, CustomerRepository()), (employee_service, EmployeeRepository())):
+        monkeypatch.setattr(service, "_repository", repository)
+        monkeypatch.setattr(service, "_warmed_up", warmed_up)
+    return warmed_up
+
+
+class FailingRepository:
+    def count(self):
+        raise RuntimeError("unable to open database file")
+
+
+class TestLiveness:
+    """Tests for /healthz."""
+
+    def test_liveness(self):
+        """Answers a constant body."""
+        response = asyncio.run(liveness_endpoint())
+
+        assert response.status_code == 200
+        assert json.loads(response.body) == {"status": "ok"}
+
+
+class TestReadiness:
+    """Tests for /readyz."""
+
+    def test_ready_with_store_sizes(self, stores):
+        """Reports every store ready with its record count."""
+        employee_service.create_employee("Jane Doe", "jane@example.com", "1", "Sales", "Rep", 50000)
+
+        response = readiness_endpoint()
+
+        assert response.status_code == 200
+        assert json.loads(response.body) == {
+            "status": "ready",
+            "stores": {
+                "customers": {"ready": True, "records": 0},
+                "employees": {"ready": True, "records": 1},
+            },
+        }
+
+    def test_unavailable_while_warming_up(self, stores):
+        """Stays unavailable until the stores' indexes have been built."""
+        stores.clear()
+
+        response = readiness_endpoint()
+
+        assert response.status_code == 503
+        assert json.loads(response.body)["stores"]["customers"] == {"ready": False, "records": 0}
+
+    def test_unavailable_when_a_store_fails(self, stores, monkeypatch):
+        """A store that cannot be read makes the app unavailable, with its error."""
+        monkeypatch.setattr(customer_service, "_repository", FailingRepository())
+
+        response = readiness_endpoint()
+
+        assert response.status_code == 503
+        assert json.loads(response.body) == {
+            "status": "unavailable",
+            "stores": {
+                "customers": {"ready": False, "error": "unable to open database file"},
+                "employees": {"ready": True, "records": 0},
+            },
+        }
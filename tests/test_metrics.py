@@ -0,0 +1,216 @@
+import asyncio
+import pytest
+from fastapi import FastAPI, HTTPException
+from src.metrics import LATENCY_BUCKETS, UNMATCHED_ROUTE, MetricsMiddleware, MetricsRegistry, TimedRepository
+
+
+def call(app, path):
+    """Run one GET request through the ASGI `app` and return the response status."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("test", 0),
+        "server": ("test", 80),
+    }
+    statuses = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    asyncio.run(app(scope, receive, send))
+    return statuses[0]
+
+
+def rendered(registry):
+    return registry.render().decode().splitlines()
+
+
+class TestMetricsRegistry:
+    """Tests for MetricsRegistry exposition."""
+
+    def test_request_counts_and_errors(self):
+        """Counts every request by status, and server errors by route."""
+        registry = MetricsRegistry()
+        registry.observe_request("GET", "/customers/{customer_id}", 200, 0.0003)
+        registry.observe_request("GET", "/customers/{customer_id}", 200, 0.02)
+        registry.observe_request("GET", "/customers/{customer_id}", 503, 0.5)
+        registry.observe_request("GET", "/customers/{customer_id}", 404, 0.001)
+
+        lines = rendered(registry)
+
+        assert "# TYPE http_requests_total counter" in lines
+        assert 'http_requests_total{method="GET",route="/customers/{customer_id}",status="200"} 2' in lines
+        assert 'http_requests_total{method="GET",route="/customers/{customer_id}",status="503"} 1' in lines
+        assert "# TYPE http_request_errors_total counter" in lines
+        assert 'http_request_errors_total{method="GET",route="/customers/{customer_id}"} 1' in lines
+
+    def test_histogram_lines(self):
+        """Buckets are cumulative and end with +Inf, followed by the sum and count."""
+        registry = MetricsRegistry()
+        registry.observe_operation("customers", "get", 0.0003)
+        registry.observe_operation("customers", "get", 0.02)
+        registry.observe_operation("customers", "get", 30.0)
+
+        lines = [line for line in rendered(registry) if line.startswith("repository_operation_duration_seconds")]
+
+        labels = 'store="customers",operation="get"'
+        assert len(lines) == len(LATENCY_BUCKETS) + 3
+        assert lines[0] == f'repository_operation_duration_seconds_bucket{{{labels},le="0.0005"}} 1'
+        assert f'repository_operation_duration_seconds_bucket{{{labels},le="0.01"}} 1' in lines
+        assert f'repository_operation_duration_seconds_bucket{{{labels},le="0.025"}} 2' in lines
+        assert f'repository_operation_duration_seconds_bucket{{{labels},le="10.0"}} 2' in lines
+        assert lines[-3] == f'repository_operation_duration_seconds_bucket{{{labels},le="+Inf"}} 3'
+        assert lines[-2] == f"repository_operation_duration_seconds_sum{{{labels}}} {0.0003 + 0.02 + 30.0}"
+        assert lines[-1] == f"repository_operation_duration_seconds_count{{{labels}}} 3"
+
+    def test_label_values_are_escaped(self):
+        """Quotes, backslashes and newlines in label values are escaped."""
+        registry = MetricsRegistry()
+        registry.observe_request("GET", 'a"b\\c\nd', 200, 0.001)
+
+        assert 'http_requests_total{method="GET",route="a\\"b\\\\c\\nd",status="200"} 1' in rendered(registry)
+
+    def test_gauges_are_read_at_render(self):
+        """Gauges report what their callback returns when rendered."""
+        registry = MetricsRegistry()
+        records = [1, 2]
+        registry.gauge("store_records", "Records held by each store.", {"store": "customers"}, lambda: len(records))
+        records.append(3)
+
+        lines = rendered(registry)
+
+        assert "# HELP store_records Records held by each store." in lines
+        assert "# TYPE store_records gauge" in lines
+        assert 'store_records{store="customers"} 3' in lines
+
+    def test_failing_gauge_is_skipped(self):
+        """A gauge whose callback raises is left out without failing the others."""
+        registry = MetricsRegistry()
+
+        def broken():
+            raise RuntimeError("database is locked")
+
+        registry.gauge("store_records", "Records held by each store.", {"store": "customers"}, broken)
+        registry.gauge("store_records", "Records held by each store.", {"store": "employees"}, lambda: 4)
+
+        lines = rendered(registry)
+
+        assert 'store_records{store="employees"} 4' in lines
+        assert not any(line.startswith('store_records{store="customers"}') for line in lines)
+
+
+class TestMetricsMiddleware:
+    """Tests for MetricsMiddleware."""
+
+    @pytest.fixture
+    def app(self):
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        def get_item(item_id: int):
+            if item_id == 0:
+                raise HTTPException(status_code=404)
+            return {"id": item_id}
+
+        @app.get("/broken")
+        def broken():
+            raise RuntimeError("boom")
+
+        return app
+
+    def test_requests_are_labelled_by_route_template(self, app):
+        """Requests to one route share a series whatever their path parameters."""
+        registry = MetricsRegistry()
+        metered = MetricsMiddleware(app, registry)
+
+        assert call(metered, "/items/1") == 200
+        assert call(metered, "/items/2") == 200
+        assert call(metered, "/items/0") == 404
+        assert call(metered, "/nowhere") == 404
+
+        lines = rendered(registry)
+        assert 'http_requests_total{method="GET",route="/items/{item_id}",status="200"} 2' in lines
+        assert 'http_requests_total{method="GET",route="/items/{item_id}",status="404"} 1' in lines
+        assert f'http_requests_total{{method="GET",route="{UNMATCHED_ROUTE}",status="404"}} 1' in lines
+
+    def test_unhandled_errors_count_as_server_errors(self, app):
+        """A request whose handler raises is recorded with status 500."""
+        registry = MetricsRegistry()
+        metered = MetricsMiddleware(app, registry)
+
+        with pytest.raises(RuntimeError):
+            call(metered, "/broken")
+
+        assert 'http_request_errors_total{method="GET",route="/broken"} 1' in rendered(registry)
+
+
+class FakeRepository:
+    size = 3
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, key):
+        self.calls.append(key)
+        return f"record {key}"
+
+    def delete(self, key):
+        raise ValueError(f"'{key}' not found")
+
+    def transaction(self):
+        return "transaction"
+
+
+class TestTimedRepository:
+    """Tests for TimedRepository."""
+
+    def test_calls_are_forwarded_and_timed(self):
+        """Calls return what the repository returns, each recorded under its operation."""
+        registry = MetricsRegistry()
+        repository = FakeRepository()
+        timed = TimedRepository(repository, "customers", registry)
+
+        assert timed.get(1) == "record 1"
+        assert timed.get(2) == "record 2"
+
+        assert repository.calls == [1, 2]
+        assert 'repository_operation_duration_seconds_count{store="customers",operation="get"} 2' in rendered(registry)
+
+    def test_failing_calls_are_timed(self):
+        """Calls that raise are still recorded, and their error propagates."""
+        registry = MetricsRegistry()
+        timed = TimedRepository(FakeRepository(), "customers", registry)
+
+        with pytest.raises(ValueError):
+            timed.delete(1)
+
+        assert 'repository_operation_duration_seconds_count{store="customers",operation="delete"} 1' in rendered(registry)
+
+    def test_untimed_and_plain_attributes_pass_through(self):
+        """Context managers, iterators and plain attributes are returned untouched."""
+        registry = MetricsRegistry()
+        repository = FakeRepository()
+        timed = TimedRepository(repository, "customers", registry)
+
+        assert timed.transaction == repository.transaction
+        assert timed.size == 3
+        assert timed.transaction() == "transaction"
+        assert "repository_operation_duration_seconds_count" not in registry.render().decode()
+
+    def test_wrappers_are_cached(self):
+        """Later lookups of a method reuse its wrapper."""
+        timed = TimedRepository(FakeRepository(), "customers", MetricsRegistry())
+
+        assert timed.get is timed.get
@@ -0,0 +1,141 @@
+import asyncio
+import contextvars
+import os
+import re
+import sys
+import time
+from src.profiling import (
+    PROFILE_ID_HEADER,
+    ProfilingMiddleware,
+    RequestProfile,
+    _current_profile,
+    _file_name,
+    _requested_token,
+)
+
+
+def http_scope(path="/work", query=b"", headers=()):
+    return {"type": "http", "method": "GET", "path": path, "query_string": query, "headers": list(headers)}
+
+
+def call(app, scope):
+    """Run one request through `app` and return the messages it sent."""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+async def busy_app(scope, receive, send):
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"done"})
+
+
+class TestRequestProfileStack:
+    """Tests for attributing sampled stacks to a request."""
+
+    def test_stack_from_request_frame(self):
+        """Stacks run from the request's frame to the leaf."""
+        profile = RequestProfile(0.001)
+
+        def request():
+            profile._frame = sys._getframe()
+            return handler()
+
+        def handler():
+            return profile._stack(sys._getframe())
+
+        stack = request()
+
+        assert [label.split(" (")[0] for label in stack] == [
+            "TestRequestProfileStack.test_stack_from_request_frame.<locals>.request",
+            "TestRequestProfileStack.test_stack_from_request_frame.<locals>.handler",
+        ]
+        assert stack[0].endswith(f"(test_profiling.py:{request.__code__.co_firstlineno})")
+
+    def test_stack_from_worker_running_request_context(self):
+        """Worker threads count from the call they run in the request's context."""
+        profile = RequestProfile(0.001)
+        token = _current_profile.set(profile)
+        request_context = contextvars.copy_context()
+        _current_profile.reset(token)
+
+        def worker(context):
+            return context.run(handler)
+
+        def handler():
+            return profile._stack(sys._getframe())
+
+        assert [label.split(" (")[0] for label in worker(request_context)] == [
+            "TestRequestProfileStack.test_stack_from_worker_running_request_context.<locals>.handler",
+        ]
+        assert worker(contextvars.copy_context()) is None
+
+    def test_other_stacks_are_not_attributed(self):
+        """Stacks holding neither the request's frame nor its context belong to other requests."""
+        profile = RequestProfile(0.001)
+        profile._frame = None
+
+        assert profile._stack(sys._getframe()) is None
+
+
+class TestRequestedToken:
+    """Tests for reading the profiling token off a request."""
+
+    def test_header(self):
+        """The token may come in the X-Profile header."""
+        assert _requested_token(http_scope(headers=[(b"x-profile", b"secret")])) == "secret"
+
+    def test_query_parameter(self):
+        """The token may come in the profile query parameter."""
+        assert _requested_token(http_scope(query=b"limit=5&profile=secret")) == "secret"
+
+    def test_absent(self):
+        """Requests without either carry no token."""
+        assert _requested_token(http_scope(query=b"limit=5", headers=[(b"accept", b"*/*")])) is None
+
+
+class TestFileName:
+    """Tests for naming profile files."""
+
+    def test_route_is_sanitized(self):
+        """Route templates become file-name-safe slugs."""
+        assert _file_name("id", "PUT", "/employees/{employee_id}") == "id-PUT-employees__employee_id.folded"
+        assert _file_name("id", "GET", "/../../etc/passwd") == "id-GET-etc_passwd.folded"
+        assert _file_name("id", "GET", "/") == "id-GET-root.folded"
+
+
+class TestProfilingMiddleware:
+    """Tests for ProfilingMiddleware."""
+
+    def test_requests_without_token_pass_through(self, tmp_path):
+        """Requests without the right token are neither tagged nor profiled."""
+        app = ProfilingMiddleware(busy_app, token="secret", directory=str(tmp_path), interval=0.001)
+
+        for scope in (http_scope(), http_scope(headers=[(b"x-profile", b"wrong")])):
+            start = call(app, scope)[0]
+            assert start["headers"] == []
+        assert os.listdir(tmp_path) == []
+
+    def test_profiled_request_writes_folded_stacks(self, tmp_path):
+        """A profiled request is tagged with its profile id, written as collapsed stacks."""
+        app = ProfilingMiddleware(busy_app, token="secret", directory=str(tmp_path), interval=0.001)
+
+        start = call(app, http_scope(query=b"profile=secret"))[0]
+
+        profile_id = dict(start["headers"])[PROFILE_ID_HEADER].decode()
+        [name] = os.listdir(tmp_path)
+        assert name == f"{profile_id}-GET-work.folded"
+        with open(tmp_path / name) as file:
+            lines = file.read().splitlines()
+        assert lines and all(re.fullmatch(r"GET /work;\S.* \d+", line) for line in lines)
+        assert any(";busy_app (test_profiling.py:" in line for line in lines)
@@ -0,0 +1,62 @@
+import random
+from bisect import bisect_left, bisect_right
+import pytest
+from src.sorted_list import SortedList
+
+
+class TestSortedList:
+    """Tests for SortedList."""
+
+    @pytest.fixture
+    def rng(self):
+        return random.Random(3)
+
+    def test_matches_a_sorted_list(self, rng):
+        """Order, length and indexing match a plain sorted list after every write."""
+        values = SortedList(load=4)
+        expected = []
+        for _ in range(500):
+            if expected and rng.random() < 0.4:
+                value = rng.choice(expected)
+                values.remove(value)
+                expected.remove(value)
+            else:
+                value = rng.randrange(50)
+                values.add(value)
+                expected.append(value)
+                expected.sort()
+            assert list(values) == expected
+            assert len(values) == len(expected)
+            if expected:
+                index = rng.randrange(-len(expected), len(expected))
+                assert values[index] == expected[index]
+
+    def test_buckets_split_and_empty_ones_go(self):
+        """Buckets split past twice the load, and emptied buckets are dropped."""
+        values = SortedList(range(8), load=2)
+        for value in range(8, 20):
+            values.add(value)
+        assert all(len(bucket) <= 4 for bucket in values._buckets)
+        for value in range(20):
+            values.remove(value)
+        assert len(values) == 0 and values._buckets == [] and list(values) == []
+
+    def test_bisect_and_slices(self, rng):
+        """Bisection indexes and slices in either direction match a plain sorted list."""
+        expected = sorted(rng.randrange(30) for _ in range(100))
+        values = SortedList(expected, load=3)
+        for value in range(-1, 32):
+            start, stop = values.bisect_left(value), values.bisect_right(value + 5)
+            assert (start, stop) == (bisect_left(expected, value), bisect_right(expected, value + 5))
+            assert list(values.islice(start, stop)) == expected[start:stop]
+            assert list(values.islice(start, stop, reverse=True)) == expected[start:stop][::-1]
+
+    def test_remove_missing_value(self):
+        """Removing a value that is not held raises ValueError."""
+        values = SortedList([1, 3], load=1)
+        with pytest.raises(ValueError):
+            values.remove(2)
+        with pytest.raises(ValueError):
+            values.remove(4)
+        with pytest.raises(IndexError):
+            values[2]
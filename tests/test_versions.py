@@ -0,0 +1,35 @@
+import pytest
+from src.versions import VersionConflict, etag_matches, parse_if_match
+
+
+class TestEtagMatches:
+    """Tests for If-None-Match comparison."""
+
+    def test_weak_tags_match(self):
+        """If-None-Match compares weakly."""
+        assert etag_matches('W/"3"', 3)
+        assert etag_matches('"2", "3"', 3)
+        assert etag_matches("*", 3)
+        assert not etag_matches('"2"', 3)
+
+
+class TestParseIfMatch:
+    """Tests for If-Match parsing."""
+
+    def test_strong_tag(self):
+        """A single strong tag names the expected version."""
+        assert parse_if_match('"3"') == 3
+        assert parse_if_match("*") is None
+        assert parse_if_match(None) is None
+
+    def test_weak_tag_never_matches(self):
+        """If-Match compares strongly, so a weak tag is a failed precondition."""
+        with pytest.raises(VersionConflict):
+            parse_if_match('W/"3"')
+
+    def test_malformed_header(self):
+        """Anything but one entity tag or '*' is rejected."""
+        with pytest.raises(ValueError):
+            parse_if_match('"2", "3"')
+        with pytest.raises(ValueError):
+            parse_if_match("3")